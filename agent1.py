@@ -1,10 +1,78 @@
 # Imports
-from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, BFS
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, pathLength, nextHop
 import pandas as pd
 from openpyxl import load_workbook
 import random
+from policytables import decisionTable, compiledMove
 
-def agent1(nodes, predatorPos, agentPos, preyPos):
+def agent1Movement(nodes, predatorPos, agentPos, preyPos):
+    """_summary_
+        Decision rule of Agent 1: move away from the predator and towards the prey, picking at random among the best neighbours
+    Args:
+        nodes (Dictionary): Dictionary with all the node information in the graph
+        predatorPos (int): The location of the Predator on the chain graph
+        agentPos (int): The location of the Agent on the chain graph
+        preyPos (int): The location of the Prey on the chain graph
+
+    Returns: The next Agent position, the same position if no neighbour is better
+        _type_: int
+    """
+    maxagentPredNeighDiff = 0
+    maxagentPreyNeighDiff = 0
+    nextNeigh = list()
+    maxDiff = -50
+    maybeNeigh = list()
+    maxPredDistNeigh = list()
+    agentPredDist = pathLength(nodes, agentPos, predatorPos)
+    agentPreyDist = pathLength(nodes, agentPos, preyPos)
+    maxPredDist = agentPredDist
+    for neighbour in nodes[agentPos]["neighbours"]:
+        # Find the distance between the Neighbour and the Prey
+        neighPreyDist = pathLength(nodes, neighbour, preyPos)
+        # Find the distance between the Neighbour and the Predator
+        neighPredDist = pathLength(nodes, neighbour, predatorPos)
+        difference0 = neighPredDist - neighPreyDist
+        agentPredNeighDiff0 = (neighPredDist-agentPredDist)
+        agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
+        # Get the closest neighbour to the prey for the agent to move to
+        if agentPreyNeighDiff0>maxagentPreyNeighDiff and agentPredNeighDiff0>maxagentPredNeighDiff:
+            maybeNeigh.clear()
+            maxagentPredNeighDiff = agentPredNeighDiff0
+            maxagentPreyNeighDiff = agentPreyNeighDiff0
+            maybeNeigh.append(neighbour)
+        # If neighbour node keeps distance to the prey and predator same as before
+        if agentPreyNeighDiff0==maxagentPreyNeighDiff and agentPredNeighDiff0==maxagentPredNeighDiff:
+            maybeNeigh.append(neighbour)
+        # Node to increase the distance between Predator and Agent
+        if neighPredDist > maxPredDist:
+            maxPredDistNeigh.clear()
+            maxPredDist = neighPredDist
+            maxPredDistNeigh.append(neighbour)
+        # Node to keep the distance between Predator and Agent same
+        if neighPredDist == maxPredDist:
+            maxPredDistNeigh.append(neighbour)
+            
+        if difference0>maxDiff:
+            nextNeigh.clear()
+            maxDiff = difference0
+            nextNeigh.append(neighbour)
+                
+        if difference0==maxDiff:
+            nextNeigh.append(neighbour)
+    # Agent moves away from predator near to the prey
+    if maxDiff >= 0:
+        #print("maxd calld")
+        agentPos = random.choice(nextNeigh)
+    elif len(maybeNeigh) > 0:
+        #print("maybe calld")
+        agentPos = random.choice(maybeNeigh)
+    elif len(maxPredDistNeigh) > 0:
+        #print("max pred calld")
+        agentPos = random.choice(maxPredDistNeigh)
+    #ELSE STAY SAME PLACE.
+    return agentPos
+
+def agent1(nodes, predatorPos, agentPos, preyPos, compiled=False):
     """_summary_
         Main function for the running of Agent 1 prioritizing to maximize the distance between the agent and the predator and minimize 
         the distance between the Agent and Prey
@@ -13,12 +81,14 @@ def agent1(nodes, predatorPos, agentPos, preyPos):
         predatorPos (int): The location of the Predator on the chain graph
         agentPos (int): The location of the Agent on the chain graph
         preyPos (int): The location of the Prey on the chain graph
+        compiled (bool, optional): Use the compiled decision table of the graph instead of evaluating the rule every step
 
     Returns: The status of completion of the agent the final step count for the Agent to reach the goal, the path taken by the agent1 
             and the path of the predator.
         _type_: json
     """
     threshold = 1000
+    table = decisionTable(nodes, "agent1") if compiled else None
     agentPath = list()
     agentPath.append(agentPos)
     predPath = list()
@@ -35,65 +105,11 @@ def agent1(nodes, predatorPos, agentPos, preyPos):
         if agentPos == predatorPos:
             return {"statusCode": 400, "steps":counter, "AgentPath":agentPath, "PredPath":predPath}
         
-        maxagentPredNeighDiff = 0
-        maxagentPreyNeighDiff = 0
-        nextNeigh = list()
-        maxDiff = -50
-        maybeNeigh = list()
-        maxPredDistNeigh = list()
-        agentPathPred = random.choice(BFS(nodes, agentPos, predatorPos)["path"])
-        agentPathPrey = random.choice(BFS(nodes, agentPos, preyPos)["path"])
-        agentPredDist = len(agentPathPred)
-        agentPreyDist = len(agentPathPrey)
-        maxPredDist = agentPredDist
-        for neighbour in nodes[agentPos]["neighbours"]:
-            # Find the distance between the Neighbour and the Prey
-            preyDict = BFS(nodes, neighbour, preyPos)
-            # Find the distance between the Neighbour and the Predator
-            predatorDict = BFS(nodes, neighbour, predatorPos)
-            randInd = random.randint(0,len(preyDict["path"])-1)
-            newPathPrey = preyDict["path"][randInd]
-            randInd = random.randint(0,len(predatorDict["path"])-1)
-            newPathPred = predatorDict["path"][randInd]
-            difference0 = len(newPathPred) - len(newPathPrey)
-            agentPredNeighDiff0 = (len(newPathPred)-agentPredDist)
-            agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
-            # Get the closest neighbour to the prey for the agent to move to
-            if agentPreyNeighDiff0>maxagentPreyNeighDiff and agentPredNeighDiff0>maxagentPredNeighDiff:
-                maybeNeigh.clear()
-                maxagentPredNeighDiff = agentPredNeighDiff0
-                maxagentPreyNeighDiff = agentPreyNeighDiff0
-                maybeNeigh.append(neighbour)
-            # If neighbour node keeps distance to the prey and predator same as before
-            if agentPreyNeighDiff0==maxagentPreyNeighDiff and agentPredNeighDiff0==maxagentPredNeighDiff:
-                maybeNeigh.append(neighbour)
-            # Node to increase the distance between Predator and Agent
-            if len(newPathPred) > maxPredDist:
-                maxPredDistNeigh.clear()
-                maxPredDist = len(newPathPred)
-                maxPredDistNeigh.append(neighbour)
-            # Node to keep the distance between Predator and Agent same
-            if len(newPathPred) == maxPredDist:
-                maxPredDistNeigh.append(neighbour)
-            
-            if difference0>maxDiff:
-                nextNeigh.clear()
-                maxDiff = difference0
-                nextNeigh.append(neighbour)
-                
-            if difference0==maxDiff:
-                nextNeigh.append(neighbour)
-        # Agent moves away from predator near to the prey
-        if maxDiff >= 0:
-            #print("maxd calld")
-            agentPos = random.choice(nextNeigh)
-        elif len(maybeNeigh) > 0:
-            #print("maybe calld")
-            agentPos = random.choice(maybeNeigh)
-        elif len(maxPredDistNeigh) > 0:
-            #print("max pred calld")
-            agentPos = random.choice(maxPredDistNeigh)
-        #ELSE STAY SAME PLACE.
+        if table is not None:
+            # Read the candidate moves from the compiled decision table
+            agentPos = compiledMove(nodes, table, agentPos, predatorPos, preyPos)
+        else:
+            agentPos = agent1Movement(nodes, predatorPos, agentPos, preyPos)
         agentPath.append(agentPos)
         # If Agent reaches Prey Position which ih the Goal State
         if agentPos == preyPos:
@@ -114,22 +130,31 @@ def agent1(nodes, predatorPos, agentPos, preyPos):
         
     return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath}
         
-def driver():
+def driver(corpus=None, trial=0, compiled=False):
     """_summary_
         Driver Code for the Agent 1
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
+        compiled (bool, optional): Run the agent from its compiled decision table
     """
-    nodes, _ = genEnvironment()
-    predatorPos, agentPos, preyPos = spawnCreatures()
-    return agent1(nodes, predatorPos, agentPos, preyPos)
+    if corpus is None:
+        nodes, _ = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, _, predatorPos, agentPos, preyPos = corpus.trial(trial)
+    return agent1(nodes, predatorPos, agentPos, preyPos, compiled)
 
-def dataCollection():
+def dataCollection(corpus=None):
     """_summary_
         Function to collect the data regarding Agent 1, its performance and all other statistical information
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions shared by every trial, each trial generates its own environment when None
     """
     final_data = list()
     for i in range(300):
         print("Counter: ",i)
-        data = driver()
+        data = driver(corpus, i)
         final_data.append(data)
             
     df1 = pd.DataFrame(final_data)
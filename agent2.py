@@ -1,9 +1,10 @@
 # Imports
-from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, BFS
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, pathLength, nextHop
 import pandas as pd
 from openpyxl import load_workbook
 import random
 import copy
+from policytables import decisionTable, compiledMove
 
 def simulateFuture(nodes, agentPos, preyPos, agentPreyDist):
     """_summary_
@@ -27,14 +28,11 @@ def simulateFuture(nodes, agentPos, preyPos, agentPreyDist):
         while timeStamp<agentPreyDist and simulatedAgentPos != simulatedPreyPos:
             maybeNeigh = [simulatedAgentPos]
             # Find the path between the Neighbour and the Prey
-            agentPathPrey = random.choice(BFS(nodes, simulatedAgentPos, simulatedPreyPos)["path"])
-            agentPreyDist = len(agentPathPrey)
+            agentPreyDist = pathLength(nodes, simulatedAgentPos, simulatedPreyPos)
             maxagentPreyNeighDiff = 0
             for neighbour in nodes[simulatedAgentPos]["neighbours"]:
-                preyDict = BFS(nodes, neighbour, simulatedPreyPos)
-                randInd = random.randint(0,len(preyDict["path"])-1)
-                newPathPrey = preyDict["path"][randInd]
-                agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
+                neighPreyDist = pathLength(nodes, neighbour, simulatedPreyPos)
+                agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
                 # If agentPreyNeighDiff0 distance is greater than before clear and update
                 if agentPreyNeighDiff0>maxagentPreyNeighDiff:
                     maybeNeigh.clear()
@@ -48,13 +46,10 @@ def simulateFuture(nodes, agentPos, preyPos, agentPreyDist):
             timeStamp += 1
         nextNeigh.append(simulatedAgentPos)
     finalAgentPos = random.choice(nextNeigh)
-    agentPath = random.choice(BFS(nodes, agentPos, finalAgentPos)["path"])
-    
-    if len(agentPath) > 1:
-        agentPos = agentPath[1]
+    agentPos = nextHop(nodes, agentPos, finalAgentPos)
     return agentPos
 
-def agent2Movement(nodes, predPos, agentPos, preyPos, probUse, distUse):
+def agent2Movement(nodes, predPos, agentPos, preyPos, probUse, distUse, table=None):
     """_summary_
         This Function is used to plan the Agent 2 movement taking into account the simulations as well as the distance 
         between the prey with the Agent and the predator with the Agent
@@ -65,42 +60,43 @@ def agent2Movement(nodes, predPos, agentPos, preyPos, probUse, distUse):
         agentPos (int): The location of the Agent on the chain graph
         preyPos (int): The location of the Prey on the chain graph
         distUse (int): Number of times the agent uses distance i.e moves away from the predator when agentPreyDist > agentPredDist
+        table (np.ndarray, optional): Compiled decision table of the distance rule, the rule is evaluated when None
 
     Returns: The final agent Position for the next move, the number of times probability is Used and simulations take place and if distance 
     is used to make the agent move away from the predator
         _type_: int
     """
     maxPredDistNeigh = [agentPos]
-    agentPathPred = random.choice(BFS(nodes, agentPos, predPos)["path"])
-    agentPathPrey = random.choice(BFS(nodes, agentPos, preyPos)["path"])
-    agentPredDist = len(agentPathPred)
-    agentPreyDist = len(agentPathPrey)
+    agentPredDist = pathLength(nodes, agentPos, predPos)
+    agentPreyDist = pathLength(nodes, agentPos, preyPos)
     maxPredDist = agentPredDist
     if agentPreyDist < agentPredDist:
         probUse += 1
         agentPos = simulateFuture(nodes, agentPos, preyPos, agentPreyDist)
+    elif table is not None:
+        distUse += 1
+        # Read the candidate moves from the compiled decision table
+        agentPos = compiledMove(nodes, table, agentPos, predPos, preyPos)
     else:
         
         distUse += 1
         for neighbour in nodes[agentPos]["neighbours"]:
             #print(neighbour, " maxPredDistNeigh", maxPredDistNeigh)
-            predatorDict = BFS(nodes, neighbour, predPos)
             # Find the distance between the Neighbour and the Predator
-            randInd = random.randint(0,len(predatorDict["path"])-1)
-            newPathPred = predatorDict["path"][randInd]
+            neighPredDist = pathLength(nodes, neighbour, predPos)
             
-            if len(newPathPred) > maxPredDist:
+            if neighPredDist > maxPredDist:
                 maxPredDistNeigh.clear()
-                maxPredDist = len(newPathPred)
+                maxPredDist = neighPredDist
                 maxPredDistNeigh.append(neighbour)
                 
-            elif len(newPathPred) == maxPredDist:
+            elif neighPredDist == maxPredDist:
                 maxPredDistNeigh.append(neighbour)
         # Agent moves away from predator near to the prey
         agentPos = random.choice(maxPredDistNeigh)
     return agentPos, probUse, distUse
 
-def agent2(nodes, predatorPos, agentPos, preyPos):
+def agent2(nodes, predatorPos, agentPos, preyPos, compiled=False):
     """_summary_
         Main function for the running of Agent 2 prioritizing to maximize the distance between the agent and the predator and minimize 
         the distance between the Agent and Prey
@@ -109,12 +105,14 @@ def agent2(nodes, predatorPos, agentPos, preyPos):
         predatorPos (int): The location of the Predator on the chain graph
         agentPos (int): The location of the Agent on the chain graph
         preyPos (int): The location of the Prey on the chain graph
+        compiled (bool, optional): Use the compiled decision table of the graph for the distance rule
 
     Returns: The status of completion of the agent the final step count for the Agent to reach the goal, the path taken by the agent 2 
             and the path of the predator.
         _type_: json
     """
     threshold = 1000
+    table = decisionTable(nodes, "agent2") if compiled else None
     agentPath = list()
     agentPath.append(agentPos)
     predPath = list()
@@ -132,7 +130,7 @@ def agent2(nodes, predatorPos, agentPos, preyPos):
         if agentPos == predatorPos:
             return {"statusCode": 400, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "probUse":probUse, "distUse":distUse}
         #print(agentPos)
-        agentPos, probUse, distUse = agent2Movement(nodes, predatorPos, agentPos, preyPos, probUse, distUse)
+        agentPos, probUse, distUse = agent2Movement(nodes, predatorPos, agentPos, preyPos, probUse, distUse, table)
         #print("ss=", agentPos)
         #ELSE STAY SAME PLACE.
         agentPath.append(agentPos)
@@ -155,22 +153,31 @@ def agent2(nodes, predatorPos, agentPos, preyPos):
         
     return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "probUse":probUse, "distUse":distUse}
         
-def driver():
+def driver(corpus=None, trial=0, compiled=False):
     """_summary_
         Driver Code for the Agent 2
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
+        compiled (bool, optional): Run the agent from its compiled decision table
     """
-    nodes, _ = genEnvironment()
-    predatorPos, agentPos, preyPos = spawnCreatures()
-    return agent2(nodes, predatorPos, agentPos, preyPos)
+    if corpus is None:
+        nodes, _ = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, _, predatorPos, agentPos, preyPos = corpus.trial(trial)
+    return agent2(nodes, predatorPos, agentPos, preyPos, compiled)
 
-def dataCollection():
+def dataCollection(corpus=None):
     """_summary_
         Function to collect the data regarding Agent 2, its performance and all other statistical information
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions shared by every trial, each trial generates its own environment when None
     """
     final_data = list()
     for i in range(1000):
         print("Counter: ",i)
-        data = driver()
+        data = driver(corpus, i)
         final_data.append(data)
             
     df1 = pd.DataFrame(final_data)
@@ -1,5 +1,6 @@
 # Imports
-from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, BFS
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, pathLength, nextHop, graphOf
+from belief import beliefClass
 import pandas as pd
 from openpyxl import load_workbook
 import numpy as np
@@ -15,16 +16,10 @@ def generatePreyProb(size, agentPos):
         agentPos (int): Location of the agent on the graph
 
     Returns: A list of the initialized probabilities for the entire graph
-        _type_: list
+        _type_: Belief
     """
-    preyNodeProb = list()
-    for i in range(size):
-        if i == agentPos:
-            preyNodeProb.append(0)
-            continue
-        # Probability Initialization
-        preyNodeProb.append(1/(size-1))
-    return preyNodeProb
+    # Probability Initialization
+    return beliefClass(size).uniform(size, agentPos)
 
 def updateTransitPreyProb(nodes, size, preyNodeProb):
     """_summary_
@@ -37,18 +32,10 @@ def updateTransitPreyProb(nodes, size, preyNodeProb):
         preyNodeProb (list): The list of the initialized probabilities for the entire graph
     
     Returns: The updated probability matrix for the entire graph maximizing the probability of the location of the prey
-        _type_: dictionary
+        _type_: Belief
     """
-    newPreyNodeProb = [-100]*size
-    for node in range(size):
-        prob = preyNodeProb[node]/(nodes[node]["degree"]+1)
-        for i in range(nodes[node]["degree"]):
-            neighbour = nodes[node]["neighbours"][i]
-            # Probability Formula used based on Conditional Probability
-            prob += preyNodeProb[neighbour]/(nodes[neighbour]["degree"]+1)
-            newPreyNodeProb[node] = prob
-            
-    return newPreyNodeProb
+    # The Prey stays or moves to one of its neighbours uniformly, one product with the shared transition operator of the graph
+    return preyNodeProb.transit(graphOf(nodes).preyModel())
 
 def updateSurveyPreyProd(size, surveySpot, preyNodeProb, preyPos):
     """_summary_
@@ -61,27 +48,16 @@ def updateSurveyPreyProd(size, surveySpot, preyNodeProb, preyPos):
 
     Returns: 
         Surveying all the nodes in the graph we geth the final probability matrix using conditional Probability to predict the prey location
-     _type_: list
+     _type_: Belief
 
     """
     # Success Condition for survey
     if surveySpot == preyPos:
-        for i in range(size):
-            if i == surveySpot:
-                preyNodeProb[i] = 1
-                continue
-            preyNodeProb[i] = 0
-        return preyNodeProb
+        return preyNodeProb.survey(surveySpot, True)
     else:
-        newPreyNodeProb = [-100]*size
-        for i in range(size):
-            if i == surveySpot:
-                newPreyNodeProb[i] = 0
-                continue
-            # Update the predator Survey probability using the previous survey and the new moves 
-            newPreyNodeProb[i] = preyNodeProb[i]/(1-preyNodeProb[surveySpot])
-        return newPreyNodeProb
-    
+        # A failed survey gives a new belief and leaves the one passed in as it was
+        return preyNodeProb.copy().survey(surveySpot, False)
+
 def agent3Movement(nodes, size, predatorPos, agentPos, preyPos, preyNodeProb, preyCaught):
     """_summary_
         Function to make the Agent3 based on the probabilistic decision graph received from the updateSurveyPreyProd function
@@ -96,39 +72,29 @@ def agent3Movement(nodes, size, predatorPos, agentPos, preyPos, preyNodeProb, pr
     Returns: The new location for the Agent to move to so that it can reach the goal node
         _type_: int
     """
-    maybePrey = np.max(preyNodeProb)
-    maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-    maybePrey = random.choice(maybeprey)
+    maybePrey = preyNodeProb.maxNode()
     if maybePrey == preyPos:
         preyCaught += 1
     #SURVEY BELOW
     preyNodeProb = updateSurveyPreyProd(size, maybePrey, preyNodeProb, preyPos)
-    maybePrey = np.max(preyNodeProb)
-    maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-    maybePrey = random.choice(maybeprey)
+    maybePrey = preyNodeProb.maxNode()
     maxagentPredNeighDiff = 0
     maxagentPreyNeighDiff = 0
     nextNeigh = list()
     maxDiff = -50
     maybeNeigh = list()
     maxPredDistNeigh = list()
-    agentPathPred = random.choice(BFS(nodes, agentPos, predatorPos)["path"])
-    agentPathPrey = random.choice(BFS(nodes, agentPos, maybePrey)["path"])
-    agentPredDist = len(agentPathPred)
-    agentPreyDist = len(agentPathPrey)
+    agentPredDist = pathLength(nodes, agentPos, predatorPos)
+    agentPreyDist = pathLength(nodes, agentPos, maybePrey)
     maxPredDist = agentPredDist
     for neighbour in nodes[agentPos]["neighbours"]:
         # Find the distance between the Neighbour and the Prey
-        preyDict = BFS(nodes, neighbour, maybePrey)
-        predatorDict = BFS(nodes, neighbour, predatorPos)
-        randInd = random.randint(0,len(preyDict["path"])-1)
-        newPathPrey = preyDict["path"][randInd]
+        neighPreyDist = pathLength(nodes, neighbour, maybePrey)
         # Find the distance between the Neighbour and the Predator
-        randInd = random.randint(0,len(predatorDict["path"])-1)
-        newPathPred = predatorDict["path"][randInd]
-        difference0 = len(newPathPred) - len(newPathPrey)
-        agentPredNeighDiff0 = (len(newPathPred)-agentPredDist)
-        agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
+        neighPredDist = pathLength(nodes, neighbour, predatorPos)
+        difference0 = neighPredDist - neighPreyDist
+        agentPredNeighDiff0 = (neighPredDist-agentPredDist)
+        agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
         # Get the closest neighbour to the prey for the agent to move to
         if agentPreyNeighDiff0>maxagentPreyNeighDiff and agentPredNeighDiff0>maxagentPredNeighDiff:
             maybeNeigh.clear()
@@ -139,12 +105,12 @@ def agent3Movement(nodes, size, predatorPos, agentPos, preyPos, preyNodeProb, pr
         if agentPreyNeighDiff0==maxagentPreyNeighDiff and agentPredNeighDiff0==maxagentPredNeighDiff:
             maybeNeigh.append(neighbour)
         # Node to increase the distance between Predator and Agent
-        if len(newPathPred) > maxPredDist:
+        if neighPredDist > maxPredDist:
             maxPredDistNeigh.clear()
-            maxPredDist = len(newPathPred)
+            maxPredDist = neighPredDist
             maxPredDistNeigh.append(neighbour)
         # Node to keep the distance between Predator and Agent same
-        if len(newPathPred) == maxPredDist:
+        if neighPredDist == maxPredDist:
             maxPredDistNeigh.append(neighbour)
         
         if difference0>maxDiff:
@@ -224,22 +190,30 @@ def agent3(nodes, size, predatorPos, agentPos, preyPos):
     return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "preyCaught":preyCaught}
         
 
-def driver():
+def driver(corpus=None, trial=0):
     """_summary_
         Driver Code for the Agent 3
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
     """
-    nodes, size = genEnvironment()
-    predatorPos, agentPos, preyPos = spawnCreatures()
+    if corpus is None:
+        nodes, size = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, size, predatorPos, agentPos, preyPos = corpus.trial(trial)
     return agent3(nodes, size, predatorPos, agentPos, preyPos)
 
-def dataCollection():
+def dataCollection(corpus=None):
     """_summary_
         Function to collect the data regarding Agent 3, its performance and all other statistical information
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions shared by every trial, each trial generates its own environment when None
     """
     final_data = list()
     for i in range(300):
         print("Counter: ",i)
-        data = driver()
+        data = driver(corpus, i)
         final_data.append(data)
             
     df1 = pd.DataFrame(final_data)
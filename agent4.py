@@ -1,5 +1,6 @@
 # Imports
-from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, BFS
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, pathLength, nextHop, graphOf
+from belief import beliefClass
 import pandas as pd
 from openpyxl import load_workbook
 import numpy as np
@@ -16,16 +17,10 @@ def generatePreyProb(size, agentPos):
         agentPos (int): Location of the agent on the graph
 
     Returns: A list of the initialized probabilities for the entire graph
-        _type_: list
+        _type_: Belief
     """
-    preyNodeProb = list()
-    for i in range(size):
-        if i == agentPos:
-            preyNodeProb.append(0)
-            continue
-        # Probability Initialization
-        preyNodeProb.append(1/(size-1))
-    return preyNodeProb
+    # Probability Initialization
+    return beliefClass(size).uniform(size, agentPos)
 
 def updateTransitPreyProb(nodes, size, preyNodeProb):
     """_summary_
@@ -38,18 +33,10 @@ def updateTransitPreyProb(nodes, size, preyNodeProb):
         preyNodeProb (list): The list of the initialized probabilities for the entire graph for the prey
     
     Returns: The updated probability matrix for the entire graph maximizing the probability of the location of the prey
-        _type_: list
+        _type_: Belief
     """
-    newPreyNodeProb = [-100]*size
-    for node in range(size):
-        prob = preyNodeProb[node]/(nodes[node]["degree"]+1)
-        for i in range(nodes[node]["degree"]):
-            neighbour = nodes[node]["neighbours"][i]
-            # Probability Formula used based on Conditional Probability
-            prob += preyNodeProb[neighbour]/(nodes[neighbour]["degree"]+1)
-            newPreyNodeProb[node] = prob
-            
-    return newPreyNodeProb
+    # The Prey stays or moves to one of its neighbours uniformly, one product with the shared transition operator of the graph
+    return preyNodeProb.transit(graphOf(nodes).preyModel())
 
 def updateSurveyPreyProd(size, surveySpot, preyNodeProb, preyPos):
     """_summary_
@@ -62,27 +49,16 @@ def updateSurveyPreyProd(size, surveySpot, preyNodeProb, preyPos):
 
     Returns: 
         Surveying all the nodes in the graph we geth the final probability matrix using conditional Probability to predict the prey location
-     _type_: list
+     _type_: Belief
 
     """
     # Success Condition for survey
     if surveySpot == preyPos:
-        for i in range(size):
-            if i == surveySpot:
-                preyNodeProb[i] = 1
-                continue
-            preyNodeProb[i] = 0
-        return preyNodeProb
+        return preyNodeProb.survey(surveySpot, True)
     else:
-        newPreyNodeProb = [-100]*size
-        for i in range(size):
-            if i == surveySpot:
-                newPreyNodeProb[i] = 0
-                continue
-            # Update the predator Survey probability using the previous survey and the new moves 
-            newPreyNodeProb[i] = preyNodeProb[i]/(1-preyNodeProb[surveySpot])
-        return newPreyNodeProb
-    
+        # A failed survey gives a new belief and leaves the one passed in as it was
+        return preyNodeProb.copy().survey(surveySpot, False)
+
 def simulateFuture(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist):
     """_summary_
         The Function is used to simulate the entire process after surveying for belief states of each nodes. we simulate 
@@ -97,30 +73,24 @@ def simulateFuture(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist):
     """
     nextNeigh = list()
     simulationCount = 10
+    rolloutBelief = preyNodeProb.copy()
     for _ in range(simulationCount):
         simulatedAgentPos = copy.deepcopy(agentPos)
-        simulatedPreyNodeProb = copy.deepcopy(preyNodeProb)
+        simulatedPreyNodeProb = preyNodeProb.copyInto(rolloutBelief)
         simulatedPreyPos = copy.deepcopy(preyPos)
         timeStamp = 0
         while timeStamp<agentPreyDist and simulatedAgentPos != simulatedPreyPos:
             maybeNeigh = [simulatedAgentPos]
-            maybePrey = np.max(simulatedPreyNodeProb)
-            maybeprey = [i for i,prob in enumerate(simulatedPreyNodeProb) if prob == maybePrey]
-            maybePrey = random.choice(maybeprey)
+            maybePrey = simulatedPreyNodeProb.maxNode()
             # Survey and create the belief States for the Future Simulations
             simulatedPreyNodeProb = updateSurveyPreyProd(size, maybePrey, simulatedPreyNodeProb, simulatedPreyPos)
-            maybePrey = np.max(simulatedPreyNodeProb)
-            maybeprey = [i for i,prob in enumerate(simulatedPreyNodeProb) if prob == maybePrey]
-            maybePrey = random.choice(maybeprey)
+            maybePrey = simulatedPreyNodeProb.maxNode()
             # Find the path between the Neighbour and the Prey
-            agentPathPrey = random.choice(BFS(nodes, simulatedAgentPos, maybePrey)["path"])
-            agentPreyDist = len(agentPathPrey)
+            agentPreyDist = pathLength(nodes, simulatedAgentPos, maybePrey)
             maxagentPreyNeighDiff = 0
             for neighbour in nodes[simulatedAgentPos]["neighbours"]:
-                preyDict = BFS(nodes, neighbour, maybePrey)
-                randInd = random.randint(0,len(preyDict["path"])-1)
-                newPathPrey = preyDict["path"][randInd]
-                agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
+                neighPreyDist = pathLength(nodes, neighbour, maybePrey)
+                agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
                 # If agentPreyNeighDiff0 distance is greater than before clear and update    
                 if agentPreyNeighDiff0>maxagentPreyNeighDiff:
                     maybeNeigh.clear()
@@ -136,10 +106,7 @@ def simulateFuture(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist):
             timeStamp += 1
         nextNeigh.append(simulatedAgentPos)
     finalAgentPos = random.choice(nextNeigh)
-    agentPath = random.choice(BFS(nodes, agentPos, finalAgentPos)["path"])
-    
-    if len(agentPath) > 1:
-        agentPos = agentPath[1]
+    agentPos = nextHop(nodes, agentPos, finalAgentPos)
     return agentPos
     
 def agent4Movement(nodes, size, predatorPos, agentPos, preyPos, preyNodeProb, preyCaught, probUse, distUse):
@@ -156,21 +123,15 @@ def agent4Movement(nodes, size, predatorPos, agentPos, preyPos, preyNodeProb, pr
     Returns: The new location for the Agent to move to so that it can reach the goal node
         _type_: int
     """
-    maybePrey = np.max(preyNodeProb)
-    maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-    maybePrey = random.choice(maybeprey)
+    maybePrey = preyNodeProb.maxNode()
     if maybePrey == preyPos:
         preyCaught += 1
     #SURVEY BELOW
     preyNodeProb = updateSurveyPreyProd(size, maybePrey, preyNodeProb, preyPos)
-    maybePrey = np.max(preyNodeProb)
-    maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-    maybePrey = random.choice(maybeprey)
+    maybePrey = preyNodeProb.maxNode()
     maxPredDistNeigh = [agentPos]
-    agentPathPred = random.choice(BFS(nodes, agentPos, predatorPos)["path"])
-    agentPathPrey = random.choice(BFS(nodes, agentPos, maybePrey)["path"])
-    agentPredDist = len(agentPathPred)
-    agentPreyDist = len(agentPathPrey)
+    agentPredDist = pathLength(nodes, agentPos, predatorPos)
+    agentPreyDist = pathLength(nodes, agentPos, maybePrey)
     maxPredDist = agentPredDist
     if agentPreyDist < agentPredDist:
         probUse += 1
@@ -180,17 +141,15 @@ def agent4Movement(nodes, size, predatorPos, agentPos, preyPos, preyNodeProb, pr
         for neighbour in nodes[agentPos]["neighbours"]:
             #print(neighbour, " maxPredDistNeigh", maxPredDistNeigh)
             # Find the distance between the Neighbour and the Prey
-            predatorDict = BFS(nodes, neighbour, predatorPos)
             # Find the distance between the Neighbour and the Predator
-            randInd = random.randint(0,len(predatorDict["path"])-1)
-            newPathPred = predatorDict["path"][randInd]
+            neighPredDist = pathLength(nodes, neighbour, predatorPos)
             
-            if len(newPathPred) > maxPredDist:
+            if neighPredDist > maxPredDist:
                 maxPredDistNeigh.clear()
-                maxPredDist = len(newPathPred)
+                maxPredDist = neighPredDist
                 maxPredDistNeigh.append(neighbour)
                 
-            elif len(newPathPred) == maxPredDist:
+            elif neighPredDist == maxPredDist:
                 maxPredDistNeigh.append(neighbour)
         # Agent moves away from predator near to the prey
         agentPos = random.choice(maxPredDistNeigh)
@@ -259,22 +218,30 @@ def agent4(nodes, size, predatorPos, agentPos, preyPos):
     return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "preyCaught":preyCaught, "probUse":probUse, "distUse":distUse}
         
 
-def driver():
+def driver(corpus=None, trial=0):
     """_summary_
         Driver Code for the Agent 4
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
     """
-    nodes, size = genEnvironment()
-    predatorPos, agentPos, preyPos = spawnCreatures()
+    if corpus is None:
+        nodes, size = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, size, predatorPos, agentPos, preyPos = corpus.trial(trial)
     return agent4(nodes, size, predatorPos, agentPos, preyPos)
 
-def dataCollection():
+def dataCollection(corpus=None):
     """_summary_
         Function to collect the data regarding Agent 4, its performance and all other statistical information
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions shared by every trial, each trial generates its own environment when None
     """
     final_data = list()
     for i in range(700):
         print("Counter: ",i)
-        data = driver()
+        data = driver(corpus, i)
         final_data.append(data)
             
     df1 = pd.DataFrame(final_data)
@@ -1,5 +1,6 @@
 # Imports
-from genenvironment import genEnvironment, spawnCreatures, preyMovement, BFS
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMove, pathLength, nextHop, closestNeighbours, graphOf
+from belief import beliefClass
 import pandas as pd
 from openpyxl import load_workbook
 import numpy as np
@@ -16,39 +17,14 @@ def predatorMovement(agentPos, predatorPos, nodes):
     Returns: The next move for the predator as well as the result if it becomes a success or Failure
         _type_: json
     """
-    rand = random.random()
-    if rand<0.6:
-        bestNeigh = list()
-        minLen = 50
-        if agentPos != predatorPos:
-            for neigh in nodes[predatorPos]["neighbours"]:
-                # Find all the Shortest Paths 
-                paths = BFS(nodes, neigh, agentPos)["path"]
-                path = random.choice(paths)
-                if len(bestNeigh)==0:
-                    bestNeigh.append([neigh, len(path)])
-                    minLen = len(path)
-                elif len(path) == minLen:
-                    bestNeigh.append([neigh, len(path)])
-                elif len(path) < minLen:
-                    bestNeigh.clear()
-                    bestNeigh.append([neigh, len(path)])
-                    minLen = len(path)
-                #print("BN: ",bestNeigh)
-            
-            predArr = random.choice(bestNeigh)
-            predatorPos = predArr[0]
-            # Success
-            return {"statusCode":200, "predatorPos":predatorPos}
-            
-        else:
-            # Failure
-            return {"statusCode": 400, "predatorPos":agentPos}
-
+    # Sample from the compiled policy: chase with probability 0.6, random neighbour with probability 0.4
+    nextPos = predatorMove(nodes, predatorPos, agentPos, 0.4)
+    if nextPos != predatorPos:
+        # Success
+        return {"statusCode":200, "predatorPos":nextPos}
     else:
-        # Make the predator move randomly
-        predatorPos = random.choice(nodes[predatorPos]["neighbours"])
-        return {"statusCode":200, "predatorPos":predatorPos}
+        # Failure
+        return {"statusCode": 400, "predatorPos":agentPos}
 
 def generatePredProb(size, predPos):
     """_summary_
@@ -60,11 +36,9 @@ def generatePredProb(size, predPos):
         agentPos (_type_): Location of the agent on the graph
 
     Returns: The probability list will all the node probabilities for it to be a Predator
-        _type_: list
+        _type_: Belief
     """
-    predNodeProb = [0]*size
-    predNodeProb[predPos] = 1
-    return predNodeProb
+    return beliefClass(size, sparse=True).oneHot(size, predPos)
 
 def updateTransitPredProb(nodes, size, predNodeProb, agentPos):
     """_summary_
@@ -78,51 +52,11 @@ def updateTransitPredProb(nodes, size, predNodeProb, agentPos):
         predNodeProb (list): The list of the initialized probabilities for the entire graph for the predator
     
     Returns: The updated probability matrix for the entire graph maximizing the probability of the location of the prey
-        _type_: list
+        _type_: Belief
     """
-    newPredNodeProb = [0]*size
-    transitGraph = dict()
-    for node in range(size):
-        bestNeigh = list()
-        for neigh in nodes[node]["neighbours"]:
-            paths = BFS(nodes, neigh, agentPos)["path"]
-            path = random.choice(paths)
-            if len(bestNeigh)==0:
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-            elif len(path) == minLen:
-                bestNeigh.append([neigh, len(path)])
-            elif len(path) < minLen:
-                bestNeigh.clear()
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-                
-        nextStep = [i[0] for i in bestNeigh]
-        for step in nextStep:
-            if transitGraph.get(step, False):
-                if [node, 1/len(nextStep)] not in transitGraph[step]:
-                    # Probability Formula used based on Conditional Probability
-                    transitGraph[step].append([node, 1/len(nextStep)])
-            else:
-                transitGraph[step] = [[node, 1/len(nextStep)]]
-    
-    for node in range(size):
-        if node in transitGraph.keys():
-            for neigh in transitGraph[node]:
-                newPredNodeProb[node] += 0.6*predNodeProb[neigh[0]]*neigh[1]
-        else:
-            newPredNodeProb[node] = 0
-    #print("before other: ", np.sum(newPredNodeProb))
-    for node in range(size):
-        sum = 0
-        for neigh in nodes[node]["neighbours"]:
-            sum += 0.4*(1/nodes[neigh]["degree"])*predNodeProb[neigh] 
-        newPredNodeProb[node] += sum
-        #print(newPredNodeProb)
-
-
-    #print("transitGraph: ",transitGraph)
-    return newPredNodeProb
+    # The Predator chases with probability 0.6 and moves randomly with probability 0.4, one sparse matrix vector
+    # product with the cached transition matrix of the current agent position
+    return predNodeProb.transit(graphOf(nodes).predatorModel(0.4), agentPos)
 
 def updateSurveyPredProd(size, surveySpot, predNodeProb, predPos):
     """_summary_
@@ -136,26 +70,11 @@ def updateSurveyPredProd(size, surveySpot, predNodeProb, predPos):
 
     Returns: 
         Surveying all the nodes in the graph we geth the final probability matrix using conditional Probability to predict the prey location
+        _type_: Belief
     """
-    # Success Condition for survey
-    if surveySpot == predPos:
-        newPredNodeProb = [0]*size
-        newPredNodeProb[surveySpot] = 1
-        return newPredNodeProb
-    # If the survey probability is not 1 we update the belief states oof every node we survey 
-    elif predNodeProb[surveySpot] != 1:
-        newPredNodeProb = [-100]*size
-        for i in range(size):
-            if i == surveySpot:
-                newPredNodeProb[i] = 0
-                continue
-            newPredNodeProb[i] = predNodeProb[i]/(1-predNodeProb[surveySpot])
-        return newPredNodeProb
-    else:
-        newPredNodeProb = [0]*size
-        newPredNodeProb[surveySpot] = 1
-        return newPredNodeProb
-    
+    # The Predator belief is never updated in place, every branch returns a new belief
+    return predNodeProb.copy().survey(surveySpot, surveySpot == predPos)
+
 def agent5Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, predCaught):
     """_summary_
         Function to make the Agent3 based on the probabilistic decision graph received from the updateSurveyPredProd function
@@ -171,16 +90,12 @@ def agent5Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, predCa
     Returns: The new location for the Agent to move to so that it can reach the goal node
         _type_: int
     """
-    maybePred = np.max(predNodeProb)
-    maybepred = [i for i,prob in enumerate(predNodeProb) if prob == maybePred]
-    maybePred = random.choice(maybepred)
+    maybePred = predNodeProb.maxNode()
     if maybePred == predPos:
         predCaught += 1
     #SURVEY BELOW
     predNodeProb = updateSurveyPredProd(size, maybePred, predNodeProb, predPos)
-    maybePred = np.max(predNodeProb)
-    maybepred = [i for i,prob in enumerate(predNodeProb) if prob == maybePred]
-    maybePred = random.choice(maybepred)
+    maybePred = predNodeProb.maxNode()
     maxagentPredNeighDiff = 0
     maxagentPreyNeighDiff = 0
     nextNeigh = list()
@@ -188,23 +103,17 @@ def agent5Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, predCa
     maybeNeigh = list()
     maxPredDistNeigh = list()
     # Find the shortest paths between the start and end nodes and select at random
-    agentPathPred = random.choice(BFS(nodes, agentPos, maybePred)["path"])
-    agentPathPrey = random.choice(BFS(nodes, agentPos, preyPos)["path"])
-    agentPredDist = len(agentPathPred)
-    agentPreyDist = len(agentPathPrey)
+    agentPredDist = pathLength(nodes, agentPos, maybePred)
+    agentPreyDist = pathLength(nodes, agentPos, preyPos)
     maxPredDist = agentPredDist
     for neighbour in nodes[agentPos]["neighbours"]:
         # Find the distance between the Neighbour and the Prey
-        preyDict = BFS(nodes, neighbour, preyPos)
+        neighPreyDist = pathLength(nodes, neighbour, preyPos)
         # Find the distance between the Neighbour and the possible location of Predator
-        predatorDict = BFS(nodes, neighbour, maybePred)
-        randInd = random.randint(0,len(preyDict["path"])-1)
-        newPathPrey = preyDict["path"][randInd]
-        randInd = random.randint(0,len(predatorDict["path"])-1)
-        newPathPred = predatorDict["path"][randInd]
-        difference0 = len(newPathPred) - len(newPathPrey)
-        agentPredNeighDiff0 = (len(newPathPred)-agentPredDist)
-        agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
+        neighPredDist = pathLength(nodes, neighbour, maybePred)
+        difference0 = neighPredDist - neighPreyDist
+        agentPredNeighDiff0 = (neighPredDist-agentPredDist)
+        agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
         # Get the closest neighbour to the prey for the agent to move to
         if agentPreyNeighDiff0>maxagentPreyNeighDiff and agentPredNeighDiff0>maxagentPredNeighDiff:
             maybeNeigh.clear()
@@ -215,12 +124,12 @@ def agent5Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, predCa
         if agentPreyNeighDiff0==maxagentPreyNeighDiff and agentPredNeighDiff0==maxagentPredNeighDiff:
             maybeNeigh.append(neighbour)
         # Node to increase the distance between Predator and Agent
-        if len(newPathPred) > maxPredDist:
+        if neighPredDist > maxPredDist:
             maxPredDistNeigh.clear()
-            maxPredDist = len(newPathPred)
+            maxPredDist = neighPredDist
             maxPredDistNeigh.append(neighbour)
         # Node to keep the distance between Predator and Agent same
-        if len(newPathPred) == maxPredDist:
+        if neighPredDist == maxPredDist:
             maxPredDistNeigh.append(neighbour)
         
         if difference0>maxDiff:
@@ -305,22 +214,30 @@ def agent5(nodes, size, predatorPos, agentPos, preyPos):
     return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "PreyPath":preyPath, "predCaught":predCaught}
         
 
-def driver():
+def driver(corpus=None, trial=0):
     """_summary_
         Driver Code for the Agent 5
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
     """
-    nodes, size = genEnvironment()
-    predatorPos, agentPos, preyPos = spawnCreatures()
+    if corpus is None:
+        nodes, size = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, size, predatorPos, agentPos, preyPos = corpus.trial(trial)
     return agent5(nodes, size, predatorPos, agentPos, preyPos)
 
-def dataCollection():
+def dataCollection(corpus=None):
     """_summary_
         Function to collect the data regarding Agent 5, its performance and all other statistical information
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions shared by every trial, each trial generates its own environment when None
     """
     final_data = list()
     for i in range(300):
         print("Counter: ",i)
-        data = driver()
+        data = driver(corpus, i)
         final_data.append(data)
             
     df1 = pd.DataFrame(final_data)
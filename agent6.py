@@ -1,5 +1,6 @@
 # Imports
-from genenvironment import genEnvironment, spawnCreatures, preyMovement, BFS
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMove, pathLength, nextHop, closestNeighbours, graphOf
+from belief import beliefClass
 import pandas as pd
 from openpyxl import load_workbook
 import numpy as np
@@ -7,9 +8,7 @@ import random
 import copy
 
 def getMaxProb(NodeProb):
-    maybePred = np.max(NodeProb)
-    maybepred = [i for i,prob in enumerate(NodeProb) if prob == maybePred]
-    return random.choice(maybepred)
+    return NodeProb.maxNode()
 
 def predatorMovement(agentPos, predatorPos, nodes):
     """_summary_
@@ -22,39 +21,14 @@ def predatorMovement(agentPos, predatorPos, nodes):
     Returns: The next move for the predator as well as the result if it becomes a success or Failure
         _type_: json
     """
-    rand = random.random()
-    if rand<0.6:
-        bestNeigh = list()
-        minLen = 50
-        if agentPos != predatorPos:
-            for neigh in nodes[predatorPos]["neighbours"]:
-                # Find all the Shortest Paths 
-                paths = BFS(nodes, neigh, agentPos)["path"]
-                path = random.choice(paths)
-                if len(bestNeigh)==0:
-                    bestNeigh.append([neigh, len(path)])
-                    minLen = len(path)
-                elif len(path) == minLen:
-                    bestNeigh.append([neigh, len(path)])
-                elif len(path) < minLen:
-                    bestNeigh.clear()
-                    bestNeigh.append([neigh, len(path)])
-                    minLen = len(path)
-                #print("BN: ",bestNeigh)
-            
-            predArr = random.choice(bestNeigh)
-            predatorPos = predArr[0]
-            # Success
-            return {"statusCode":200, "predatorPos":predatorPos}
-            
-        else:
-            # Failure
-            return {"statusCode": 400, "predatorPos":agentPos}
-
+    # Sample from the compiled policy: chase with probability 0.6, random neighbour with probability 0.4
+    nextPos = predatorMove(nodes, predatorPos, agentPos, 0.4)
+    if nextPos != predatorPos:
+        # Success
+        return {"statusCode":200, "predatorPos":nextPos}
     else:
-        # Make the predator move randomly
-        predatorPos = random.choice(nodes[predatorPos]["neighbours"])
-        return {"statusCode":200, "predatorPos":predatorPos}
+        # Failure
+        return {"statusCode": 400, "predatorPos":agentPos}
 
 def generatePredProb(size, predPos):
     """_summary_
@@ -66,11 +40,9 @@ def generatePredProb(size, predPos):
         agentPos (_type_): Location of the agent on the graph
 
     Returns: The probability list will all the node probabilities for it to be a Predator
-        _type_: list
+        _type_: Belief
     """
-    predNodeProb = [0]*size
-    predNodeProb[predPos] = 1
-    return predNodeProb
+    return beliefClass(size, sparse=True).oneHot(size, predPos)
 
 def updateTransitPredProb(nodes, size, predNodeProb, agentPos):
     """_summary_
@@ -84,51 +56,11 @@ def updateTransitPredProb(nodes, size, predNodeProb, agentPos):
         predNodeProb (list): The list of the initialized probabilities for the entire graph for the predator
     
     Returns: The updated probability matrix for the entire graph maximizing the probability of the location of the prey
-        _type_: list
+        _type_: Belief
     """
-    newPredNodeProb = [0]*size
-    transitGraph = dict()
-    for node in range(size):
-        bestNeigh = list()
-        for neigh in nodes[node]["neighbours"]:
-            paths = BFS(nodes, neigh, agentPos)["path"]
-            path = random.choice(paths)
-            if len(bestNeigh)==0:
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-            elif len(path) == minLen:
-                bestNeigh.append([neigh, len(path)])
-            elif len(path) < minLen:
-                bestNeigh.clear()
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-                
-        nextStep = [i[0] for i in bestNeigh]
-        for step in nextStep:
-            if transitGraph.get(step, False):
-                if [node, 1/len(nextStep)] not in transitGraph[step]:
-                    # Probability Formula used based on Conditional Probability
-                    transitGraph[step].append([node, 1/len(nextStep)])
-            else:
-                transitGraph[step] = [[node, 1/len(nextStep)]]
-    
-    for node in range(size):
-        if node in transitGraph.keys():
-            for neigh in transitGraph[node]:
-                newPredNodeProb[node] += 0.6*predNodeProb[neigh[0]]*neigh[1]
-        else:
-            newPredNodeProb[node] = 0
-    #print("before other: ", np.sum(newPredNodeProb))
-    for node in range(size):
-        sum = 0
-        for neigh in nodes[node]["neighbours"]:
-            sum += 0.4*(1/nodes[neigh]["degree"])*predNodeProb[neigh] 
-        newPredNodeProb[node] += sum
-        #print(newPredNodeProb)
-
-
-    #print("transitGraph: ",transitGraph)
-    return newPredNodeProb
+    # The Predator chases with probability 0.6 and moves randomly with probability 0.4, one sparse matrix vector
+    # product with the cached transition matrix of the current agent position
+    return predNodeProb.transit(graphOf(nodes).predatorModel(0.4), agentPos)
 
 def updateSurveyPredProd(size, surveySpot, predNodeProb, predPos):
     """_summary_
@@ -142,25 +74,10 @@ def updateSurveyPredProd(size, surveySpot, predNodeProb, predPos):
 
     Returns: 
         Surveying all the nodes in the graph we geth the final probability matrix using conditional Probability to predict the prey location
+        _type_: Belief
     """
-    # Success Condition for survey
-    if surveySpot == predPos:
-        newPredNodeProb = [0]*size
-        newPredNodeProb[surveySpot] = 1
-        return newPredNodeProb
-    # If the survey probability is not 1 we update the belief states oof every node we survey 
-    elif predNodeProb[surveySpot] != 1:
-        newPredNodeProb = [-100]*size
-        for i in range(size):
-            if i == surveySpot:
-                newPredNodeProb[i] = 0
-                continue
-            newPredNodeProb[i] = predNodeProb[i]/(1-predNodeProb[surveySpot])
-        return newPredNodeProb
-    else:
-        newPredNodeProb = [0]*size
-        newPredNodeProb[surveySpot] = 1
-        return newPredNodeProb
+    # The Predator belief is never updated in place, every branch returns a new belief
+    return predNodeProb.copy().survey(surveySpot, surveySpot == predPos)
 
 def simulateFuture(nodes, agentPos, preyPos, agentPreyDist):
     """_summary_
@@ -183,14 +100,11 @@ def simulateFuture(nodes, agentPos, preyPos, agentPreyDist):
         while timeStamp<agentPreyDist and simulatedAgentPos != simulatedPreyPos:
             maybeNeigh = [simulatedAgentPos]
             # Find the shortest path between Prey and Agent
-            agentPathPrey = random.choice(BFS(nodes, simulatedAgentPos, simulatedPreyPos)["path"])
-            agentPreyDist = len(agentPathPrey)
+            agentPreyDist = pathLength(nodes, simulatedAgentPos, simulatedPreyPos)
             maxagentPreyNeighDiff = 0
             for neighbour in nodes[simulatedAgentPos]["neighbours"]:
-                preyDict = BFS(nodes, neighbour, simulatedPreyPos)
-                randInd = random.randint(0,len(preyDict["path"])-1)
-                newPathPrey = preyDict["path"][randInd]
-                agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
+                neighPreyDist = pathLength(nodes, neighbour, simulatedPreyPos)
+                agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
                 # If agentPreyNeighDiff0 distance is greater than before clear and update    
                 if agentPreyNeighDiff0>maxagentPreyNeighDiff:
                     maybeNeigh.clear()
@@ -204,12 +118,10 @@ def simulateFuture(nodes, agentPos, preyPos, agentPreyDist):
             timeStamp += 1
         nextNeigh.append(simulatedAgentPos)
     finalAgentPos = random.choice(nextNeigh)
-    agentPath = random.choice(BFS(nodes, agentPos, finalAgentPos)["path"])
-    
-    if len(agentPath) > 1:
-        agentPos = agentPath[1]
+    if finalAgentPos != agentPos:
+        agentPos = nextHop(nodes, agentPos, finalAgentPos)
     else:
-        agentPos = random.choice(BFS(nodes, agentPos, preyPos)["path"])[1]
+        agentPos = nextHop(nodes, agentPos, preyPos)
     return agentPos
 
 def agent6Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, predCaught, probUse, distUse):
@@ -234,10 +146,8 @@ def agent6Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, predCa
     if maybePred == predPos:
         predCaught += 1
     maxPredDistNeigh = [agentPos]
-    agentPathPred = random.choice(BFS(nodes, agentPos, maybePred)["path"])
-    agentPathPrey = random.choice(BFS(nodes, agentPos, preyPos)["path"])
-    agentPredDist = len(agentPathPred)
-    agentPreyDist = len(agentPathPrey)
+    agentPredDist = pathLength(nodes, agentPos, maybePred)
+    agentPreyDist = pathLength(nodes, agentPos, preyPos)
     maxPredDist = agentPredDist
     if agentPreyDist < agentPredDist*0.7:
         probUse += 1
@@ -246,17 +156,15 @@ def agent6Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, predCa
         distUse += 1
         for neighbour in nodes[agentPos]["neighbours"]:
             #print(neighbour, " maxPredDistNeigh", maxPredDistNeigh)
-            predatorDict = BFS(nodes, neighbour, maybePred)
             # Find the distance between the Neighbour and the Predator
-            randInd = random.randint(0,len(predatorDict["path"])-1)
-            newPathPred = predatorDict["path"][randInd]
+            neighPredDist = pathLength(nodes, neighbour, maybePred)
             
-            if len(newPathPred) > maxPredDist:
+            if neighPredDist > maxPredDist:
                 maxPredDistNeigh.clear()
-                maxPredDist = len(newPathPred)
+                maxPredDist = neighPredDist
                 maxPredDistNeigh.append(neighbour)
                 
-            elif len(newPathPred) == maxPredDist:
+            elif neighPredDist == maxPredDist:
                 maxPredDistNeigh.append(neighbour)
         # Agent moves away from predator near to the prey
         agentPos = random.choice(maxPredDistNeigh)
@@ -329,22 +237,30 @@ def agent6(nodes, size, predatorPos, agentPos, preyPos):
     return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "PreyPath":preyPath, "predCaught":predCaught, "probUse":probUse, "distUse":distUse}
 
 
-def driver():
+def driver(corpus=None, trial=0):
     """_summary_
         Driver Code for the Agent 6
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
     """
-    nodes, size = genEnvironment()
-    predatorPos, agentPos, preyPos = spawnCreatures()
+    if corpus is None:
+        nodes, size = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, size, predatorPos, agentPos, preyPos = corpus.trial(trial)
     return agent6(nodes, size, predatorPos, agentPos, preyPos)
 
-def dataCollection():
+def dataCollection(corpus=None):
     """_summary_
         Function to collect the data regarding Agent 6, its performance and all other statistical information
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions shared by every trial, each trial generates its own environment when None
     """
     final_data = list()
     for i in range(300):
         print("Counter: ",i)
-        data = driver()
+        data = driver(corpus, i)
         final_data.append(data)
             
     df1 = pd.DataFrame(final_data)
@@ -1,4 +1,5 @@
-from genenvironment import genEnvironment, spawnCreatures, preyMovement, BFS
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMove, pathLength, nextHop, closestNeighbours, graphOf
+from belief import beliefClass, surveyAndTransit
 import pandas as pd
 from openpyxl import load_workbook
 import numpy as np
@@ -15,41 +16,15 @@ def predatorMovement(agentPos, predatorPos, nodes):
     Returns: The next move for the predator as well as the result if it becomes a success or Failure
         _type_: json
     """
-    rand = random.random()
-    if rand<0.6:
-        bestNeigh = list()
-        minLen = 50
-        if agentPos != predatorPos:
-            for neigh in nodes[predatorPos]["neighbours"]:
-                # Find all the Shortest Paths 
-                paths = BFS(nodes, neigh, agentPos)["path"]
-                path = random.choice(paths)
-                if len(bestNeigh)==0:
-                    bestNeigh.append([neigh, len(path)])
-                    minLen = len(path)
-                elif len(path) == minLen:
-                    bestNeigh.append([neigh, len(path)])
-                elif len(path) < minLen:
-                    bestNeigh.clear()
-                    bestNeigh.append([neigh, len(path)])
-                    minLen = len(path)
-                #print("BN: ",bestNeigh)
-            
-            predArr = random.choice(bestNeigh)
-            predatorPos = predArr[0]
-            # Success
-            return {"statusCode":200, "predatorPos":predatorPos}
-            
-        else:
-            # Failure
-            return {"statusCode": 400, "predatorPos":agentPos}
-
+    # Sample from the compiled policy: chase with probability 0.6, random neighbour with probability 0.4
+    nextPos = predatorMove(nodes, predatorPos, agentPos, 0.4)
+    if nextPos != predatorPos:
+        # Success
+        return {"statusCode":200, "predatorPos":nextPos}
     else:
-        # Make the predator move randomly
-        predatorPos = random.choice(nodes[predatorPos]["neighbours"])
-        return {"statusCode":200, "predatorPos":predatorPos}
-    
-    
+        # Failure
+        return {"statusCode": 400, "predatorPos":agentPos}
+
 def generatePreyProb(size, agentPos):
     """_summary_
         Function to initialize the Prey node position probability as 0 and the initial probability of 1/(size of graph -1) to every node 
@@ -60,15 +35,10 @@ def generatePreyProb(size, agentPos):
         agentPos (int): Location of the agent on the graph
 
     Returns: A list of the initialized probabilities for the entire graph
-        _type_: list
+        _type_: Belief
     """
-    preyNodeProb = list()
-    for i in range(size):
-        if i == agentPos:
-            preyNodeProb.append(0)
-            continue
-        preyNodeProb.append(1/(size-1))
-    return preyNodeProb
+    # Probability Initialization
+    return beliefClass(size).uniform(size, agentPos)
 
 def updateTransitPreyProb(nodes, size, preyNodeProb):
     """_summary_
@@ -82,17 +52,10 @@ def updateTransitPreyProb(nodes, size, preyNodeProb):
         predNodeProb (list): The list of the initialized probabilities for the entire graph for the predator
     
     Returns: The updated probability matrix for the entire graph maximizing the probability of the location of the prey
-        _type_: list
+        _type_: Belief
     """
-    newPreyNodeProb = [-100]*size
-    for node in range(size):
-        prob = preyNodeProb[node]/(nodes[node]["degree"]+1)
-        for i in range(nodes[node]["degree"]):
-            neighbour = nodes[node]["neighbours"][i]
-            prob += preyNodeProb[neighbour]/(nodes[neighbour]["degree"]+1)
-            newPreyNodeProb[node] = prob
-            
-    return newPreyNodeProb
+    # The Prey stays or moves to one of its neighbours uniformly, one product with the shared transition operator of the graph
+    return preyNodeProb.transit(graphOf(nodes).preyModel())
 
 def updateSurveyPreyProd(size, surveySpot, preyNodeProb, preyPos):
     """_summary_
@@ -105,24 +68,14 @@ def updateSurveyPreyProd(size, surveySpot, preyNodeProb, preyPos):
 
     Returns: 
         Surveying all the nodes in the graph we geth the final probability matrix using conditional Probability to predict the prey location
+        _type_: Belief
     """
     # Success Condition for survey
     if surveySpot == preyPos:
-        for i in range(size):
-            if i == surveySpot:
-                preyNodeProb[i] = 1
-                continue
-            preyNodeProb[i] = 0
-        return preyNodeProb
-    # If the survey probability is not 1 we update the belief states oof every node we survey 
+        return preyNodeProb.survey(surveySpot, True)
     else:
-        newPreyNodeProb = [-100]*size
-        for i in range(size):
-            if i == surveySpot:
-                newPreyNodeProb[i] = 0
-                continue
-            newPreyNodeProb[i] = preyNodeProb[i]/(1-preyNodeProb[surveySpot])
-        return newPreyNodeProb
+        # A failed survey gives a new belief and leaves the one passed in as it was
+        return preyNodeProb.copy().survey(surveySpot, False)
 
 def generatePredProb(size, predPos):
     """_summary_
@@ -134,11 +87,9 @@ def generatePredProb(size, predPos):
         agentPos (int): Location of the agent on the graph
 
     Returns: The probability list will all the node probabilities for it to be a Predator
-        _type_: list
+        _type_: Belief
     """
-    predNodeProb = [0]*size
-    predNodeProb[predPos] = 1
-    return predNodeProb
+    return beliefClass(size, sparse=True).oneHot(size, predPos)
 
 def updateTransitPredProb(nodes, size, predNodeProb, agentPos):
     """_summary_       
@@ -150,51 +101,11 @@ def updateTransitPredProb(nodes, size, predNodeProb, agentPos):
         preyNodeProb (list): The list of the initialized probabilities for the entire graph
     
     Returns:The updated probability matrix for the entire graph maximizing the probability of the location of the predator
-        _type_: list
+        _type_: Belief
     """
-    newPredNodeProb = [0]*size
-    transitGraph = dict()
-    for node in range(size):
-        bestNeigh = list()
-        for neigh in nodes[node]["neighbours"]:
-            paths = BFS(nodes, neigh, agentPos)["path"]
-            path = random.choice(paths)
-            # Find the best possible path for the Agent to to the prey
-            if len(bestNeigh)==0:
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-            elif len(path) == minLen:
-                bestNeigh.append([neigh, len(path)])
-            elif len(path) < minLen:
-                bestNeigh.clear()
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-                
-        nextStep = [i[0] for i in bestNeigh]
-        for step in nextStep:
-            if transitGraph.get(step, False):
-                if [node, 1/len(nextStep)] not in transitGraph[step]:
-                    # Probability Formula used based on Conditional Probability
-                    transitGraph[step].append([node, 1/len(nextStep)])
-            else:
-                transitGraph[step] = [[node, 1/len(nextStep)]]
-    
-    for node in range(size):
-        if node in transitGraph.keys():
-            for neigh in transitGraph[node]:
-                newPredNodeProb[node] += 0.6*predNodeProb[neigh[0]]*neigh[1]
-        else:
-            newPredNodeProb[node] = 0
-    # print("before other: ", np.sum(newPredNodeProb))
-    for node in range(size):
-        sum = 0
-        for neigh in nodes[node]["neighbours"]:
-            sum += 0.4*(1/nodes[neigh]["degree"])*predNodeProb[neigh] 
-        newPredNodeProb[node] += sum
-        #print(newPredNodeProb)
-
-    #print("transitGraph: ",transitGraph)
-    return newPredNodeProb
+    # The Predator chases with probability 0.6 and moves randomly with probability 0.4, one sparse matrix vector
+    # product with the cached transition matrix of the current agent position
+    return predNodeProb.transit(graphOf(nodes).predatorModel(0.4), agentPos)
 
 def updateSurveyPredProd(size, surveySpot, predNodeProb, predPos):
     """_summary_
@@ -208,27 +119,11 @@ def updateSurveyPredProd(size, surveySpot, predNodeProb, predPos):
 
     Returns: 
         Surveying all the nodes in the graph we geth the final probability matrix using conditional Probability to predict the prey location
+        _type_: Belief
     """
-    # Success Condition for survey
-    if surveySpot == predPos:
-        newPredNodeProb = [0]*size
-        newPredNodeProb[surveySpot] = 1
-        return newPredNodeProb
-    # If the survey probability is not 1 we update the belief states oof every node we survey 
-    else:
-        newPredNodeProb = [-100]*size
-        for i in range(size):
-            if i == surveySpot:
-                newPredNodeProb[surveySpot] = 0
-                continue
-            newPredNodeProb[i] = predNodeProb[i]/(1-predNodeProb[surveySpot])
-        return newPredNodeProb
-    # else:
-    #     newPredNodeProb = [0]*size
-    #     newPredNodeProb[surveySpot] = 1
-    #     return newPredNodeProb
+    # The Predator belief is never updated in place, every branch returns a new belief
+    return predNodeProb.copy().survey(surveySpot, surveySpot == predPos)
 
-        
 def agent7Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNodeProb, preyCaught, predCaught):
     """_summary_
         Function to make the Agent7 based on the probabilistic decision
@@ -243,11 +138,10 @@ def agent7Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
     Returns: The new location for the Agent to move to so that it can reach the goal node
         _type_: int
     """
-    maybePred = np.max(predNodeProb)
-    maybePrey = np.max(preyNodeProb)
+    maybePred = predNodeProb.maxProb()
+    maybePrey = preyNodeProb.maxProb()
     if maybePred < 0.5:
-        maybepred = [i for i,prob in enumerate(predNodeProb) if prob == maybePred]
-        maybePred = random.choice(maybepred)
+        maybePred = predNodeProb.maxNode()
         if maybePred == predPos:
             predCaught += 1
         if maybePrey == preyPos:
@@ -256,17 +150,12 @@ def agent7Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
         # Survey and find out the node with the highest probability for the Predator
         predNodeProb = updateSurveyPredProd(size, maybePred, predNodeProb, predPos)
         preyNodeProb = updateSurveyPreyProd(size, maybePred, preyNodeProb, preyPos)
-        maybePred = np.max(predNodeProb)
-        maybepred = [i for i,prob in enumerate(predNodeProb) if prob == maybePred]
-        maybePred = random.choice(maybepred)
+        maybePred = predNodeProb.maxNode()
         # Possible Location for the Prey
-        maybePrey = np.max(preyNodeProb)
-        maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-        maybePrey = random.choice(maybeprey)
+        maybePrey = preyNodeProb.maxNode()
 
     else:
-        maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-        maybePrey = random.choice(maybeprey)
+        maybePrey = preyNodeProb.maxNode()
         if maybePred == predPos:
             predCaught += 1
         if maybePrey == preyPos:
@@ -275,13 +164,9 @@ def agent7Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
         # Survey and find out the node with the highest probability for the Predator
         preyNodeProb = updateSurveyPreyProd(size, maybePrey, preyNodeProb, preyPos)
         predNodeProb = updateSurveyPredProd(size, maybePrey, predNodeProb, predPos)
-        maybePrey = np.max(preyNodeProb)
-        maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-        maybePrey = random.choice(maybeprey)
+        maybePrey = preyNodeProb.maxNode()
         # Possible Location for the Predator
-        maybePred = np.max(predNodeProb)
-        maybepred = [i for i,prob in enumerate(predNodeProb) if prob == maybePred]
-        maybePred = random.choice(maybepred)
+        maybePred = predNodeProb.maxNode()
 
 
     maxagentPredNeighDiff = 0
@@ -290,23 +175,17 @@ def agent7Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
     maxDiff = 0
     maybeNeigh = [agentPos]
     maxPredDistNeigh = list()
-    agentPathPred = random.choice(BFS(nodes, agentPos, maybePred)["path"])
-    agentPathPrey = random.choice(BFS(nodes, agentPos, maybePrey)["path"])
-    agentPredDist = len(agentPathPred)
-    agentPreyDist = len(agentPathPrey)
+    agentPredDist = pathLength(nodes, agentPos, maybePred)
+    agentPreyDist = pathLength(nodes, agentPos, maybePrey)
     maxPredDist = agentPredDist
     for neighbour in nodes[agentPos]["neighbours"]:
         # Find the distance between the Neighbour and the Prey
-        preyDict = BFS(nodes, neighbour, maybePrey)
+        neighPreyDist = pathLength(nodes, neighbour, maybePrey)
         # Find the distance between the Neighbour and the Predator
-        predatorDict = BFS(nodes, neighbour, maybePred)
-        randInd = random.randint(0,len(preyDict["path"])-1)
-        newPathPrey = preyDict["path"][randInd]
-        randInd = random.randint(0,len(predatorDict["path"])-1)
-        newPathPred = predatorDict["path"][randInd]
-        difference0 = len(newPathPred) - len(newPathPrey)
-        agentPredNeighDiff0 = (len(newPathPred)-agentPredDist)
-        agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
+        neighPredDist = pathLength(nodes, neighbour, maybePred)
+        difference0 = neighPredDist - neighPreyDist
+        agentPredNeighDiff0 = (neighPredDist-agentPredDist)
+        agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
         # Get the closest neighbour to the prey for the agent to move to
         if agentPreyNeighDiff0>maxagentPreyNeighDiff and agentPredNeighDiff0>maxagentPredNeighDiff:
             maybeNeigh.clear()
@@ -317,12 +196,12 @@ def agent7Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
         if agentPreyNeighDiff0==maxagentPreyNeighDiff and agentPredNeighDiff0==maxagentPredNeighDiff:
             maybeNeigh.append(neighbour)
         # Node to increase the distance between Predator and Agent
-        if len(newPathPred) > maxPredDist:
+        if neighPredDist > maxPredDist:
             maxPredDistNeigh.clear()
-            maxPredDist = len(newPathPred)
+            maxPredDist = neighPredDist
             maxPredDistNeigh.append(neighbour)
         # Node to keep the distance between Predator and Agent same
-        if len(newPathPred) == maxPredDist:
+        if neighPredDist == maxPredDist:
             maxPredDistNeigh.append(neighbour)
         
         if difference0>maxDiff:
@@ -367,6 +246,7 @@ def agent7(nodes, size, predatorPos, agentPos, preyPos):
     preyCaught, predCaught = 0, 0
     predNodeProb = generatePredProb(size, predatorPos) 
     preyNodeProb = generatePreyProb(size, agentPos) 
+    preyModel, predatorModel = graphOf(nodes).preyModel(), graphOf(nodes).predatorModel(0.4)
     for counter in range(1,threshold+1):
         # print("Counter: ", counter)
         # print("Agent: ", agentPos)
@@ -381,8 +261,8 @@ def agent7(nodes, size, predatorPos, agentPos, preyPos):
         
         agentPos, preyCaught, predCaught = agent7Movement(nodes, size, predatorPos, agentPos, preyPos, predNodeProb, preyNodeProb, preyCaught, predCaught)
         agentPath.append(agentPos)
-        predNodeProb = updateSurveyPredProd(size, agentPos, predNodeProb, predatorPos)
-        preyNodeProb = updateSurveyPreyProd(size, agentPos, preyNodeProb, preyPos)
+        # The new position is surveyed for both creatures, the update is applied together with the transits at the end of the step
+        predFound, preyFound = agentPos == predatorPos, agentPos == preyPos
         #print("Sum of predNodeProb: ", np.sum(predNodeProb))
         # If Agent reaches Prey Position which ih the Goal State
         if agentPos == preyPos:
@@ -390,7 +270,6 @@ def agent7(nodes, size, predatorPos, agentPos, preyPos):
         # Making the prey move
         preyPos = preyMovement(nodes, preyPos)
         preyPath.append(preyPos)
-        preyNodeProb = updateTransitPreyProb(nodes, size, preyNodeProb)
         # After the Prey movement takes place
         if agentPos == preyPos:
             return {"statusCode": 200, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "PreyPath":preyPath, "preyCaught":preyCaught, "predCaught":predCaught}
@@ -403,29 +282,37 @@ def agent7(nodes, size, predatorPos, agentPos, preyPos):
         elif predDict["statusCode"] == 400:
             return {"statusCode": 400, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "PreyPath":preyPath, "preyCaught":preyCaught, "predCaught":predCaught}
         #print("Predpos: ", predatorPos)
-        predNodeProb = updateTransitPredProb(nodes, size, predNodeProb, agentPos)
+        preyNodeProb, predNodeProb = surveyAndTransit(preyNodeProb, predNodeProb, agentPos, preyFound, predFound, preyModel, predatorModel)
         #print("Max of predNodeProb: ", np.max(predNodeProb))
         #print("Sum of predNodeProb: ", np.sum(predNodeProb))
         #print("======================")
         
     return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "PreyPath":preyPath, "preyCaught":preyCaught, "predCaught":predCaught}
         
-def driver():
+def driver(corpus=None, trial=0):
     """_summary_
         Driver Code for the Agent 7
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
     """
-    nodes, size = genEnvironment()
-    predatorPos, agentPos, preyPos = spawnCreatures()
+    if corpus is None:
+        nodes, size = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, size, predatorPos, agentPos, preyPos = corpus.trial(trial)
     return agent7(nodes, size, predatorPos, agentPos, preyPos)
 
-def dataCollection():
+def dataCollection(corpus=None):
     """_summary_
         Function to collect the data regarding Agent 7, its performance and all other statistical information
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions shared by every trial, each trial generates its own environment when None
     """
     final_data = list()
     for i in range(300):
         print("Counter: ",i)
-        data = driver()
+        data = driver(corpus, i)
         final_data.append(data)
             
     df1 = pd.DataFrame(final_data)
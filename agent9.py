@@ -1,10 +1,17 @@
-from genenvironment import genEnvironment, spawnCreatures, preyMovement, BFS
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMove, pathLength, nextHop, closestNeighbours, graphOf
+from belief import beliefClass, surveyAndTransit
+from observation import ObservationModel, BlendedObservation
 import pandas as pd
 from openpyxl import load_workbook
 import numpy as np
 import random
 import copy
 
+# A failed survey is a blend of the update of the defective drone, which misses a creature with probability 0.1, and of the
+# update of a perfect drone. Reports come from the defective drone
+preySensor = BlendedObservation(ObservationModel(0.1), ObservationModel(), 0.092229087)
+predSensor = BlendedObservation(ObservationModel(0.1), ObservationModel(), 0.152429089)
+
 def simulateFuturePrey(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist):
     """_summary_
         The Function is used to simulate the entire process after surveying for belief states of each nodes. we simulate 
@@ -19,30 +26,24 @@ def simulateFuturePrey(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDi
     """
     nextPrey = list()
     simulationCount = 30
+    rolloutBelief = preyNodeProb.copy()
     for _ in range(simulationCount):
         simulatedAgentPos = copy.deepcopy(agentPos)
-        simulatedPreyNodeProb = copy.deepcopy(preyNodeProb)
+        simulatedPreyNodeProb = preyNodeProb.copyInto(rolloutBelief)
         simulatedPreyPos = copy.deepcopy(preyPos)
         timeStamp = 0
         while timeStamp<agentPreyDist and simulatedAgentPos != simulatedPreyPos:
             maybeNeigh = [simulatedAgentPos]
-            maybePrey = np.max(simulatedPreyNodeProb)
-            maybeprey = [i for i,prob in enumerate(simulatedPreyNodeProb) if prob == maybePrey]
-            maybePrey = random.choice(maybeprey)
+            maybePrey = simulatedPreyNodeProb.maxNode()
             # Survey and create the belief States for the Future Simulations
             simulatedPreyNodeProb = updateSurveyPreyProd(size, maybePrey, simulatedPreyNodeProb, simulatedPreyPos)
-            maybePrey = np.max(simulatedPreyNodeProb)
-            maybeprey = [i for i,prob in enumerate(simulatedPreyNodeProb) if prob == maybePrey]
-            maybePrey = random.choice(maybeprey)
-            agentPathPrey = random.choice(BFS(nodes, simulatedAgentPos, maybePrey)["path"])
-            agentPreyDist = len(agentPathPrey)
+            maybePrey = simulatedPreyNodeProb.maxNode()
+            agentPreyDist = pathLength(nodes, simulatedAgentPos, maybePrey)
             maxagentPreyNeighDiff = 0
             for neighbour in nodes[simulatedAgentPos]["neighbours"]:
                 # Find the path between the Neighbour and the Prey
-                preyDict = BFS(nodes, neighbour, maybePrey)
-                randInd = random.randint(0,len(preyDict["path"])-1)
-                newPathPrey = preyDict["path"][randInd]
-                agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
+                neighPreyDist = pathLength(nodes, neighbour, maybePrey)
+                agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
                 if agentPreyNeighDiff0>maxagentPreyNeighDiff:
                     maybeNeigh.clear()
                     maxagentPreyNeighDiff = agentPreyNeighDiff0
@@ -56,9 +57,7 @@ def simulateFuturePrey(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDi
             simulatedPreyPos = preyMovement(nodes, simulatedPreyPos)
             simulatedPreyNodeProb = updateTransitPreyProb(nodes, size, simulatedPreyNodeProb)
             timeStamp += 1
-        maybePrey = np.max(simulatedPreyNodeProb)
-        maybeprey = [i for i,prob in enumerate(simulatedPreyNodeProb) if prob == maybePrey]
-        maybePrey = random.choice(maybeprey)
+        maybePrey = simulatedPreyNodeProb.maxNode()
         nextPrey.append(maybePrey)
     probPreyPos = random.choice(nextPrey)
     
@@ -76,37 +75,14 @@ def predatorMovement(agentPos, predatorPos, nodes):
     Returns:
         _type_: _description_
     """
-    rand = random.random()
-    if rand<0.6:
-        bestNeigh = list()
-        minLen = 50
-        if agentPos != predatorPos:
-            for neigh in nodes[predatorPos]["neighbours"]:
-                                # Find all the Shortest Paths 
-
-                paths = BFS(nodes, neigh, agentPos)["path"]
-                path = random.choice(paths)
-                if len(bestNeigh)==0:
-                    bestNeigh.append([neigh, len(path)])
-                    minLen = len(path)
-                elif len(path) == minLen:
-                    bestNeigh.append([neigh, len(path)])
-                elif len(path) < minLen:
-                    bestNeigh.clear()
-                    bestNeigh.append([neigh, len(path)])
-                    minLen = len(path)
-                #print("BN: ",bestNeigh)
-            
-            predArr = random.choice(bestNeigh)
-            predatorPos = predArr[0]
-            return {"statusCode":200, "predatorPos":predatorPos}
-            
-        else:
-            return {"statusCode": 400, "predatorPos":agentPos}
-
+    # Sample from the compiled policy: chase with probability 0.6, random neighbour with probability 0.4
+    nextPos = predatorMove(nodes, predatorPos, agentPos, 0.4)
+    if nextPos != predatorPos:
+        # Success
+        return {"statusCode":200, "predatorPos":nextPos}
     else:
-        predatorPos = random.choice(nodes[predatorPos]["neighbours"])
-        return {"statusCode":200, "predatorPos":predatorPos}
+        # Failure
+        return {"statusCode": 400, "predatorPos":agentPos}
 
 def generatePreyProb(size, agentPos):
     """_summary_
@@ -118,15 +94,10 @@ def generatePreyProb(size, agentPos):
         agentPos (_type_): Location of the agent on the graph
 
     Returns: A list of the initialized probabilities for the entire graph
-        _type_: list
+        _type_: Belief
     """
-    preyNodeProb = list()
-    for i in range(size):
-        if i == agentPos:
-            preyNodeProb.append(0)
-            continue
-        preyNodeProb.append(1/(size-1))
-    return preyNodeProb
+    # Probability Initialization
+    return beliefClass(size).uniform(size, agentPos)
 
 def updateTransitPreyProb(nodes, size, preyNodeProb):
     """_summary_
@@ -137,17 +108,10 @@ def updateTransitPreyProb(nodes, size, preyNodeProb):
         preyNodeProb (list): The list of the initialized probabilities for the entire graph
     
     Returns: The updated probability matrix for the entire graph maximizing the probability of the location of the prey
-        _type_: dictionary
+        _type_: Belief
     """
-    newPreyNodeProb = [-100]*size
-    for node in range(size):
-        prob = preyNodeProb[node]/(nodes[node]["degree"]+1)
-        for i in range(nodes[node]["degree"]):
-            neighbour = nodes[node]["neighbours"][i]
-            prob += preyNodeProb[neighbour]/(nodes[neighbour]["degree"]+1)
-            newPreyNodeProb[node] = prob
-            
-    return newPreyNodeProb
+    # The Prey stays or moves to one of its neighbours uniformly, one product with the shared transition operator of the graph
+    return preyNodeProb.transit(graphOf(nodes).preyModel())
 
 def updateSurveyPreyProd(size, surveySpot, preyNodeProb, preyPos):
     """_summary_
@@ -160,37 +124,10 @@ def updateSurveyPreyProd(size, surveySpot, preyNodeProb, preyPos):
 
     Returns: 
         Surveying all the nodes in the graph we geth the final probability matrix using conditional Probability to predict the prey location
+        _type_: Belief
     """
-    defect = np.random.rand()
-    if surveySpot == preyPos and defect>0.1:
-        for i in range(size):
-            if i == surveySpot:
-                preyNodeProb[i] = 1
-                continue
-            preyNodeProb[i] = 0
-        return preyNodeProb
-    elif preyNodeProb[surveySpot] != 1:
-        newPreyNodeProb = [-100]*size
-        for i in range(size):
-            if i == surveySpot:
-                newPreyNodeProb[i] = (0.1*preyNodeProb[surveySpot]/(1-preyNodeProb[surveySpot]+(0.1*preyNodeProb[surveySpot])))*0.092229087
-                continue
-            newPreyNodeProb[i] = (preyNodeProb[i]/(1-preyNodeProb[surveySpot]+(0.1*preyNodeProb[surveySpot])))*0.092229087
-            
-        for i in range(size):
-            if i == surveySpot:
-                newPreyNodeProb[i] += 0
-                continue
-            newPreyNodeProb[i] += (preyNodeProb[i]/(1-preyNodeProb[surveySpot]))*(1-0.092229087)
-        return newPreyNodeProb
-    else:
-        for i in range(size):
-            if i == surveySpot:
-                preyNodeProb[i] = 1
-                continue
-            preyNodeProb[i] = 0
-        return preyNodeProb
-        
+    # A success (or a certain node) is applied in place, a failure returns a new blended belief
+    return preySensor.update(preyNodeProb, surveySpot, preySensor.report(surveySpot, preyPos))
 
 def generatePredProb(size, predPos):
     """_summary_
@@ -202,11 +139,9 @@ def generatePredProb(size, predPos):
         agentPos (_type_): Location of the agent on the graph
 
     Returns: The probability list will all the node probabilities for it to be a Predator
-        _type_: list
+        _type_: Belief
     """
-    predNodeProb = [0]*size
-    predNodeProb[predPos] = 1
-    return predNodeProb
+    return beliefClass(size, sparse=True).oneHot(size, predPos)
 
 def updateTransitPredProb(nodes, size, predNodeProb, agentPos):
     """_summary_       
@@ -218,49 +153,11 @@ def updateTransitPredProb(nodes, size, predNodeProb, agentPos):
         preyNodeProb (list): The list of the initialized probabilities for the entire graph
     
     Returns:The updated probability matrix for the entire graph maximizing the probability of the location of the predator
-        _type_: dictionary
+        _type_: Belief
     """
-    newPredNodeProb = [0]*size
-    transitGraph = dict()
-    for node in range(size):
-        bestNeigh = list()
-        for neigh in nodes[node]["neighbours"]:
-            paths = BFS(nodes, neigh, agentPos)["path"]
-            path = random.choice(paths)
-            if len(bestNeigh)==0:
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-            elif len(path) == minLen:
-                bestNeigh.append([neigh, len(path)])
-            elif len(path) < minLen:
-                bestNeigh.clear()
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-                
-        nextStep = [i[0] for i in bestNeigh]
-        for step in nextStep:
-            if transitGraph.get(step, False):
-                if [node, 1/len(nextStep)] not in transitGraph[step]:
-                    # Probability Formula used based on Conditional Probability
-                    transitGraph[step].append([node, 1/len(nextStep)])
-            else:
-                transitGraph[step] = [[node, 1/len(nextStep)]]
-    
-    for node in range(size):
-        if node in transitGraph.keys():
-            for neigh in transitGraph[node]:
-                newPredNodeProb[node] += 0.6*predNodeProb[neigh[0]]*neigh[1]
-        else:
-            newPredNodeProb[node] = 0
-    # print("before other: ", np.sum(newPredNodeProb))
-    for node in range(size):
-        sum = 0
-        for neigh in nodes[node]["neighbours"]:
-            sum += 0.4*(1/nodes[neigh]["degree"])*predNodeProb[neigh] 
-        newPredNodeProb[node] += sum
-        #print(newPredNodeProb)
-    #print("transitGraph: ",transitGraph)
-    return newPredNodeProb
+    # The Predator chases with probability 0.6 and moves randomly with probability 0.4, one sparse matrix vector
+    # product with the cached transition matrix of the current agent position
+    return predNodeProb.transit(graphOf(nodes).predatorModel(0.4), agentPos)
 
 def updateSurveyPredProd(size, surveySpot, predNodeProb, predPos):
     """_summary_
@@ -274,57 +171,30 @@ def updateSurveyPredProd(size, surveySpot, predNodeProb, predPos):
 
     Returns: 
         Surveying all the nodes in the graph we geth the final probability matrix using conditional Probability to predict the prey location
+        _type_: Belief
     """
-    defect = np.random.rand()
-    if surveySpot == predPos and defect>0.1:
-        newPredNodeProb = [0]*size
-        newPredNodeProb[surveySpot] = 1
-        return newPredNodeProb
-    elif predNodeProb[surveySpot] != 1:
-        newPredNodeProb = [-100]*size
-        for i in range(size):
-            if i == surveySpot:
-                newPredNodeProb[i] = (0.1*predNodeProb[surveySpot]/(1-predNodeProb[surveySpot]+(0.1*predNodeProb[surveySpot])))*0.152429089
-                continue
-            newPredNodeProb[i] = (predNodeProb[i]/(1-predNodeProb[surveySpot]+(0.1*predNodeProb[surveySpot])))*0.152429089
-        
-        for i in range(size):
-            if i == surveySpot:
-                newPredNodeProb[i] += 0
-                continue
-            newPredNodeProb[i] += (predNodeProb[i]/(1-predNodeProb[surveySpot]))*(1-0.152429089)
-            
-        return newPredNodeProb
-    else:
-        newPredNodeProb = [0]*size
-        newPredNodeProb[surveySpot] = 1
-        return newPredNodeProb
+    # Every branch returns a new belief
+    return predSensor.update(predNodeProb.copy(), surveySpot, predSensor.report(surveySpot, predPos))
 
 def simulateFuture(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist):
     nextNeigh = list()
     simulationCount = 30
+    rolloutBelief = preyNodeProb.copy()
     for _ in range(simulationCount):
         simulatedAgentPos = copy.deepcopy(agentPos)
-        simulatedPreyNodeProb = copy.deepcopy(preyNodeProb)
+        simulatedPreyNodeProb = preyNodeProb.copyInto(rolloutBelief)
         simulatedPreyPos = copy.deepcopy(preyPos)
         timeStamp = 0
         while timeStamp<agentPreyDist and simulatedAgentPos != simulatedPreyPos:
             maybeNeigh = [simulatedAgentPos]
-            maybePrey = np.max(simulatedPreyNodeProb)
-            maybeprey = [i for i,prob in enumerate(simulatedPreyNodeProb) if prob == maybePrey]
-            maybePrey = random.choice(maybeprey)
+            maybePrey = simulatedPreyNodeProb.maxNode()
             simulatedPreyNodeProb = updateSurveyPreyProd(size, maybePrey, simulatedPreyNodeProb, simulatedPreyPos)
-            maybePrey = np.max(simulatedPreyNodeProb)
-            maybeprey = [i for i,prob in enumerate(simulatedPreyNodeProb) if prob == maybePrey]
-            maybePrey = random.choice(maybeprey)
-            agentPathPrey = random.choice(BFS(nodes, simulatedAgentPos, maybePrey)["path"])
-            agentPreyDist = len(agentPathPrey)
+            maybePrey = simulatedPreyNodeProb.maxNode()
+            agentPreyDist = pathLength(nodes, simulatedAgentPos, maybePrey)
             maxagentPreyNeighDiff = 0
             for neighbour in nodes[simulatedAgentPos]["neighbours"]:
-                preyDict = BFS(nodes, neighbour, maybePrey)
-                randInd = random.randint(0,len(preyDict["path"])-1)
-                newPathPrey = preyDict["path"][randInd]
-                agentPreyNeighDiff0 = (agentPreyDist-len(newPathPrey))
+                neighPreyDist = pathLength(nodes, neighbour, maybePrey)
+                agentPreyNeighDiff0 = (agentPreyDist-neighPreyDist)
                 if agentPreyNeighDiff0>maxagentPreyNeighDiff:
                     maybeNeigh.clear()
                     maxagentPreyNeighDiff = agentPreyNeighDiff0
@@ -339,10 +209,7 @@ def simulateFuture(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist):
             timeStamp += 1
         nextNeigh.append(simulatedAgentPos)
     finalAgentPos = random.choice(nextNeigh)
-    agentPath = random.choice(BFS(nodes, agentPos, finalAgentPos)["path"])
-    
-    if len(agentPath) > 1:
-        agentPos = agentPath[1]
+    agentPos = nextHop(nodes, agentPos, finalAgentPos)
     return agentPos
         
 def agent8Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNodeProb, preyCaught, predCaught, probUse, distUse):
@@ -360,16 +227,12 @@ def agent8Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
     """
 
     
-    maybePred = np.max(predNodeProb)
-    maybePrey = np.max(preyNodeProb)
-    maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-    maybePrey = random.choice(maybeprey)
-    agentPathPrey = random.choice(BFS(nodes, agentPos, maybePrey)["path"])
-    agentPreyDist = len(agentPathPrey)
+    maybePred = predNodeProb.maxProb()
+    maybePrey = preyNodeProb.maxNode()
+    agentPreyDist = pathLength(nodes, agentPos, maybePrey)
     maybePrey = simulateFuturePrey(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist)
     if maybePred < 0.5:
-        maybepred = [i for i,prob in enumerate(predNodeProb) if prob == maybePred]
-        maybePred = random.choice(maybepred)
+        maybePred = predNodeProb.maxNode()
         if maybePred == predPos:
             predCaught += 1
         if maybePrey == preyPos:
@@ -377,22 +240,14 @@ def agent8Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
         #SURVEY BELOW
         predNodeProb = updateSurveyPredProd(size, maybePred, predNodeProb, predPos)
         preyNodeProb = updateSurveyPreyProd(size, maybePred, preyNodeProb, preyPos)
-        maybePred = np.max(predNodeProb)
-        maybepred = [i for i,prob in enumerate(predNodeProb) if prob == maybePred]
-        maybePred = random.choice(maybepred)
-        maybePrey = np.max(preyNodeProb)
-        maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-        maybePrey = random.choice(maybeprey)
-        agentPathPrey = random.choice(BFS(nodes, agentPos, maybePrey)["path"])
-        agentPreyDist = len(agentPathPrey)
+        maybePred = predNodeProb.maxNode()
+        maybePrey = preyNodeProb.maxNode()
+        agentPreyDist = pathLength(nodes, agentPos, maybePrey)
         maybePrey = simulateFuturePrey(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist)
 
     else:
-        maybePrey = np.max(preyNodeProb)
-        maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-        maybePrey = random.choice(maybeprey)
-        agentPathPrey = random.choice(BFS(nodes, agentPos, maybePrey)["path"])
-        agentPreyDist = len(agentPathPrey)
+        maybePrey = preyNodeProb.maxNode()
+        agentPreyDist = pathLength(nodes, agentPos, maybePrey)
         maybePrey = simulateFuturePrey(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist)
         if maybePred == predPos:
             predCaught += 1
@@ -401,15 +256,10 @@ def agent8Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
         #SURVEY BELOW
         preyNodeProb = updateSurveyPreyProd(size, maybePrey, preyNodeProb, preyPos)
         predNodeProb = updateSurveyPredProd(size, maybePrey, predNodeProb, predPos)
-        maybePred = np.max(predNodeProb)
-        maybepred = [i for i,prob in enumerate(predNodeProb) if prob == maybePred]
-        maybePred = random.choice(maybepred)
+        maybePred = predNodeProb.maxNode()
 
-        maybePrey = np.max(preyNodeProb)
-        maybeprey = [i for i,prob in enumerate(preyNodeProb) if prob == maybePrey]
-        maybePrey = random.choice(maybeprey)
-        agentPathPrey = random.choice(BFS(nodes, agentPos, maybePrey)["path"])
-        agentPreyDist = len(agentPathPrey)
+        maybePrey = preyNodeProb.maxNode()
+        agentPreyDist = pathLength(nodes, agentPos, maybePrey)
         maybePrey = simulateFuturePrey(nodes, size, agentPos, preyPos, preyNodeProb, agentPreyDist)
 
     # print(maybePrey, maybePred)
@@ -418,10 +268,8 @@ def agent8Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
     # print(preyNodeProb[preyPos], predNodeProb[predPos])
     # print("======================================================")
     maxPredDistNeigh = [agentPos]
-    agentPathPred = random.choice(BFS(nodes, agentPos, maybePred)["path"])
-    agentPathPrey = random.choice(BFS(nodes, agentPos, maybePrey)["path"])
-    agentPredDist = len(agentPathPred)
-    agentPreyDist = len(agentPathPrey)
+    agentPredDist = pathLength(nodes, agentPos, maybePred)
+    agentPreyDist = pathLength(nodes, agentPos, maybePrey)
     maxPredDist = agentPredDist
     if agentPreyDist < agentPredDist*0.7:
         probUse += 1
@@ -430,17 +278,15 @@ def agent8Movement(nodes, size, predPos, agentPos, preyPos, predNodeProb, preyNo
         distUse += 1
         for neighbour in nodes[agentPos]["neighbours"]:
             #print(neighbour, " maxPredDistNeigh", maxPredDistNeigh)
-            predatorDict = BFS(nodes, neighbour, maybePred)
             # Find the distance between the Neighbour and the Predator
-            randInd = random.randint(0,len(predatorDict["path"])-1)
-            newPathPred = predatorDict["path"][randInd]
+            neighPredDist = pathLength(nodes, neighbour, maybePred)
             
-            if len(newPathPred) > maxPredDist:
+            if neighPredDist > maxPredDist:
                 maxPredDistNeigh.clear()
-                maxPredDist = len(newPathPred)
+                maxPredDist = neighPredDist
                 maxPredDistNeigh.append(neighbour)
                 
-            elif len(newPathPred) == maxPredDist:
+            elif neighPredDist == maxPredDist:
                 maxPredDistNeigh.append(neighbour)
         # Agent moves away from predator near to the prey
         agentPos = random.choice(maxPredDistNeigh)
@@ -473,6 +319,7 @@ def agent8(nodes, size, predatorPos, agentPos, preyPos):
     probUse, distUse = 0, 0
     predNodeProb = generatePredProb(size, predatorPos) 
     preyNodeProb = generatePreyProb(size, agentPos) 
+    preyModel, predatorModel = graphOf(nodes).preyModel(), graphOf(nodes).predatorModel(0.4)
     for counter in range(1,threshold+1):
         # print("Counter: ", counter)
         # print("Agent: ", agentPos)
@@ -487,8 +334,9 @@ def agent8(nodes, size, predatorPos, agentPos, preyPos):
         
         agentPos, preyCaught, predCaught, probUse, distUse = agent8Movement(nodes, size, predatorPos, agentPos, preyPos, predNodeProb, preyNodeProb, preyCaught, predCaught, probUse, distUse)
         agentPath.append(agentPos)
-        predNodeProb = updateSurveyPredProd(size, agentPos, predNodeProb, predatorPos)
-        preyNodeProb = updateSurveyPreyProd(size, agentPos, preyNodeProb, preyPos)
+        # The new position is surveyed for both creatures, the update is applied together with the transits at the end of the step.
+        # The defective sensor draws for the Predator then the Prey, like the update functions
+        predFound, preyFound = predSensor.report(agentPos, predatorPos), preySensor.report(agentPos, preyPos)
         #print("Sum of predNodeProb: ", np.sum(predNodeProb))
         # If Agent reaches Prey Position which ih the Goal State
         if agentPos == preyPos:
@@ -496,7 +344,6 @@ def agent8(nodes, size, predatorPos, agentPos, preyPos):
         # Making the prey move
         preyPos = preyMovement(nodes, preyPos)
         preyPath.append(preyPos)
-        preyNodeProb = updateTransitPreyProb(nodes, size, preyNodeProb)
         # After the Prey movement takes place
         if agentPos == preyPos:
             return {"statusCode": 200, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "PreyPath":preyPath, "preyCaught":preyCaught, "predCaught":predCaught, "probUse":probUse, "distUse":distUse}
@@ -509,29 +356,37 @@ def agent8(nodes, size, predatorPos, agentPos, preyPos):
         elif predDict["statusCode"] == 400:
             return {"statusCode": 400, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "PreyPath":preyPath, "preyCaught":preyCaught, "predCaught":predCaught, "probUse":probUse, "distUse":distUse}
         #print("Predpos: ", predatorPos)
-        predNodeProb = updateTransitPredProb(nodes, size, predNodeProb, agentPos)
+        preyNodeProb, predNodeProb = surveyAndTransit(preyNodeProb, predNodeProb, agentPos, preyFound, predFound, preyModel, predatorModel, preySensor, predSensor)
         #print("Max of predNodeProb: ", np.max(predNodeProb))
         #print("Sum of predNodeProb: ", np.sum(predNodeProb))
         #print("======================")
         
     return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath, "PreyPath":preyPath, "preyCaught":preyCaught, "predCaught":predCaught, "probUse":probUse, "distUse":distUse}
         
-def driver():
+def driver(corpus=None, trial=0):
     """_summary_
         Driver Code for the Agent 7
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
     """
-    nodes, size = genEnvironment()
-    predatorPos, agentPos, preyPos = spawnCreatures()
+    if corpus is None:
+        nodes, size = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, size, predatorPos, agentPos, preyPos = corpus.trial(trial)
     return agent8(nodes, size, predatorPos, agentPos, preyPos)
 
-def dataCollection():
+def dataCollection(corpus=None):
     """_summary_
         Function to collect the data regarding Agent 7, its performance and all other statistical information
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions shared by every trial, each trial generates its own environment when None
     """
     final_data = list()
     for i in range(300):
         print("Counter: ",i)
-        data = driver()
+        data = driver(corpus, i)
         final_data.append(data)
             
     df1 = pd.DataFrame(final_data)
@@ -0,0 +1,763 @@
+# Imports
+import numpy as np
+import random
+from observation import ObservationModel, perfectSensor
+
+# Largest graph whose beliefs are normalized on every update, bigger graphs use LazyBelief
+lazyLimit = 4096
+# Largest share of the nodes a SparseBelief tracks before it switches to the dense updates
+sparseLimit = 0.25
+# Smallest graph whose beliefs are particle filters, and the number of particles they use
+particleLimit = 100000
+particleCount = 4096
+# A ParticleBelief is resampled when its effective number of particles falls below this share of them
+resampleLimit = 0.5
+
+class Belief:
+    """_summary_
+        Probability of the Prey or the Predator being at every node, kept in a preallocated float64 array. Surveys and transits
+        update the array in place, so the agents do not build a new list on every update. The class also behaves like the
+        lists the agents used before (indexing, iteration, len, np.max and np.argmax).
+        The sorted nodes holding the highest probability are kept between updates: a successful survey leaves a single node, a transit
+        searches them in the array it just wrote, and after a failed survey they are searched again when they are next queried
+    Args:
+        values (np.ndarray): Initial probability of every node, copied
+    """
+    def __init__(self, values):
+        self.values = np.array(values, dtype=np.float64)
+        self.spare = None
+        self.maxNodes = None
+
+    @classmethod
+    def uniform(cls, size, exclude):
+        """_summary_
+            Belief of the Prey at the start: 0 on the node of the agent and 1/(size-1) on every other node
+        Args:
+            size (int): Length of the graph
+            exclude (int): Location of the agent on the graph
+
+        Returns: The initial belief
+            _type_: Belief
+        """
+        values = np.full(size, 1/(size-1))
+        values[exclude] = 0
+        return cls(values)
+
+    @classmethod
+    def oneHot(cls, size, node):
+        """_summary_
+            Belief of a known position, probability 1 on node and 0 everywhere else
+        Args:
+            size (int): Length of the graph
+            node (int): The known position
+
+        Returns: The belief
+            _type_: Belief
+        """
+        values = np.zeros(size)
+        values[node] = 1
+        return cls(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, node):
+        return self.values[node]
+
+    def __setitem__(self, node, prob):
+        self.values[node] = prob
+        self.maxNodes = None
+
+    def __iter__(self):
+        return iter(self.values.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    def tolist(self):
+        return self.values.tolist()
+
+    def scanMax(self):
+        """_summary_
+            Search all the nodes for the highest probability
+        Returns: The sorted nodes holding the highest probability
+            _type_: np.ndarray
+        """
+        values = self.values
+        return np.flatnonzero(values == values.max())
+
+    def surveyMax(self, node, found, ratio=0.0):
+        """_summary_
+            Keep the nodes of the highest probability up to date after a survey of node. A success leaves node as the only one. A failure
+            divides every probability by the same number, which can round probabilities that differed in the last bit to the same
+            value, and the agents survey the node they believe most likely, usually the only maximum, so the nodes are searched
+            again on the next query (the division already went through every node)
+        Args:
+            node (int): The surveyed node
+            found (bool): Whether the belief collapsed onto node
+            ratio (float, optional): Factor the probability of node was multiplied by before the renormalization
+        """
+        self.maxNodes = np.array([node]) if found else None
+
+    def maxProb(self):
+        """_summary_
+            Highest probability of the belief, the same value as np.max
+        Returns: The highest probability
+            _type_: float
+        """
+        if self.maxNodes is None:
+            self.maxNodes = self.scanMax()
+        return self[self.maxNodes[0]]
+
+    def maxNode(self):
+        """_summary_
+            Node of the highest probability, ties broken uniformly with random.choice. The same draw as picking from the list of
+            all the nodes equal to np.max, the nodes are only searched when they are not known
+        Returns: The chosen node
+            _type_: int
+        """
+        if self.maxNodes is None:
+            self.maxNodes = self.scanMax()
+        return int(random.choice(self.maxNodes))
+
+    def survey(self, node, found, falseNegative=0.0):
+        """_summary_
+            Update the belief in place after surveying a node. A success leaves all the probability on the node, a failure removes
+            the probability of the node (all but the falseNegative part of it) and renormalizes the rest with
+            p[i]/(1-p[node]+falseNegative*p[node]), the same operations as the agents' update functions. The same update with any
+            likelihood ratio in place of falseNegative is the Bayes update of a report, see ObservationModel
+        Args:
+            node (int): The surveyed node
+            found (bool): Whether the survey found the target on the node
+            falseNegative (float, optional): Probability that the survey misses a target that is on the node, or the likelihood ratio of the report
+
+        Returns: The updated belief
+            _type_: Belief
+        """
+        prob = self.values[node]
+        # A failed survey of a certain node keeps the certainty, like the predator updates
+        if found or prob == 1:
+            self.values[:] = 0
+            self.values[node] = 1
+            self.surveyMax(node, True)
+            return self
+        self.values[node] = falseNegative*prob
+        np.divide(self.values, 1-prob+(falseNegative*prob), out=self.values)
+        self.surveyMax(node, False, falseNegative)
+        return self
+
+    def transit(self, operator, *args):
+        """_summary_
+            Move the belief one step forward in place with a transition operator, e.g. the PreyModel or the PredatorModel of the graph
+        Args:
+            operator (PreyModel or PredatorModel): Anything with a transit(belief, *args, out=...) method
+            *args: Extra arguments of the operator, the agent position for the PredatorModel
+
+        Returns: The updated belief
+            _type_: Belief
+        """
+        if self.spare is None:
+            self.spare = np.empty_like(self.values)
+        operator.transit(self.values, *args, out=self.spare)
+        self.values, self.spare = self.spare, self.values
+        self.maxNodes = self.scanMax()
+        return self
+
+    def mix(self, other, weight):
+        """_summary_
+            Weighted mix weight*self + (1-weight)*other of two beliefs over the same graph, e.g. the blended survey update of Agent 9
+        Args:
+            other (Belief): The second belief
+            weight (float): Weight of this belief
+
+        Returns: The mixed belief, a new one
+            _type_: Belief
+        """
+        return type(self)(self.values*weight + other.values*(1-weight))
+
+    def copy(self):
+        """_summary_
+            Independent copy of the belief
+        Returns: The copy
+            _type_: Belief
+        """
+        other = Belief(self.values)
+        # Node arrays are replaced on every update, never written to, so they can be shared
+        other.maxNodes = self.maxNodes
+        return other
+
+    def copyInto(self, other):
+        """_summary_
+            Copy the probabilities into another belief of the same size without allocating, e.g. to reset a rollout belief
+        Args:
+            other (Belief): The belief to overwrite
+
+        Returns: The overwritten belief
+            _type_: Belief
+        """
+        np.copyto(other.values, self.values)
+        other.maxNodes = self.maxNodes
+        return other
+
+class LazyBelief(Belief):
+    """_summary_
+        Belief kept as unnormalized weights and their running total, probabilities are only normalized when they are read.
+        A failed survey changes a single weight and the total, so it costs O(1) instead of rewriting every node. Copies share the
+        weight array and keep their own small table of changed weights, which also makes the copy done by the agents' failed survey
+        updates O(1). The table is written into an owned weight array when all the probabilities are read or the belief transits
+    Args:
+        values (np.ndarray): Initial probability (or weight) of every node, copied
+    """
+    def __init__(self, values):
+        self.weights = np.array(values, dtype=np.float64)
+        self.owned = True
+        self.changed = dict()
+        self.total = float(self.weights.sum())
+        self.spare = None
+        self.normalized = None
+        self.maxNodes = None
+
+    def weight(self, node):
+        return self.changed.get(node, self.weights[node])
+
+    def flush(self):
+        """_summary_
+            Write the changed weights into the weight array, copying it first when it is shared with another belief
+        """
+        if self.changed:
+            if not self.owned:
+                self.weights = self.weights.copy()
+                self.owned = True
+            nodes = list(self.changed)
+            self.weights[nodes] = [self.changed[node] for node in nodes]
+            self.changed = dict()
+
+    @property
+    def values(self):
+        """_summary_
+            Normalized probabilities of every node, computed when first read after a change
+        Returns: The probabilities, read only
+            _type_: np.ndarray
+        """
+        if self.normalized is None:
+            self.flush()
+            self.normalized = self.weights/self.total
+            self.normalized.flags.writeable = False
+        return self.normalized
+
+    def __getitem__(self, node):
+        return self.weight(node)/self.total
+
+    def scanMax(self):
+        """_summary_
+            Search all the weights for the highest one. Ties are decided on the weights, which a failed survey does not round
+        Returns: The sorted nodes holding the highest weight
+            _type_: np.ndarray
+        """
+        self.flush()
+        return np.flatnonzero(self.weights == self.weights.max())
+
+    def surveyMax(self, node, found, ratio=0.0):
+        """_summary_
+            Keep the nodes of the highest weight up to date after a survey of node. A failure only scales the weight of node, the
+            other weights keep their exact values, so node is removed from the ties (ratio below 1) or compared with them (ratio above 1)
+        Args:
+            node (int): The surveyed node
+            found (bool): Whether the belief collapsed onto node
+            ratio (float, optional): Factor the weight of node was multiplied by
+        """
+        if found:
+            self.maxNodes = np.array([node])
+        elif self.maxNodes is None or ratio == 1:
+            return
+        position = np.searchsorted(self.maxNodes, node)
+        tied = position < len(self.maxNodes) and self.maxNodes[position] == node
+        if ratio < 1:
+            if tied:
+                self.maxNodes = np.delete(self.maxNodes, position) if len(self.maxNodes) > 1 else None
+        elif tied or self.weight(node) > self.weight(self.maxNodes[0]):
+            self.maxNodes = np.array([node])
+        elif self.weight(node) == self.weight(self.maxNodes[0]):
+            self.maxNodes = np.insert(self.maxNodes, position, node)
+
+    def __setitem__(self, node, prob):
+        # Like Belief, the other probabilities are left as they are, so the weights are normalized first
+        self.weights, self.owned, self.changed, self.total = self.values.copy(), True, dict(), 1.0
+        self.weights[node] = prob
+        self.normalized = None
+        self.maxNodes = None
+
+    def survey(self, node, found, falseNegative=0.0):
+        """_summary_
+            Update the belief after surveying a node, see Belief.survey. A failed survey is O(1): the weight of the node is scaled
+            by falseNegative and the total loses the removed weight
+        Args:
+            node (int): The surveyed node
+            found (bool): Whether the survey found the target on the node
+            falseNegative (float, optional): Probability that the survey misses a target that is on the node
+
+        Returns: The updated belief
+            _type_: LazyBelief
+        """
+        weight = self.weight(node)
+        self.normalized = None
+        if found or weight == self.total:
+            self.weights = np.zeros(len(self.weights))
+            self.weights[node] = 1
+            self.owned, self.changed, self.total = True, dict(), 1.0
+            self.surveyMax(node, True)
+            return self
+        self.changed[node] = falseNegative*weight
+        self.total -= weight - falseNegative*weight
+        self.surveyMax(node, False, falseNegative)
+        return self
+
+    def transit(self, operator, *args):
+        """_summary_
+            Move the belief one step forward with a transition operator, see Belief.transit. The operator is applied to the weights,
+            which are then divided by their total. Failed surveys only shrink the total, renormalizing here keeps it from underflowing
+        Args:
+            operator (PreyModel or PredatorModel): Anything with a transit(belief, *args, out=...) method
+            *args: Extra arguments of the operator, the agent position for the PredatorModel
+
+        Returns: The updated belief
+            _type_: LazyBelief
+        """
+        self.flush()
+        if self.spare is None:
+            self.spare = np.empty_like(self.weights)
+        operator.transit(self.weights, *args, out=self.spare)
+        self.weights, self.spare = self.spare, (self.weights if self.owned else None)
+        self.owned = True
+        self.weights /= self.weights.sum()
+        self.total = 1.0
+        self.normalized = None
+        self.maxNodes = self.scanMax()
+        return self
+
+    def copy(self):
+        """_summary_
+            Copy of the belief sharing the weight array, O(1) apart from the table of changed weights
+        Returns: The copy
+            _type_: LazyBelief
+        """
+        other = LazyBelief.__new__(LazyBelief)
+        other.weights, other.owned, other.changed, other.total = self.weights, False, dict(self.changed), self.total
+        other.spare, other.normalized, other.maxNodes = None, None, self.maxNodes
+        # Neither of the two may write into the shared array any more
+        self.owned = False
+        return other
+
+    def copyInto(self, other):
+        """_summary_
+            Overwrite another lazy belief with this one, reusing its weight array when it owns one
+        Args:
+            other (LazyBelief): The belief to overwrite
+
+        Returns: The overwritten belief
+            _type_: LazyBelief
+        """
+        if other.owned and other.weights is not self.weights and len(other.weights) == len(self.weights):
+            np.copyto(other.weights, self.weights)
+        else:
+            other.weights, other.owned = self.weights, False
+            self.owned = False
+        other.changed, other.total, other.normalized, other.maxNodes = dict(self.changed), self.total, None, self.maxNodes
+        return other
+
+class SparseBelief(Belief):
+    """_summary_
+        Belief that also tracks the nodes with a non zero probability. Surveys and transits only touch those nodes (and their neighbours),
+        so following the Predator from a known position costs as much as the region it can have reached, not the graph size.
+        Once the support grows past sparseLimit of the nodes the belief is updated like a dense Belief, until a successful survey
+        collapses it back to a single node
+    Args:
+        values (np.ndarray): Initial probability of every node, copied
+    """
+    def __init__(self, values):
+        super().__init__(values)
+        self.support = np.flatnonzero(self.values)
+        self.checkDensity()
+
+    def scanMax(self):
+        if self.support is None:
+            return super().scanMax()
+        mass = self.values[self.support]
+        return self.support[mass == mass.max()]
+
+    def checkDensity(self):
+        """_summary_
+            Stop tracking the support once it covers more than sparseLimit of the nodes
+        """
+        if self.support is not None and len(self.support) > sparseLimit*len(self.values):
+            self.support = None
+
+    def __setitem__(self, node, prob):
+        self.values[node] = prob
+        self.maxNodes = None
+        if self.support is not None and prob != 0:
+            self.support = np.union1d(self.support, [node])
+            self.checkDensity()
+
+    def survey(self, node, found, falseNegative=0.0):
+        """_summary_
+            Update the belief after surveying a node, see Belief.survey. Only the nodes of the support are rescaled
+        Args:
+            node (int): The surveyed node
+            found (bool): Whether the survey found the target on the node
+            falseNegative (float, optional): Probability that the survey misses a target that is on the node
+
+        Returns: The updated belief
+            _type_: SparseBelief
+        """
+        prob = self.values[node]
+        if found or prob == 1:
+            if self.support is None:
+                self.values[:] = 0
+            else:
+                self.values[self.support] = 0
+            self.values[node] = 1
+            self.support = np.array([node])
+            self.surveyMax(node, True)
+            return self
+        if self.support is None:
+            return super().survey(node, found, falseNegative)
+        self.values[node] = falseNegative*prob
+        self.values[self.support] /= 1-prob+(falseNegative*prob)
+        if self.values[node] == 0:
+            self.support = self.support[self.support != node]
+        self.surveyMax(node, False, falseNegative)
+        return self
+
+    def transit(self, operator, *args):
+        """_summary_
+            Move the belief one step forward, see Belief.transit. While the support is tracked only its nodes are propagated,
+            with the transitSparse method of the operator
+        Args:
+            operator (PreyModel or PredatorModel): The movement model of the tracked creature
+            *args: Extra arguments of the operator, the agent position for the PredatorModel
+
+        Returns: The updated belief
+            _type_: SparseBelief
+        """
+        if self.support is None:
+            return super().transit(operator, *args)
+        support, mass = operator.transitSparse(self.support, self.values[self.support], *args)
+        self.values[self.support] = 0
+        self.values[support] = mass
+        self.support = support
+        self.checkDensity()
+        self.maxNodes = self.scanMax()
+        return self
+
+    def copy(self):
+        """_summary_
+            Independent copy of the belief, only the support is copied while it is tracked
+        Returns: The copy
+            _type_: SparseBelief
+        """
+        other = SparseBelief.__new__(SparseBelief)
+        other.spare = None
+        # Support and node arrays are replaced on every update, never written to, so they can be shared
+        other.support, other.maxNodes = self.support, self.maxNodes
+        if self.support is None:
+            other.values = self.values.copy()
+        else:
+            other.values = np.zeros(len(self.values))
+            other.values[self.support] = self.values[self.support]
+        return other
+
+    def copyInto(self, other):
+        """_summary_
+            Overwrite another sparse belief of the same size with this one without allocating
+        Args:
+            other (SparseBelief): The belief to overwrite
+
+        Returns: The overwritten belief
+            _type_: SparseBelief
+        """
+        if self.support is None or other.support is None:
+            np.copyto(other.values, self.values)
+        else:
+            other.values[other.support] = 0
+            other.values[self.support] = self.values[self.support]
+        other.support, other.maxNodes = self.support, self.maxNodes
+        return other
+
+class ParticleBelief(Belief):
+    """_summary_
+        Approximate belief for graphs of 10^5 nodes and more, where most of the probability sits in a small region. The belief is a set
+        of weighted particles, each a possible position of the creature. A transit moves every particle with one vectorized step of
+        the movement model (the step method of the PreyModel or of the Predator model), a survey reweights the particles on the
+        surveyed node, and the particles are resampled systematically before a transit once the weights have degenerated.
+        Probabilities and the most likely nodes cost O(count), only the values property builds a vector over the whole graph
+    Args:
+        values (np.ndarray): Initial probability of every node, the particles are drawn from it
+        count (int, optional): Number of particles
+        rng (np.random.Generator, optional): Generator of the moves and resamplings, the numpy global random state is used when None
+    """
+    def __init__(self, values, count=particleCount, rng=None):
+        values = np.asarray(values, dtype=np.float64)
+        self.size = len(values)
+        self.rng = rng
+        self.particles = systematicSample(np.cumsum(values), count, rng)
+        self.weights = np.full(count, 1/count)
+        self.maxNodes = None
+
+    @classmethod
+    def fromParticles(cls, size, particles, weights=None, rng=None):
+        """_summary_
+            Belief over the given particles, without going through a vector of the graph size
+        Args:
+            size (int): Length of the graph
+            particles (np.ndarray): Position of every particle
+            weights (np.ndarray, optional): Normalized weight of every particle, equal weights when None
+            rng (np.random.Generator, optional): Generator of the moves and resamplings
+
+        Returns: The belief
+            _type_: ParticleBelief
+        """
+        belief = cls.__new__(cls)
+        belief.size = size
+        belief.rng = rng
+        belief.particles = np.asarray(particles, dtype=np.int64)
+        belief.weights = np.full(len(particles), 1/len(particles)) if weights is None else np.array(weights, dtype=np.float64)
+        belief.maxNodes = None
+        return belief
+
+    @classmethod
+    def uniform(cls, size, exclude, count=particleCount, rng=None):
+        """_summary_
+            Belief of the Prey at the start, particles spread uniformly over every node but the node of the agent
+        Args:
+            size (int): Length of the graph
+            exclude (int): Location of the agent on the graph
+            count (int, optional): Number of particles
+            rng (np.random.Generator, optional): Generator of the draws
+
+        Returns: The initial belief
+            _type_: ParticleBelief
+        """
+        particles = np.random.randint(0, size-1, count) if rng is None else rng.integers(size-1, size=count)
+        particles += particles >= exclude
+        return cls.fromParticles(size, particles, rng=rng)
+
+    @classmethod
+    def oneHot(cls, size, node, count=particleCount, rng=None):
+        """_summary_
+            Belief of a known position, every particle on node
+        Args:
+            size (int): Length of the graph
+            node (int): The known position
+            count (int, optional): Number of particles
+            rng (np.random.Generator, optional): Generator of the moves and resamplings
+
+        Returns: The belief
+            _type_: ParticleBelief
+        """
+        return cls.fromParticles(size, np.full(count, node), rng=rng)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, node):
+        on = self.particles == node
+        # Certainty is exact, the equal weights of the particles do not always add up to exactly 1
+        if not self.weights[~on].any():
+            return 1.0
+        return self.weights[on].sum()
+
+    @property
+    def values(self):
+        """_summary_
+            Probability of every node, built from the particles on every read
+        Returns: The probabilities
+            _type_: np.ndarray
+        """
+        return np.bincount(self.particles, weights=self.weights, minlength=self.size)
+
+    def scanMax(self):
+        nodes, inverse = np.unique(self.particles, return_inverse=True)
+        mass = np.bincount(inverse, weights=self.weights)
+        return nodes[mass == mass.max()]
+
+    def survey(self, node, found, falseNegative=0.0):
+        """_summary_
+            Update the belief after surveying a node, see Belief.survey. A success moves every particle onto the node, a failure
+            multiplies the weights of the particles on the node by falseNegative and renormalizes
+        Args:
+            node (int): The surveyed node
+            found (bool): Whether the survey found the target on the node
+            falseNegative (float, optional): Probability that the survey misses a target that is on the node, or the likelihood ratio of the report
+
+        Returns: The updated belief
+            _type_: ParticleBelief
+        """
+        on = self.particles == node
+        # Like Belief, a failed survey of a node holding all the weight keeps the certainty
+        if found or not self.weights[~on].any():
+            self.particles = np.full(len(self.particles), node)
+            self.weights = np.full(len(self.particles), 1/len(self.particles))
+            self.surveyMax(node, True)
+            return self
+        prob = self.weights[on].sum()
+        self.weights[on] *= falseNegative
+        self.weights /= 1-prob+(falseNegative*prob)
+        self.surveyMax(node, False, falseNegative)
+        return self
+
+    def resample(self):
+        """_summary_
+            Systematic resampling of the particles when the effective number of particles 1/sum(w^2) fell below resampleLimit of them,
+            afterwards all the particles have the same weight
+        """
+        count = len(self.particles)
+        if 1/np.dot(self.weights, self.weights) < resampleLimit*count:
+            self.particles = self.particles[systematicSample(np.cumsum(self.weights), count, self.rng)]
+            self.weights = np.full(count, 1/count)
+
+    def transit(self, operator, *args):
+        """_summary_
+            Move the belief one step forward: resample if needed, then move every particle with the step method of the operator
+        Args:
+            operator (PreyModel, PredatorModel or PredatorSampler): The movement model of the tracked creature
+            *args: Extra arguments of the operator, the agent position for the Predator
+
+        Returns: The updated belief
+            _type_: ParticleBelief
+        """
+        self.resample()
+        self.particles = operator.step(self.particles, *args, rng=self.rng)
+        self.maxNodes = self.scanMax()
+        return self
+
+    def mix(self, other, weight):
+        """_summary_
+            Weighted mix of two particle beliefs, see Belief.mix. Copies of the same belief share their particles, so their weights
+            are mixed, otherwise both particle sets are mixed and resampled to the number of particles of this belief
+        Args:
+            other (ParticleBelief): The second belief
+            weight (float): Weight of this belief
+
+        Returns: The mixed belief
+            _type_: ParticleBelief
+        """
+        if other.particles is self.particles:
+            return ParticleBelief.fromParticles(self.size, self.particles, self.weights*weight + other.weights*(1-weight), self.rng)
+        particles = np.concatenate([self.particles, other.particles])
+        weights = np.concatenate([self.weights*weight, other.weights*(1-weight)])
+        keep = systematicSample(np.cumsum(weights), len(self.particles), self.rng)
+        return ParticleBelief.fromParticles(self.size, particles[keep], rng=self.rng)
+
+    def copy(self):
+        """_summary_
+            Independent copy of the belief, the weights are copied and the particles shared
+        Returns: The copy
+            _type_: ParticleBelief
+        """
+        # Particle arrays are replaced on every move, never written to, so they can be shared
+        other = ParticleBelief.fromParticles(self.size, self.particles, self.weights, self.rng)
+        other.maxNodes = self.maxNodes
+        return other
+
+    def copyInto(self, other):
+        """_summary_
+            Overwrite another particle belief with the same number of particles without allocating
+        Args:
+            other (ParticleBelief): The belief to overwrite
+
+        Returns: The overwritten belief
+            _type_: ParticleBelief
+        """
+        np.copyto(other.weights, self.weights)
+        other.particles, other.maxNodes = self.particles, self.maxNodes
+        return other
+
+def systematicSample(cdf, count, rng=None):
+    """_summary_
+        Systematic sampling: count evenly spaced points with one shared random offset are looked up in the cumulative weights,
+        so every index is picked a number of times within one of its expected count
+    Args:
+        cdf (np.ndarray): Cumulative sum of the weights
+        count (int): Number of samples
+        rng (np.random.Generator, optional): Generator of the offset, the numpy global random state is used when None
+
+    Returns: The sampled indices
+        _type_: np.ndarray
+    """
+    offset = np.random.rand() if rng is None else rng.random()
+    points = (offset + np.arange(count))*(cdf[-1]/count)
+    return np.minimum(np.searchsorted(cdf, points, side="right"), len(cdf)-1)
+
+def beliefClass(size, sparse=False):
+    """_summary_
+        Belief representation to use on a graph. Small graphs keep the normalized Belief, where the O(N) updates are cheaper than
+        the bookkeeping of LazyBelief, bigger graphs use LazyBelief and graphs of particleLimit nodes or more use ParticleBelief
+    Args:
+        size (int): Number of nodes in the graph
+        sparse (bool, optional): The belief starts from a known position, like the Predator belief, so SparseBelief is used below particleLimit
+
+    Returns: The class to build the beliefs with
+        _type_: type
+    """
+    if size >= particleLimit:
+        return ParticleBelief
+    if sparse:
+        return SparseBelief
+    return LazyBelief if size > lazyLimit else Belief
+
+def surveyTransit(belief, node, found, sensor, operator, *args):
+    """_summary_
+        Survey of node followed by one step of the operator as a single pass over the belief. Only the probability of the surveyed node
+        is changed before the move, the renormalization of the survey is a common factor that the operator applies while it writes the
+        moved belief into the spare buffer. Beliefs other than Belief, sensors other than ObservationModel and surveys that collapse
+        the belief use the separate updates
+    Args:
+        belief (Belief): The belief to update
+        node (int): The surveyed node
+        found (bool): The report of the sensor
+        sensor (ObservationModel): Sensor that made the report
+        operator (PreyModel or PredatorModel): Movement model of the tracked creature
+        *args: Extra arguments of the operator, the agent position for the PredatorModel
+
+    Returns: The updated belief
+        _type_: Belief
+    """
+    if type(belief) is not Belief or type(sensor) is not ObservationModel:
+        return sensor.update(belief, node, found).transit(operator, *args)
+    onNode, offNode = sensor.likelihood(found)
+    values = belief.values
+    prob = values[node]
+    if offNode == 0 or prob == 1:
+        return belief.survey(node, True).transit(operator, *args)
+    ratio = onNode/offNode
+    values[node] = ratio*prob
+    if belief.spare is None:
+        belief.spare = np.empty_like(values)
+    operator.transit(values, *args, out=belief.spare, scale=1/(1-prob+(ratio*prob)))
+    belief.values, belief.spare = belief.spare, values
+    belief.maxNodes = belief.scanMax()
+    return belief
+
+def surveyAndTransit(preyBelief, predBelief, agentPos, preyFound, predFound, preyModel, predatorModel, preySensor=perfectSensor, predSensor=perfectSensor):
+    """_summary_
+        One step of belief updates of the agents that track both creatures: survey the new position of the agent for the Prey and the
+        Predator with the reports of the sensors, then move both beliefs one step. Each belief is updated with surveyTransit, so the
+        survey costs no pass of its own and the moves are written into the spare buffers without temporary beliefs
+    Args:
+        preyBelief (Belief): Belief over the Prey position
+        predBelief (Belief): Belief over the Predator position
+        agentPos (int): The new location of the agent, the surveyed node and the target of the Predator
+        preyFound (bool): Whether the survey reported the Prey
+        predFound (bool): Whether the survey reported the Predator
+        preyModel (PreyModel): Movement model of the Prey
+        predatorModel (PredatorModel): Movement model of the Predator
+        preySensor (ObservationModel, optional): Sensor that made the Prey report
+        predSensor (ObservationModel, optional): Sensor that made the Predator report
+
+    Returns: The updated Prey and Predator beliefs, the given ones unless a sensor returns new beliefs
+        _type_: tuple
+    """
+    preyBelief = surveyTransit(preyBelief, agentPos, preyFound, preySensor, preyModel)
+    predBelief = surveyTransit(predBelief, agentPos, predFound, predSensor, predatorModel, agentPos)
+    return preyBelief, predBelief
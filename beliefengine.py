@@ -0,0 +1,248 @@
+# Imports
+import numpy as np
+from observation import perfectSensor
+from policytables import decisionTable
+
+class BeliefBatch:
+    """_summary_
+        Beliefs of many episodes played on the same graph, one row of the values matrix per episode. Surveys are masked row operations,
+        the Prey transit is one product with the shared PreyModel and the Predator transit one product per agent position, so updating
+        all the episodes costs a few NumPy calls instead of one Python update per episode
+    Args:
+        graph (Graph): The array backed graph all the episodes are played on
+        values (np.ndarray): Initial belief of every episode, copied
+    """
+    def __init__(self, graph, values):
+        self.graph = graph
+        self.values = np.array(values, dtype=np.float64)
+
+    @classmethod
+    def uniform(cls, graph, exclude):
+        """_summary_
+            Beliefs of the Prey at the start of every episode: 0 on the node of the agent and 1/(size-1) on every other node
+        Args:
+            graph (Graph): The array backed graph
+            exclude (np.ndarray): Location of the agent of every episode
+
+        Returns: The initial beliefs
+            _type_: BeliefBatch
+        """
+        values = np.full((len(exclude), graph.size), 1/(graph.size-1))
+        values[np.arange(len(exclude)), exclude] = 0
+        return cls(graph, values)
+
+    @classmethod
+    def oneHot(cls, graph, nodes):
+        """_summary_
+            Beliefs of known positions, probability 1 on the node of every episode
+        Args:
+            graph (Graph): The array backed graph
+            nodes (np.ndarray): The known position of every episode
+
+        Returns: The beliefs
+            _type_: BeliefBatch
+        """
+        values = np.zeros((len(nodes), graph.size))
+        values[np.arange(len(nodes)), nodes] = 1
+        return cls(graph, values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def copy(self):
+        """_summary_
+            Independent copy of the beliefs
+        Returns: The copy
+            _type_: BeliefBatch
+        """
+        return BeliefBatch(self.graph, self.values)
+
+    def keep(self, rows):
+        """_summary_
+            Drop the episodes that are over, only the given rows are kept (in that order)
+        Args:
+            rows (np.ndarray): Index or mask of the rows to keep
+        """
+        self.values = self.values[rows]
+
+    def survey(self, nodes, found, falseNegative=0.0):
+        """_summary_
+            Update every belief after surveying one node per episode, the same update as Belief.survey applied to all the rows:
+            rows that found the target (or were certain of it) collapse on the node, the others remove its probability and renormalize
+        Args:
+            nodes (np.ndarray): The surveyed node of every episode
+            found (np.ndarray): Whether the survey of every episode found the target
+            falseNegative (float or np.ndarray, optional): Probability that the survey misses a target that is on the node, or the
+                likelihood ratio of the report of every episode (see ObservationModel.updateBatch)
+
+        Returns: The updated beliefs
+            _type_: BeliefBatch
+        """
+        rows = np.arange(len(self.values))
+        prob = self.values[rows, nodes]
+        collapse = found | (prob == 1)
+        self.values[collapse] = 0
+        self.values[rows[collapse], nodes[collapse]] = 1
+        failed = ~collapse
+        ratio = np.broadcast_to(falseNegative, prob.shape)[failed]
+        self.values[rows[failed], nodes[failed]] = ratio*prob[failed]
+        self.values[failed] /= (1-prob[failed]+(ratio*prob[failed]))[:, None]
+        return self
+
+    def transitPrey(self):
+        """_summary_
+            Move every belief one Prey step forward
+        Returns: The updated beliefs
+            _type_: BeliefBatch
+        """
+        self.values = self.graph.preyModel().transitBatch(self.values)
+        return self
+
+    def transitPredator(self, agentPos, distraction=0.0):
+        """_summary_
+            Move every belief one Predator step forward, the Predator of each episode chasing the agent of that episode
+        Args:
+            agentPos (np.ndarray): The location of the agent of every episode
+            distraction (float, optional): Probability of a random move instead of a chasing move
+
+        Returns: The updated beliefs
+            _type_: BeliefBatch
+        """
+        self.values = self.graph.predatorModel(distraction).transitBatch(self.values, agentPos)
+        return self
+
+    def maxProb(self):
+        """_summary_
+            Highest probability of every belief
+        Returns: The highest probability of every episode
+            _type_: np.ndarray
+        """
+        return self.values.max(axis=1)
+
+    def maxNode(self, rng):
+        """_summary_
+            Node of the highest probability of every belief, ties broken uniformly like Belief.maxNode
+        Args:
+            rng (np.random.Generator): Generator used for the tie breaks
+
+        Returns: The chosen node of every episode
+            _type_: np.ndarray
+        """
+        ties = self.values == self.values.max(axis=1, keepdims=True)
+        pick = (rng.random(len(ties))*ties.sum(axis=1)).astype(np.int64)
+        # Column of the pick-th tied node of every row
+        return np.argmax(np.cumsum(ties, axis=1) > pick[:, None], axis=1)
+
+def ruleMoveBatch(graph, table, agentPos, predatorPos, preyPos, rng):
+    """_summary_
+        Draw the next agent position of many episodes from a compiled decision table, like compiledMove for every episode
+    Args:
+        graph (Graph): The array backed graph
+        table (np.ndarray): Move weights indexed [agentPos, predatorPos, preyPos]
+        agentPos (np.ndarray): The location of every agent
+        predatorPos (np.ndarray): The predator position every agent decides with
+        preyPos (np.ndarray): The prey position every agent decides with
+        rng (np.random.Generator): Generator used for the draws
+
+    Returns: The next position of every agent
+        _type_: np.ndarray
+    """
+    weights = np.cumsum(table[agentPos, predatorPos, preyPos], axis=1)
+    draw = rng.random(len(agentPos))*weights[:, -1]
+    k = (weights <= draw[:, None]).sum(axis=1)
+    # Unused slots have no weight and the last slot is staying on the same node
+    options = np.concatenate([graph.paddedNeighbours()[agentPos], agentPos[:, None]], axis=1)
+    return options[np.arange(len(agentPos)), k]
+
+# Which beliefs every partial information agent keeps and the distraction of the Predator it plays against
+batchAgents = {
+    "agent3": {"prey": True, "predator": False, "distraction": 0.0},
+    "agent5": {"prey": False, "predator": True, "distraction": 0.4},
+    "agent7": {"prey": True, "predator": True, "distraction": 0.4},
+}
+
+def runBatch(graph, spawns, agent="agent3", threshold=1000, seed=None, sensor=perfectSensor):
+    """_summary_
+        Play many episodes of Agent 3, 5 or 7 on one graph at once. Every step applies the survey, move and transit of the agent
+        to all the running episodes with array operations, finished episodes are dropped from the arrays. The decision rule is the
+        compiled rule of Agent 1 applied to the most likely positions, like the agents do
+    Args:
+        graph (Graph): The array backed graph
+        spawns (np.ndarray): One row of predator, agent and prey location per episode
+        agent (str, optional): The partial information agent to play, a key of batchAgents
+        threshold (int, optional): Number of steps after which an episode ends with status 404
+        seed (int, optional): Seed of the generator used for every draw
+        sensor (ObservationModel, optional): Sensor of the surveys, so the same agent can be played with any error rates
+
+    Returns: Status code, steps and the number of surveys that reported the Prey (preyCaught) and the Predator (predCaught) of every episode
+        _type_: dictionary
+    """
+    config = batchAgents[agent]
+    rng = np.random.default_rng(seed)
+    table = decisionTable(graph.nodes, "agent1")
+    preyModel, predatorModel = graph.preyModel(), graph.predatorModel(config["distraction"])
+    spawns = np.asarray(spawns)
+    count = len(spawns)
+    result = {"statusCode": np.full(count, 404), "steps": np.full(count, threshold), "preyCaught": np.zeros(count, dtype=np.int64), "predCaught": np.zeros(count, dtype=np.int64)}
+    episode = np.arange(count)
+    predatorPos, agentPos, preyPos = (spawns[:, i].astype(np.int64) for i in range(3))
+    preyBelief = BeliefBatch.uniform(graph, agentPos) if config["prey"] else None
+    predBelief = BeliefBatch.oneHot(graph, predatorPos) if config["predator"] else None
+
+    def finish(done, status, counter):
+        nonlocal episode, predatorPos, agentPos, preyPos
+        result["statusCode"][episode[done]] = status
+        result["steps"][episode[done]] = counter
+        keep = ~done
+        episode, predatorPos, agentPos, preyPos = episode[keep], predatorPos[keep], agentPos[keep], preyPos[keep]
+        for belief in (preyBelief, predBelief):
+            if belief is not None:
+                belief.keep(keep)
+
+    def surveyBoth(nodes):
+        # Like the agents, decide with surveyed copies of the beliefs. Only a successful Prey survey is kept, the agents apply it in place
+        preySeen, predSeen = preyBelief, predBelief
+        if preyBelief is not None:
+            found = sensor.reportBatch(nodes, preyPos, rng)
+            result["preyCaught"][episode] += found
+            preySeen = sensor.updateBatch(preyBelief.copy(), nodes, found)
+            preyBelief.values[found] = preySeen.values[found]
+        if predBelief is not None:
+            found = sensor.reportBatch(nodes, predatorPos, rng)
+            result["predCaught"][episode] += found
+            predSeen = sensor.updateBatch(predBelief.copy(), nodes, found)
+        return preySeen, predSeen
+
+    for counter in range(1, threshold+1):
+        finish(agentPos == preyPos, 200, counter)
+        finish(agentPos == predatorPos, 400, counter)
+        if len(episode) == 0:
+            break
+        # Survey the most likely position, Agent 7 looks for the Predator until it is fairly sure where it is
+        if predBelief is None:
+            preySeen, predSeen = surveyBoth(preyBelief.maxNode(rng))
+        elif preyBelief is None:
+            preySeen, predSeen = surveyBoth(predBelief.maxNode(rng))
+        else:
+            preySeen, predSeen = surveyBoth(np.where(predBelief.maxProb() < 0.5, predBelief.maxNode(rng), preyBelief.maxNode(rng)))
+        maybePred = predatorPos if predSeen is None else predSeen.maxNode(rng)
+        maybePrey = preyPos if preySeen is None else preySeen.maxNode(rng)
+        agentPos = ruleMoveBatch(graph, table, agentPos, maybePred, maybePrey, rng)
+        # The agent learns what is on the node it moved to
+        if preyBelief is not None:
+            sensor.updateBatch(preyBelief, agentPos, sensor.reportBatch(agentPos, preyPos, rng))
+        if predBelief is not None:
+            sensor.updateBatch(predBelief, agentPos, sensor.reportBatch(agentPos, predatorPos, rng))
+        finish(agentPos == preyPos, 200, counter)
+        preyPos = preyModel.step(preyPos, rng)
+        if preyBelief is not None:
+            preyBelief.transitPrey()
+        finish(agentPos == preyPos, 200, counter)
+        nextPos = predatorModel.moveBatch(predatorPos, agentPos, rng)
+        # A Predator that stays has reached the agent
+        stays = nextPos == predatorPos
+        predatorPos = nextPos
+        finish(stays, 400, counter)
+        if predBelief is not None:
+            predBelief.transitPredator(agentPos, config["distraction"])
+    return result
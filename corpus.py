@@ -0,0 +1,240 @@
+# Imports
+import json
+import os
+import numpy as np
+from genenvironment import Graph, ringGraph, maxTableSize, predatorTableSize, size
+from predatormodel import PredatorModel
+
+def genChordsBatch(count, size, variation, rng):
+    """_summary_
+        Pick the extra edges of many environments at once. Every graph walks its own random permutation of the nodes like genChords,
+        the graphs are independent so step t of the walk is done for all of them together with array operations
+    Args:
+        count (int): Number of graphs
+        size (int): Number of nodes on the primary loop
+        variation (int): How many steps forward or backward along the loop a chord may reach
+        rng (np.random.Generator): Generator used for the orders of the nodes and the choice of the partners
+
+    Returns: For every graph and node the node it is connected to by the extra edge, -1 if it got none
+        _type_: np.ndarray
+    """
+    orders = rng.permuted(np.tile(np.arange(size), (count, 1)), axis=1)
+    draws = rng.random((count, size))
+    chords = np.full((count, size), -1, dtype=np.int32)
+    removed = np.zeros((count, size), dtype=bool)
+    # The node itself and its two loop neighbours can never be picked
+    offsets = np.array([j for j in range(-variation, variation+1) if j not in (-1, 0, 1)], dtype=np.int64)
+    rows = np.arange(count)
+    for step in range(size):
+        i = orders[:, step]
+        active = ~removed[rows, i]
+        removed[rows, i] = True
+        neighList = (i[:, None] + offsets[None, :]) % size
+        valid = (chords[rows[:, None], neighList] < 0) & active[:, None]
+        valid &= (neighList != i[:, None]) & (neighList != ((i+1) % size)[:, None]) & (neighList != ((i-1) % size)[:, None])
+        counts = valid.sum(axis=1)
+        pick = (draws[rows, i]*counts).astype(np.int64)
+        # Column of the pick-th valid candidate of every graph
+        col = np.argmax(np.cumsum(valid, axis=1) > pick[:, None], axis=1)
+        partner = neighList[rows, col]
+        hit = counts > 0
+        chords[rows[hit], i[hit]] = partner[hit]
+        chords[rows[hit], partner[hit]] = i[hit]
+        removed[rows[hit], partner[hit]] = True
+    return chords
+
+def spawnCreaturesBatch(count, size, rng):
+    """_summary_
+        Spawn the Predator, Agent and Prey for many environments at once with the same rules as spawnCreatures
+    Args:
+        count (int): Number of environments
+        size (int): Number of nodes in every graph
+        rng (np.random.Generator): Generator used for the spawn locations
+
+    Returns: Array with one row of predator, agent and prey location per environment
+        _type_: np.ndarray
+    """
+    agent = rng.integers(size, size=count)
+    predator = rng.integers(size-1, size=count)
+    prey = rng.integers(size-1, size=count)
+    # Check if Predator Spawn is not the same as Agent Spawn
+    predator = np.where(predator >= agent, (predator+1) % size, predator)
+    # Check if Agent Spawn is not the same as Prey Spawn
+    prey = np.where(prey >= agent, (prey+1) % size, prey)
+    return np.stack([predator, agent, prey], axis=1).astype(np.int32)
+
+def predatorArrays(distraction):
+    """_summary_
+        Names of the stored probs and cdf tables of the Predator for one distraction probability
+    Args:
+        distraction (float): Probability of a random move instead of a chasing move
+
+    Returns: The names of the two arrays
+        _type_: tuple of str
+    """
+    return "predatorProbs_%r" % float(distraction), "predatorCdf_%r" % float(distraction)
+
+class GraphCorpus:
+    """_summary_
+        A fixed set of environments and spawn positions generated once per experiment, so every trial of every agent can run on the same graphs.
+        Graphs are kept as their extra edges only and the array backed graph (with its distance tables) is built the first time a trial uses it
+    Args:
+        size (int): Number of nodes in every graph
+        variation (int): How many steps forward or backward along the loop an extra edge may reach
+        chords (np.ndarray): For every graph and node the node it is connected to by the extra edge, -1 if it got none
+        spawns (np.ndarray): One row of predator, agent and prey location per graph
+        seed (int, optional): Seed the corpus was generated from
+        stored (dict, optional): Graph and table arrays of every entry as written by saveCorpus, used instead of rebuilding them
+        distractions (list, optional): Distraction probabilities whose Predator tables are in stored
+    """
+    def __init__(self, size, variation, chords, spawns, seed=None, stored=None, distractions=()):
+        self.size = size
+        self.variation = variation
+        self.chords = chords
+        self.spawns = spawns
+        self.seed = seed
+        self.stored = stored if stored is not None else dict()
+        self.distractions = list(distractions)
+        self._graphs = dict()
+
+    def __len__(self):
+        return self.chords.shape[0]
+
+    def graph(self, trial):
+        """_summary_
+            The array backed graph of one corpus entry, built on first use
+        Args:
+            trial (int): Index of the corpus entry
+
+        Returns: The graph of that entry
+            _type_: Graph
+        """
+        graph = self._graphs.get(trial)
+        if graph is None:
+            if "indptr" in self.stored:
+                # Views into the stored arrays, nothing is copied or recomputed
+                edgeOffsets = self.stored["edgeOffsets"]
+                graph = Graph(self.stored["indptr"][trial], self.stored["indices"][edgeOffsets[trial]:edgeOffsets[trial+1]])
+            else:
+                graph = ringGraph(self.size, self.chords[trial].astype(np.int64))
+            if "dist" in self.stored:
+                graph.attachDistanceTable(self.stored["dist"][trial], self.stored["hops"][trial], self.stored["hopCount"][trial])
+            elif self.size <= maxTableSize:
+                graph.distanceTable()
+            for distraction in self.distractions:
+                probs, cdf = predatorArrays(distraction)
+                graph.attachPredatorModel(distraction, self.stored[probs][trial], self.stored[cdf][trial])
+            self._graphs[trial] = graph
+        return graph
+
+    def trial(self, trial):
+        """_summary_
+            Everything an agent driver needs to run one corpus entry
+        Args:
+            trial (int): Index of the corpus entry
+
+        Returns: The nodes of the graph, its size and the spawn location of predator, agent and prey
+            _type_: tuple
+        """
+        predatorPos, agentPos, preyPos = self.spawns[trial].tolist()
+        return self.graph(trial).nodes, self.size, predatorPos, agentPos, preyPos
+
+def generateCorpus(count, size=size, variation=5, seed=None):
+    """_summary_
+        Generate count graphs and their spawn positions from a single seed
+    Args:
+        count (int): Number of environments
+        size (int, optional): Number of nodes in every graph
+        variation (int, optional): How many steps forward or backward along the loop an extra edge may reach
+        seed (int, optional): Seed to reproduce the same corpus, a fresh one is used when None
+
+    Returns: The generated corpus
+        _type_: GraphCorpus
+    """
+    rng = np.random.default_rng(seed)
+    chords = genChordsBatch(count, size, variation, rng)
+    spawns = spawnCreaturesBatch(count, size, rng)
+    return GraphCorpus(size, variation, chords, spawns, seed)
+
+def saveCorpus(corpus, path, tables=None, distractions=(0.0, 0.4)):
+    """_summary_
+        Write a corpus to a directory of .npy files plus an index.json describing them. Every array holds all the entries
+        stacked along the first axis so worker processes can open it with np.load(mmap_mode="r") and share the pages.
+        The arrays are written through memory maps one entry at a time so the corpus never has to fit in memory
+    Args:
+        corpus (GraphCorpus): The corpus to store
+        path (str): Directory to write to, created if needed
+        tables (bool, optional): Also store the distance and next hop tables of every graph. By default only done when size <= maxTableSize
+        distractions (tuple, optional): Distraction probabilities whose Predator probs and cdf tables are stored with the distance
+            tables. Only done when size <= predatorTableSize, larger graphs use the PredatorSampler
+    """
+    os.makedirs(path, exist_ok=True)
+    count, n = len(corpus), corpus.size
+    if tables is None:
+        tables = n <= maxTableSize
+    distractions = [float(distraction) for distraction in distractions] if tables and n <= predatorTableSize else []
+    np.save(os.path.join(path, "chords.npy"), np.asarray(corpus.chords))
+    np.save(os.path.join(path, "spawns.npy"), np.asarray(corpus.spawns))
+    degree = 2 + (np.asarray(corpus.chords) >= 0)
+    maxDegree = int(degree.max()) if count > 0 else 0
+    edgeOffsets = np.zeros(count+1, dtype=np.int64)
+    np.cumsum(degree.sum(axis=1), out=edgeOffsets[1:])
+    np.save(os.path.join(path, "edgeOffsets.npy"), edgeOffsets)
+    def openArray(name, shape, dtype):
+        return np.lib.format.open_memmap(os.path.join(path, name + ".npy"), mode="w+", dtype=dtype, shape=shape)
+    indptr = openArray("indptr", (count, n+1), np.int64)
+    indices = openArray("indices", (int(edgeOffsets[-1]),), np.int32)
+    arrays = ["chords", "spawns", "edgeOffsets", "indptr", "indices"]
+    if tables:
+        dist = openArray("dist", (count, n, n), np.int32)
+        hops = openArray("hops", (count, n, n, maxDegree), np.int32)
+        hopCount = openArray("hopCount", (count, n, n), np.int8)
+        arrays += ["dist", "hops", "hopCount"]
+    predators = dict()
+    for distraction in distractions:
+        names = predatorArrays(distraction)
+        predators[distraction] = [openArray(name, (count, n, n, maxDegree+1), np.float64) for name in names]
+        arrays += list(names)
+    for trial in range(count):
+        graph = ringGraph(n, np.asarray(corpus.chords[trial]).astype(np.int64))
+        indptr[trial] = graph.indptr
+        indices[edgeOffsets[trial]:edgeOffsets[trial+1]] = graph.indices
+        if tables:
+            table = graph.distanceTable()
+            dist[trial] = table.dist
+            hops[trial] = -1
+            hops[trial, :, :, :table.hops.shape[2]] = table.hops
+            hopCount[trial] = table.hopCount
+        for distraction, (probs, cdf) in predators.items():
+            model = PredatorModel(graph, distraction)
+            width = model.probs.shape[2] - 1
+            # Graphs of a smaller degree get zero probability slots before their staying move, where the cdf stays flat
+            probs[trial] = 0
+            probs[trial, :, :, :width] = model.probs[:, :, :-1]
+            probs[trial, :, :, -1] = model.probs[:, :, -1]
+            cdf[trial, :, :, :width] = model.cdf[:, :, :-1]
+            cdf[trial, :, :, width:-1] = model.cdf[:, :, width-1:width] if width > 0 else 0
+            cdf[trial, :, :, -1] = model.cdf[:, :, -1]
+    for array in [indptr, indices] + ([dist, hops, hopCount] if tables else []) + [table for pair in predators.values() for table in pair]:
+        array.flush()
+    # Only plain integer seeds can be written to the index
+    seed = int(corpus.seed) if isinstance(corpus.seed, (int, np.integer)) else None
+    index = {"count": count, "size": n, "variation": corpus.variation, "seed": seed, "arrays": arrays, "distractions": distractions}
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump(index, f, indent=4)
+
+def loadCorpus(path, mmapMode="r"):
+    """_summary_
+        Open a corpus written by saveCorpus. With the default read only memory mapping nothing is read until an entry is used
+        and the stored graphs and tables are used as they are, so no precomputation is repeated
+    Args:
+        path (str): Directory written by saveCorpus
+        mmapMode (str, optional): Passed to np.load as mmap_mode, None reads every array into memory
+
+    Returns: The stored corpus
+        _type_: GraphCorpus
+    """
+    with open(os.path.join(path, "index.json")) as f:
+        index = json.load(f)
+    stored = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmapMode) for name in index["arrays"]}
+    return GraphCorpus(index["size"], index["variation"], stored["chords"], stored["spawns"], index["seed"], stored, index.get("distractions", []))
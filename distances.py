@@ -0,0 +1,555 @@
+# Imports
+import numpy as np
+import random
+from collections import OrderedDict, deque
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import shortest_path
+
+def allPairsDistances(graph, block=512):
+    """_summary_
+        Breadth First Search from every node over the CSR arrays, run in compiled code by scipy's csgraph. The sources are
+        searched in blocks so that only block x size floats are held besides the int32 result
+    Args:
+        graph (Graph): The array backed graph
+        block (int, optional): Number of sources searched at once
+
+    Returns: Matrix where entry [s][t] is the number of edges on a shortest path from s to t (-1 if t cannot be reached)
+        _type_: np.ndarray
+    """
+    size = graph.size
+    adjacency = csr_matrix((np.ones(len(graph.indices), dtype=np.int8), graph.indices, graph.indptr), shape=(size, size))
+    dist = np.empty((size, size), dtype=np.int32)
+    for first in range(0, size, block):
+        rows = shortest_path(adjacency, method="D", unweighted=True, indices=np.arange(first, min(first+block, size)))
+        rows[np.isinf(rows)] = -1
+        dist[first:first+block] = rows
+    return dist
+
+def expandFrontier(graph, frontier):
+    """_summary_
+        Gather every edge leaving the frontier nodes from the CSR arrays in one vectorized step
+    Args:
+        graph (Graph): The array backed graph
+        frontier (np.ndarray): Nodes of the current Breadth First Search level
+
+    Returns: The source and the target node of every edge leaving the frontier
+        _type_: tuple of np.ndarray
+    """
+    counts = graph.degree[frontier]
+    offsets = np.repeat(graph.indptr[frontier] - np.cumsum(counts) + counts, counts)
+    edges = offsets + np.arange(offsets.shape[0])
+    return np.repeat(frontier, counts), graph.indices[edges]
+
+def bfsDistances(graph, source):
+    """_summary_
+        Distance field of a single source, i.e. the number of edges on a shortest path from source to every node.
+        The rings have a frontier of only a few nodes per level, so a plain queue over the CSR lists beats level by level array operations
+    Args:
+        graph (Graph): The array backed graph
+        source (int): The start node of the search
+
+    Returns: The distance of every node, -1 for the nodes that cannot be reached
+        _type_: np.ndarray
+    """
+    indptr = graph.indptr.tolist()
+    indices = graph.indices.tolist()
+    dist = [-1]*graph.size
+    dist[source] = 0
+    queue = deque([source])
+    while queue:
+        x = queue.popleft()
+        level = dist[x] + 1
+        for i in range(indptr[x], indptr[x+1]):
+            childX = indices[i]
+            if dist[childX] < 0:
+                dist[childX] = level
+                queue.append(childX)
+    return np.array(dist, dtype=np.int32)
+
+class ShortestPathDAG:
+    """_summary_
+        Single source shortest path engine. Instead of copying a path list for every enqueued node, the Breadth First Search
+        only keeps the distance of every node, the number of shortest paths reaching it (sigma) and the predecessor DAG,
+        i.e. for every node the neighbours one level closer to the source. Distances, next hops and uniformly random
+        shortest paths are then answered from these arrays without enumerating any path
+    Args:
+        graph (Graph): The array backed graph
+        source (int): The start node of the search
+        goal (int, optional): When given the search stops as soon as the level of the goal is complete
+    """
+    def __init__(self, graph, source, goal=None):
+        self.graph = graph
+        self.source = source
+        self.dist = np.full(graph.size, -1, dtype=np.int32)
+        self.sigma = np.zeros(graph.size, dtype=np.float64)
+        self.dist[source] = 0
+        self.sigma[source] = 1
+        frontier = np.array([source], dtype=np.int64)
+        levels = []
+        level = 0
+        while frontier.shape[0] > 0 and (goal is None or self.dist[goal] < 0):
+            sources, targets = expandFrontier(graph, frontier)
+            fresh = targets[self.dist[targets] < 0]
+            self.dist[fresh] = level + 1
+            # Every edge into the next level is a DAG edge and carries all the shortest paths of its source
+            onLevel = self.dist[targets] == level + 1
+            np.add.at(self.sigma, targets[onLevel], self.sigma[sources[onLevel]])
+            frontier = np.unique(fresh)
+            levels.append(frontier)
+            level += 1
+        # Predecessor DAG in CSR form, an edge v -> u is kept when u is one level closer to the source. Only the edges of the
+        # visited levels are gathered, so a search that stopped early at the goal does not go over the whole graph
+        visited = np.sort(np.concatenate(levels)) if levels else np.zeros(0, dtype=np.int64)
+        rows, targets = expandFrontier(graph, visited)
+        keep = self.dist[targets] == self.dist[rows] - 1
+        self.predIndptr = np.zeros(graph.size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows[keep], minlength=graph.size), out=self.predIndptr[1:])
+        self.predIndices = targets[keep]
+
+    def distance(self, goal):
+        """_summary_
+            Number of edges on a shortest path from the source to goal
+        Args:
+            goal (int): The goal node
+
+        Returns: The distance, -1 if the goal was not reached
+            _type_: int
+        """
+        return int(self.dist[goal])
+
+    def pathCount(self, goal):
+        """_summary_
+            Number of distinct shortest paths from the source to goal
+        Args:
+            goal (int): The goal node
+
+        Returns: The number of shortest paths
+            _type_: float
+        """
+        return float(self.sigma[goal])
+
+    def predecessors(self, node):
+        """_summary_
+            Neighbours of node that are one step closer to the source
+        Args:
+            node (int): The node to look up
+
+        Returns: The predecessors of the node in the shortest path DAG
+            _type_: np.ndarray
+        """
+        return self.predIndices[self.predIndptr[node]:self.predIndptr[node+1]]
+
+    def samplePath(self, goal, rng=None):
+        """_summary_
+            Draw one shortest path uniformly at random among all the shortest paths from the source to goal.
+            Walking back from the goal, a predecessor is picked with probability proportional to its own path count
+        Args:
+            goal (int): The goal node
+            rng (np.random.Generator, optional): Generator used for the draws, the random module is used when None
+
+        Returns: The path from the source to the goal, empty if the goal was not reached
+            _type_: list
+        """
+        if self.dist[goal] < 0:
+            return []
+        path = [goal]
+        node = goal
+        while node != self.source:
+            preds = self.predecessors(node)
+            if preds.shape[0] == 1:
+                node = int(preds[0])
+            else:
+                weights = np.cumsum(self.sigma[preds])
+                draw = (random.random() if rng is None else rng.random())*weights[-1]
+                node = int(preds[np.searchsorted(weights, draw, side="right")])
+            path.append(node)
+        path.reverse()
+        return path
+
+    def nextHop(self, goal, rng=None):
+        """_summary_
+            Second node of a uniformly random shortest path from the source to goal
+        Args:
+            goal (int): The goal node
+            rng (np.random.Generator, optional): Generator used for the draws, the random module is used when None
+
+        Returns: The node to move to, the source itself when it is the goal or the goal was not reached
+            _type_: int
+        """
+        path = self.samplePath(goal, rng)
+        return path[1] if len(path) > 1 else self.source
+
+def pickWeighted(items, weights, rng=None):
+    """_summary_
+        Pick one item with probability proportional to its weight
+    Args:
+        items (list): The items to choose from
+        weights (list): Non negative weight of every item
+        rng (np.random.Generator, optional): Generator used for the draw, the random module is used when None
+
+    Returns: The chosen item
+        _type_: any
+    """
+    if len(items) == 1:
+        return items[0]
+    total = sum(weights)
+    draw = random.random() if rng is None else rng.random()
+    for item, weight in zip(items, weights):
+        # Path counts can be huge integers, dividing by the total first keeps them out of float range
+        draw -= weight/total
+        if draw < 0:
+            return item
+    return items[-1]
+
+def bidirectionalSearch(graph, start, goal, rng=None):
+    """_summary_
+        Point to point shortest path search growing one Breadth First Search level at a time from both ends, always the side with the
+        smaller frontier, and stopping as soon as the two searches meet. Both sides count their shortest paths, so a path can be drawn
+        uniformly: the meeting node m is picked with probability proportional to sigmaStart[m]*sigmaGoal[m] and each half is then walked
+        back through the predecessors weighted by their own path counts
+    Args:
+        graph (Graph): The array backed graph
+        start (int): The start node
+        goal (int): The goal node
+        rng (np.random.Generator, optional): Generator used for the draws, the random module is used when None
+
+    Returns: The distance between the two nodes and a uniformly random shortest path from start to goal, (-1, []) if goal cannot be reached
+        _type_: tuple
+    """
+    if start == goal:
+        return 0, [start]
+    indptr, indices = graph.indptr, graph.indices
+    dist = [{start: 0}, {goal: 0}]
+    sigma = [{start: 1}, {goal: 1}]
+    frontier = [[start], [goal]]
+    meeting = list()
+    while len(meeting) == 0 and len(frontier[0]) > 0 and len(frontier[1]) > 0:
+        side = 0 if len(frontier[0]) <= len(frontier[1]) else 1
+        ownDist, ownSigma, otherDist = dist[side], sigma[side], dist[1-side]
+        nextFrontier = list()
+        for x in frontier[side]:
+            level = ownDist[x] + 1
+            for childX in indices[indptr[x]:indptr[x+1]].tolist():
+                if childX not in ownDist:
+                    ownDist[childX] = level
+                    ownSigma[childX] = 0
+                    nextFrontier.append(childX)
+                if ownDist[childX] == level:
+                    ownSigma[childX] += ownSigma[x]
+        frontier[side] = nextFrontier
+        meeting = [x for x in nextFrontier if x in otherDist]
+    if len(meeting) == 0:
+        return -1, []
+    distance = min(dist[0][x] + dist[1][x] for x in meeting)
+    # Every shortest path crosses the last expanded level exactly once
+    meeting = [x for x in meeting if dist[0][x] + dist[1][x] == distance]
+    middle = pickWeighted(meeting, [sigma[0][x]*sigma[1][x] for x in meeting], rng)
+    halves = list()
+    for side in (0, 1):
+        half = [middle]
+        node = middle
+        while dist[side][node] > 0:
+            preds = [p for p in indices[indptr[node]:indptr[node+1]].tolist() if dist[side].get(p, -1) == dist[side][node] - 1]
+            node = pickWeighted(preds, [sigma[side][p] for p in preds], rng)
+            half.append(node)
+        halves.append(half)
+    path = halves[0][::-1] + halves[1][1:]
+    return distance, path
+
+def nextHopTable(padded, dist, targets=None):
+    """_summary_
+        For every node u and target t the neighbours of u with the smallest distance to t, packed first along the last axis
+    Args:
+        padded (np.ndarray): Padded neighbour table of the graph, unused slots are -1
+        dist (np.ndarray): All pairs distance matrix of the graph
+        targets (np.ndarray, optional): Only build the columns of these targets, all of them when None
+
+    Returns: The next hop table of shape size x targets x maxDegree and the number of next hops of every pair
+        _type_: tuple of np.ndarray
+    """
+    columns = dist if targets is None else dist[:, targets]
+    valid = padded >= 0
+    neighbours = np.where(valid, padded, 0)
+    hops = np.full((padded.shape[0], columns.shape[1], padded.shape[1]), -1, dtype=np.int32)
+    hopCount = np.zeros((padded.shape[0], columns.shape[1]), dtype=np.int8)
+    if padded.shape[1] == 0:
+        return hops, hopCount
+    # One size x targets slice per neighbour slot instead of a size x targets x maxDegree candidate array
+    best = np.full(hopCount.shape, np.iinfo(np.int32).max, dtype=np.int32)
+    for k in range(padded.shape[1]):
+        np.minimum(best, columns[neighbours[:, k]], out=best, where=valid[:, k, None])
+    for k in range(padded.shape[1]):
+        hopCount += (columns[neighbours[:, k]] == best) & valid[:, k, None]
+    # The closest neighbours are packed first and the others after them, both in slot order
+    closestBefore = np.zeros(hopCount.shape, dtype=np.int8)
+    for k in range(padded.shape[1]):
+        closest = (columns[neighbours[:, k]] == best) & valid[:, k, None]
+        position = np.where(closest, closestBefore, hopCount + (k - closestBefore))
+        for slot in range(padded.shape[1]):
+            np.copyto(hops[:, :, slot], padded[:, k, None], where=position == slot)
+        closestBefore += closest
+    return hops, hopCount
+
+def nextHopCells(padded, dist, nodes, targets):
+    """_summary_
+        Single cells of nextHopTable: for every pair nodes[i], targets[i] the neighbours of the node with the smallest distance to the
+        target, packed first in the same order as nextHopTable
+    Args:
+        padded (np.ndarray): Padded neighbour table of the graph, unused slots are -1
+        dist (np.ndarray): All pairs distance matrix of the graph
+        nodes (np.ndarray): The node of every cell
+        targets (np.ndarray): The target of every cell
+
+    Returns: The next hops of every cell (one row of maxDegree slots each) and their number
+        _type_: tuple of np.ndarray
+    """
+    neighbours = padded[nodes]
+    valid = neighbours >= 0
+    candidate = np.where(valid, dist[np.where(valid, neighbours, 0), targets[:, None]], np.iinfo(np.int32).max)
+    mask = (candidate == candidate.min(axis=1, initial=np.iinfo(np.int32).max)[:, None]) & valid
+    order = np.argsort(~mask, axis=1, kind="stable")
+    return np.take_along_axis(neighbours, order, axis=1).astype(np.int32), mask.sum(axis=1).astype(np.int8)
+
+class DistanceTable:
+    """_summary_
+        All pairs distance matrix and next hop table of a graph, built once right after the environment is generated.
+        hops[u][t][:hopCount[u][t]] are the neighbours of u that are closest to t, which is exactly the set of neighbours
+        the agents and the predator pick from when they run one BFS per neighbour
+    Args:
+        graph (Graph): The array backed graph
+        dist (np.ndarray, optional): Precomputed distance matrix, e.g. memory mapped from a corpus store. hops and hopCount must be given with it
+        hops (np.ndarray, optional): Precomputed next hop table
+        hopCount (np.ndarray, optional): Precomputed number of next hops
+    """
+    def __init__(self, graph, dist=None, hops=None, hopCount=None):
+        self.graph = graph
+        if dist is not None:
+            # Tables loaded from a corpus store, nothing to compute
+            self.dist, self.hops, self.hopCount = dist, hops, hopCount
+            return
+        self.dist = allPairsDistances(graph)
+        self.hops, self.hopCount = nextHopTable(graph.paddedNeighbours(), self.dist)
+
+    def distance(self, start, goal):
+        """_summary_
+            Number of edges on a shortest path between start and goal
+        Args:
+            start (int): The start node
+            goal (int): The goal node
+
+        Returns: The distance between the two nodes
+            _type_: int
+        """
+        return int(self.dist[start, goal])
+
+    def closestNeighbours(self, node, goal):
+        """_summary_
+            Neighbours of node with the smallest distance to goal. When node is the goal every neighbour is returned
+        Args:
+            node (int): The node whose neighbours are compared
+            goal (int): The target node
+
+        Returns: The neighbours closest to the goal
+            _type_: np.ndarray
+        """
+        return self.hops[node, goal, :self.hopCount[node, goal]]
+
+    def nextHop(self, start, goal, rng=None):
+        """_summary_
+            Pick uniformly at random one of the neighbours of start that lies on a shortest path to goal
+        Args:
+            start (int): The start node
+            goal (int): The goal node
+            rng (np.random.Generator, optional): Generator used for the draw, the random module is used when None
+
+        Returns: The next node to move to, start itself when it is already the goal
+            _type_: int
+        """
+        if start == goal:
+            return start
+        count = int(self.hopCount[start, goal])
+        ind = random.randrange(count) if rng is None else int(rng.integers(count))
+        return int(self.hops[start, goal, ind])
+
+class DistanceOracle:
+    """_summary_
+        Distance queries for graphs too large for an all pairs matrix. Single source distance fields are cached per node in a least
+        recently used cache bounded by maxBytes. The agents keep asking for the distance of several neighbours to the same few targets
+        (predator, prey, most likely node), so fields are keyed by the target and one cached field answers all those queries
+    Args:
+        graph (Graph): The array backed graph
+        maxBytes (int, optional): Memory budget of the cached fields, at least one field is always kept
+    """
+    def __init__(self, graph, maxBytes=256*2**20):
+        self.graph = graph
+        self.maxBytes = maxBytes
+        self.capacity = max(1, maxBytes // (4*max(graph.size, 1)))
+        self.fields = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def field(self, node):
+        """_summary_
+            Distance field of node, computed with a Breadth First Search on a miss and cached
+        Args:
+            node (int): The source of the field
+
+        Returns: The distance of every node to node
+            _type_: np.ndarray
+        """
+        field = self.fields.get(node)
+        if field is not None:
+            self.hits += 1
+            self.fields.move_to_end(node)
+            return field
+        self.misses += 1
+        field = bfsDistances(self.graph, node)
+        self.fields[node] = field
+        if len(self.fields) > self.capacity:
+            self.fields.popitem(last=False)
+            self.evictions += 1
+        return field
+
+    def distance(self, start, goal):
+        """_summary_
+            Number of edges on a shortest path between start and goal. A cached field of start is used when the goal has none
+        Args:
+            start (int): The start node
+            goal (int): The goal node
+
+        Returns: The distance between the two nodes
+            _type_: int
+        """
+        if goal not in self.fields and start in self.fields:
+            return int(self.field(start)[goal])
+        return int(self.field(goal)[start])
+
+    def closestNeighbours(self, node, goal):
+        """_summary_
+            Neighbours of node with the smallest distance to goal, answered from the cached field of goal
+        Args:
+            node (int): The node whose neighbours are compared
+            goal (int): The target node
+
+        Returns: The neighbours closest to the goal
+            _type_: np.ndarray
+        """
+        neighbours = self.graph.neighbours(node)
+        dist = self.field(goal)[neighbours]
+        return neighbours[dist == dist.min()]
+
+    def nextHop(self, start, goal, rng=None):
+        """_summary_
+            Pick uniformly at random one of the neighbours of start that lies on a shortest path to goal
+        Args:
+            start (int): The start node
+            goal (int): The goal node
+            rng (np.random.Generator, optional): Generator used for the draw, the random module is used when None
+
+        Returns: The next node to move to, start itself when it is already the goal
+            _type_: int
+        """
+        if start == goal:
+            return start
+        hops = self.closestNeighbours(start, goal)
+        ind = random.randrange(hops.shape[0]) if rng is None else int(rng.integers(hops.shape[0]))
+        return int(hops[ind])
+
+    def stats(self):
+        """_summary_
+            Counters of the cache
+        Returns: Number of hits, misses and evictions and the number of cached fields
+            _type_: dict
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "cached": len(self.fields)}
+
+class LandmarkIndex:
+    """_summary_
+        Landmark (ALT) distance estimates for huge graphs. The distance fields of a few landmarks spread over the graph are stored and,
+        by the triangle inequality, |d(l,a)-d(l,b)| <= d(a,b) <= d(l,a)+d(l,b) for every landmark l. Comparisons like
+        "is this neighbour closer to the prey than I am" are decided from these O(count) bounds and only fall back to an exact search
+        when the bounds overlap
+    Args:
+        graph (Graph): The array backed graph
+        count (int, optional): Number of landmarks, memory is count*size int32 values
+        seed (int, optional): Seed for the first landmark, the others are picked farthest first
+        oracle (DistanceOracle, optional): Exact fallback, its cached fields keep repeated comparisons against the same target cheap
+    """
+    def __init__(self, graph, count=8, seed=None, oracle=None):
+        self.graph = graph
+        self.oracle = oracle if oracle is not None else DistanceOracle(graph)
+        rng = np.random.default_rng(seed)
+        count = min(count, graph.size)
+        self.landmarks = np.empty(count, dtype=np.int64)
+        self.fields = np.empty((count, graph.size), dtype=np.int32)
+        closest = np.full(graph.size, np.iinfo(np.int32).max, dtype=np.int64)
+        landmark = int(rng.integers(graph.size))
+        for i in range(count):
+            self.landmarks[i] = landmark
+            self.fields[i] = bfsDistances(graph, landmark)
+            # The next landmark is the node farthest from all the landmarks picked so far
+            np.minimum(closest, np.where(self.fields[i] < 0, closest, self.fields[i]), out=closest)
+            landmark = int(np.argmax(closest))
+        self.exactQueries = 0
+
+    def bounds(self, start, goal):
+        """_summary_
+            Lower and upper bound of the distance between start and goal. Only the landmarks that reach both nodes give bounds,
+            a landmark that reaches one of them proves that they are not connected
+        Args:
+            start (int): The start node
+            goal (int): The goal node
+
+        Returns: The lower and the upper bound, both -1 when the nodes are not connected
+            _type_: tuple
+        """
+        a, b = self.fields[:, start], self.fields[:, goal]
+        both = (a >= 0) & (b >= 0)
+        if ((a >= 0) != (b >= 0)).any():
+            return -1, -1
+        if not both.any():
+            return 0, self.graph.size
+        return int(np.abs(a - b)[both].max()), int((a + b)[both].min())
+
+    def distance(self, start, goal):
+        """_summary_
+            Exact distance, taken from the bounds when they agree and from the distance oracle otherwise
+        Args:
+            start (int): The start node
+            goal (int): The goal node
+
+        Returns: The distance between the two nodes
+            _type_: int
+        """
+        lower, upper = self.bounds(start, goal)
+        if lower == upper:
+            return lower
+        self.exactQueries += 1
+        return self.oracle.distance(start, goal)
+
+    def lessThan(self, a, b, c, d, factor=1.0, offset=0):
+        """_summary_
+            Decide whether d(a,b)+offset < factor*(d(c,d)+offset). The agents compare path lengths, i.e. distance+1, so
+            agent8's agentPreyDist < agentPredDist*0.7 is lessThan(agent, prey, agent, predator, 0.7, 1)
+        Args:
+            a (int): Start of the first pair
+            b (int): Goal of the first pair
+            c (int): Start of the second pair
+            d (int): Goal of the second pair
+            factor (float, optional): Multiplier of the second distance
+            offset (int, optional): Added to both distances before comparing
+
+        Returns: The result of the comparison
+            _type_: bool
+        """
+        lowerAB, upperAB = self.bounds(a, b)
+        lowerCD, upperCD = self.bounds(c, d)
+        if upperAB + offset < factor*(lowerCD + offset):
+            return True
+        if lowerAB + offset >= factor*(upperCD + offset):
+            return False
+        # The bounds overlap, settle it exactly
+        distAB = lowerAB if lowerAB == upperAB else self.distance(a, b)
+        distCD = lowerCD if lowerCD == upperCD else self.distance(c, d)
+        return distAB + offset < factor*(distCD + offset)
@@ -0,0 +1,273 @@
+# Imports
+import numpy as np
+from genenvironment import Graph, genEnvironment, graphOf, size
+from distances import nextHopCells
+
+class DynamicGraph(Graph):
+    """_summary_
+        Environment graph whose edges can be added and removed during an episode, e.g. a chord failing every k steps.
+        The all pairs distance and next hop tables are repaired incrementally after every change and only the rows of the
+        sources whose distances can actually change are touched, so agents keep using pathLength, nextHop and closestNeighbours
+    Args:
+        indptr (np.ndarray): Offsets into indices of length size+1
+        indices (np.ndarray): Concatenated neighbour lists of every node
+    """
+    def __init__(self, indptr, indices):
+        super().__init__(indptr, indices)
+        self.adjacency = [self.neighbours(i).tolist() for i in range(self.size)]
+        self.distanceTable()
+
+    @classmethod
+    def fromGraph(cls, graph):
+        """_summary_
+            Make a dynamic copy of a graph
+        Args:
+            graph (Graph): The array backed graph
+
+        Returns: The dynamic graph with the same neighbour lists
+            _type_: DynamicGraph
+        """
+        return cls(graph.indptr.copy(), graph.indices.copy())
+
+    def hasEdge(self, u, v):
+        return v in self.adjacency[u]
+
+    def rebuild(self, changed):
+        """_summary_
+            Rebuild the CSR arrays from the neighbour lists and forget everything cached about the changed nodes
+        Args:
+            changed (tuple): The nodes whose neighbours changed
+        """
+        degree = np.array([len(neighbours) for neighbours in self.adjacency], dtype=np.int64)
+        self.indptr = np.zeros(self.size+1, dtype=np.int64)
+        np.cumsum(degree, out=self.indptr[1:])
+        self.indices = np.array([x for neighbours in self.adjacency for x in neighbours], dtype=np.int32)
+        self.degree = degree.astype(np.int32)
+        self._oracle = None
+        self._landmarks = None
+        self._predatorModels = dict()
+        self._preyModel = None
+        if self._nodes is not None:
+            for node in changed:
+                self._nodes.invalidate(node)
+
+    def addEdge(self, u, v):
+        """_summary_
+            Add the edge u-v. A new edge can only shorten paths from the sources s with |d(s,u)-d(s,v)| > 1, and since distances are
+            symmetric only the paths between two such sources, for which d'(s,t) = min(d(s,t), d(s,u)+1+d(v,t), d(s,v)+1+d(u,t))
+        Args:
+            u (int): One end of the edge
+            v (int): The other end of the edge
+
+        Returns: The sources whose distance rows changed
+            _type_: np.ndarray
+        """
+        if u == v or self.hasEdge(u, v):
+            raise ValueError(f"Cannot add edge {u}-{v}")
+        self.adjacency[u].append(v)
+        self.adjacency[v].append(u)
+        self.rebuild((u, v))
+        table = self.distanceTable()
+        # Unreachable pairs are stored as -1, treat them as farther than any real distance
+        far = 2*self.size
+        toU = np.where(table.dist[:, u] < 0, far, table.dist[:, u]).astype(np.int64)
+        toV = np.where(table.dist[:, v] < 0, far, table.dist[:, v]).astype(np.int64)
+        rows = np.flatnonzero(np.abs(toU - toV) > 1)
+        block = table.dist[np.ix_(rows, rows)].astype(np.int64)
+        block[block < 0] = far
+        shorter = np.minimum(toU[rows][:, None] + 1 + toV[rows][None, :], toV[rows][:, None] + 1 + toU[rows][None, :])
+        changed = shorter < block
+        sources, targets = rows[np.nonzero(changed)[0]], rows[np.nonzero(changed)[1]]
+        table.dist[sources, targets] = shorter[changed]
+        self.repairHops(sources, targets, (u, v))
+        return np.unique(sources)
+
+    def removeEdge(self, u, v):
+        """_summary_
+            Remove the edge u-v. Only sources whose shortest path DAG uses the edge can change, and of those only the ones where
+            the far end of the edge has no other neighbour one level closer to the source. From there the pairs whose shortest
+            paths all used the edge are found level by level (a node is cut off when all of its predecessors are), and only those
+            are recomputed: from their neighbours that kept their distance, then relaxed within the cut off pairs
+        Args:
+            u (int): One end of the edge
+            v (int): The other end of the edge
+
+        Returns: The sources whose distance rows changed
+            _type_: np.ndarray
+        """
+        if not self.hasEdge(u, v):
+            raise ValueError(f"Cannot remove edge {u}-{v}")
+        self.adjacency[u].remove(v)
+        self.adjacency[v].remove(u)
+        self.rebuild((u, v))
+        table = self.distanceTable()
+        dist = table.dist
+        n = self.size
+        padded = self.paddedNeighbours()
+        onDag = (np.abs(dist[:, u] - dist[:, v]) == 1) & (dist[:, u] >= 0) & (dist[:, v] >= 0)
+        sources = np.flatnonzero(onDag)
+        far = np.where(dist[sources, u] < dist[sources, v], v, u)
+        level = dist[sources, far] - 1
+        keepsPred = (self.pairNeighbours(padded, sources, far, dist, level, n)[1]).any(axis=1)
+        levelS, levelT = sources[~keepsPred], far[~keepsPred]
+        cutS, cutT = [levelS], [levelT]
+        while levelS.shape[0] > 0:
+            levelKeys = np.sort(levelS.astype(np.int64)*n + levelT)
+            # Children of the cut off nodes one level further from the source
+            children, isChild = self.pairNeighbours(padded, levelS, levelT, dist, dist[levelS, levelT] + 1, n)
+            childS = np.repeat(levelS, isChild.sum(axis=1))
+            childKeys = np.unique(childS.astype(np.int64)*n + children[isChild])
+            childS, childT = childKeys // n, childKeys % n
+            # A child is cut off when every predecessor is
+            preds, isPred = self.pairNeighbours(padded, childS, childT, dist, dist[childS, childT] - 1, n)
+            predKeys = childS[:, None]*n + np.where(isPred, preds, 0)
+            cut = (~isPred | inSorted(levelKeys, predKeys)).all(axis=1)
+            levelS, levelT = childS[cut], childT[cut]
+            cutS.append(levelS)
+            cutT.append(levelT)
+        cutS, cutT = np.concatenate(cutS), np.concatenate(cutT)
+        if cutS.shape[0] > 0:
+            keys = cutS.astype(np.int64)*n + cutT
+            order = np.argsort(keys)
+            keys, cutS, cutT = keys[order], cutS[order], cutT[order]
+            neighbours = padded[cutT]
+            valid = neighbours >= 0
+            neighbourKeys = cutS[:, None]*n + np.where(valid, neighbours, 0)
+            position = np.minimum(np.searchsorted(keys, neighbourKeys), len(keys)-1)
+            inside = valid & (keys[position] == neighbourKeys)
+            outsideDist = dist[cutS[:, None], np.where(valid, neighbours, 0)].astype(np.int64)
+            unreachable = 4*n
+            best = np.where(valid & ~inside & (outsideDist >= 0), outsideDist + 1, unreachable).min(axis=1, initial=unreachable)
+            best = relaxWithin(best, np.where(inside, position, -1), unreachable)
+            dist[cutS, cutT] = np.where(best >= unreachable, -1, best)
+        self.repairHops(cutS, cutT, (u, v))
+        return np.unique(cutS)
+
+    @staticmethod
+    def pairNeighbours(padded, sources, nodes, dist, level, n):
+        """_summary_
+            Neighbours of every node of a list of (source, node) pairs and which of them are at the given distance from the source
+        Args:
+            padded (np.ndarray): Padded neighbour table of the graph
+            sources (np.ndarray): The source of every pair
+            nodes (np.ndarray): The node of every pair
+            dist (np.ndarray): All pairs distance matrix of the graph
+            level (np.ndarray): The distance from the source looked for, per pair
+            n (int): Number of nodes of the graph
+
+        Returns: The padded neighbours of every node and the mask of the ones at that distance
+            _type_: tuple of np.ndarray
+        """
+        neighbours = padded[nodes]
+        valid = neighbours >= 0
+        return neighbours, valid & (dist[sources[:, None], np.where(valid, neighbours, 0)] == level[:, None])
+
+    def toggleEdge(self, u, v):
+        """_summary_
+            Remove the edge u-v if it exists, add it otherwise
+        Args:
+            u (int): One end of the edge
+            v (int): The other end of the edge
+
+        Returns: True if the edge exists after the call
+            _type_: bool
+        """
+        if self.hasEdge(u, v):
+            self.removeEdge(u, v)
+            return False
+        self.addEdge(u, v)
+        return True
+
+    def repairHops(self, sources, targets, changed):
+        """_summary_
+            Rebuild the cells of the next hop table that can be stale. hops[w][t] only reads the distances from the neighbours of w
+            to t, so a changed distance d(s,t) only affects the cells (w,t) of the neighbours w of s. The rows of the nodes whose
+            neighbours changed are rebuilt for every target
+        Args:
+            sources (np.ndarray): Source of every pair whose distance changed, both orders of a pair are given
+            targets (np.ndarray): Target of every pair whose distance changed
+            changed (tuple): Nodes whose neighbours changed
+        """
+        table = self.distanceTable()
+        padded = self.paddedNeighbours()
+        width = table.hops.shape[2]
+        if padded.shape[1] > width:
+            # The largest degree grew, the table gets new empty slots
+            table.hops = np.pad(table.hops, ((0, 0), (0, 0), (0, padded.shape[1]-width)), constant_values=-1)
+        elif padded.shape[1] < width:
+            padded = np.pad(padded, ((0, 0), (0, width-padded.shape[1])), constant_values=-1)
+        n = self.size
+        neighbours = padded[sources]
+        valid = neighbours >= 0
+        cells = neighbours[valid].astype(np.int64)*n + np.repeat(targets, valid.sum(axis=1))
+        changed = np.array(changed, dtype=np.int64)
+        cells = np.unique(np.concatenate([cells, (changed[:, None]*n + np.arange(n)[None, :]).ravel()]))
+        nodes, cellTargets = cells // n, cells % n
+        hops, hopCount = nextHopCells(padded, table.dist, nodes, cellTargets)
+        table.hops[nodes, cellTargets] = hops
+        table.hopCount[nodes, cellTargets] = hopCount
+
+def relaxWithin(best, inside, unreachable):
+    """_summary_
+        Unit weight shortest distances over a set of entries that start from their own distance and are linked to each other.
+        The entries are settled level by level like a breadth first search, so every entry is expanded once instead of
+        relaxing the whole set once per level
+    Args:
+        best (np.ndarray): Starting distance of every entry, unreachable when it has none
+        inside (np.ndarray): Padded indices of the linked entries of every entry, -1 for the empty slots
+        unreachable (int): The distance used for entries that cannot be reached
+
+    Returns: The settled distance of every entry
+        _type_: np.ndarray
+    """
+    best = best.copy()
+    order = np.argsort(best, kind="stable")
+    starts = best[order]
+    settled = np.zeros(best.shape[0], dtype=bool)
+    pending = np.zeros(0, dtype=np.int64)
+    level = starts[0] if starts.shape[0] > 0 else unreachable
+    while level < unreachable:
+        lo, hi = np.searchsorted(starts, [level, level+1])
+        frontier = np.concatenate([order[lo:hi], pending])
+        frontier = frontier[~settled[frontier] & (best[frontier] == level)]
+        settled[frontier] = True
+        linked = inside[frontier]
+        linked = linked[linked >= 0]
+        pending = np.unique(linked[~settled[linked] & (best[linked] > level+1)])
+        best[pending] = level+1
+        if pending.shape[0] > 0:
+            level += 1
+        elif hi < starts.shape[0]:
+            level = starts[hi]
+        else:
+            break
+    return best
+
+def inSorted(keys, values):
+    """_summary_
+        Whether every value is one of the sorted keys
+    Args:
+        keys (np.ndarray): Sorted keys
+        values (np.ndarray): Values to look up
+
+    Returns: Mask of the values found
+        _type_: np.ndarray
+    """
+    if keys.shape[0] == 0:
+        return np.zeros(values.shape, dtype=bool)
+    position = np.minimum(np.searchsorted(keys, values), len(keys)-1)
+    return keys[position] == values
+
+def dynamicEnvironment(size=size, variation=5, seed=None):
+    """_summary_
+        Create the environment like genEnvironment but backed by a DynamicGraph so edges can change mid episode
+    Args:
+        size (int, optional): Number of nodes on the primary loop
+        variation (int, optional): How many steps forward or backward along the loop an extra edge may reach
+        seed (int, optional): Seed to reproduce the same graph, a fresh one is used when None
+
+    Returns: Read only nodes dictionary backed by the dynamic graph (available as nodes.graph) and the size of the graph
+        _type_: GraphNodes
+    """
+    nodes, size = genEnvironment(size, variation, seed, precompute=False)
+    return DynamicGraph.fromGraph(graphOf(nodes)).nodes, size
@@ -0,0 +1,173 @@
+# Imports
+import numpy as np
+from scipy.sparse import csr_matrix
+
+class AbsorbingChain:
+    """_summary_
+        The joint (agentPos, predatorPos, preyPos) process of a full information agent on one graph as an absorbing Markov chain.
+        State (a, p, y) is stored at index (a*size + p)*size + y and stands for the positions at the start of a step, before the
+        end of game checks. Transitions between transient states are kept as a sparse matrix in CSR form, the probabilities of
+        ending in a capture or a death within one step are kept per state
+    Args:
+        size (int): Number of nodes of the graph
+        indptr (np.ndarray): Row offsets of the transient to transient transition matrix
+        cols (np.ndarray): Column (next state) of every entry
+        probs (np.ndarray): Probability of every entry
+        success (np.ndarray): Probability of catching the Prey during the step from every state
+        death (np.ndarray): Probability of being caught by the Predator during or right after the step from every state
+        extraStep (np.ndarray): Probability of a death that is only reported at the start of the following step
+    """
+    def __init__(self, size, indptr, cols, probs, success, death, extraStep):
+        self.size = size
+        self.indptr = indptr
+        self.cols = cols
+        self.probs = probs
+        self.success = success
+        self.death = death
+        self.extraStep = extraStep
+
+    def solve(self, threshold=1000):
+        """_summary_
+            Capture, death and timeout probability and expected number of steps of every state for episodes that the drivers stop after
+            threshold steps. values[h] holds them with h steps left, values[h] = rhs + Q values[h-1] starting from values[0], where every
+            episode still running has timed out, so threshold backward steps give them exactly. A death by a Predator landing on the agent
+            is only reported at the start of the next step, on the last step the driver times out before that
+        Args:
+            threshold (int, optional): Number of steps after which the drivers stop an episode with status 404
+
+        Returns: Dictionary of size x size x size arrays indexed [agentPos, predatorPos, preyPos] with the
+            capture probability ("success"), death probability ("death"), timeout probability ("timeout") and expected "steps" as
+            reported by the agent
+            _type_: dict
+        """
+        states = len(self.indptr) - 1
+        matrix = csr_matrix((self.probs, self.cols, self.indptr), shape=(states, states))
+        # Columns are success, death, timeout and steps
+        values = np.zeros((states, 4))
+        values[:, 2] = 1
+        ones = np.ones(states)
+        lastStep = np.stack([self.success, self.death - self.extraStep, self.extraStep, ones], axis=1)
+        rhs = np.stack([self.success, self.death, np.zeros(states), ones + self.extraStep], axis=1)
+        for left in range(1, threshold+1):
+            values = (lastStep if left == 1 else rhs) + matrix @ values
+        n = self.size
+        a, p, y = np.unravel_index(np.arange(n**3), (n, n, n))
+        # Spawns on top of the Prey or the Predator end in the first check, the Prey is checked first
+        values[(a == p) | (a == y)] = [0, 1, 0, 1]
+        values[a == y] = [1, 0, 0, 1]
+        names = ["success", "death", "timeout", "steps"]
+        return {name: values[:, i].reshape(n, n, n) for i, name in enumerate(names)}
+
+class StepModel:
+    """_summary_
+        Outcome of one step of the game for every joint state and every agent move, in the order of the agent drivers: the agent moves
+        (capture if it lands on the Prey), the Prey moves (capture if it lands on the agent), the Predator moves (death if it stays, which
+        only a chasing Predator already on the agent does, or if it lands on the agent, which is reported at the start of the next step). A state (a, p, y) has
+        maxDegree+1 agent moves, the k-th neighbour of a or staying on a in the last slot, and the non absorbing outcomes of a move
+        always fan out over a fixed (maxDegree+1) x (maxDegree+1) grid of Prey and Predator moves, so they are stored as dense tensors
+    Args:
+        graph (Graph): The array backed graph
+        distraction (float, optional): Probability of a random Predator move instead of a chasing move, 0 for the Predator of genenvironment
+    """
+    def __init__(self, graph, distraction=0.0):
+        self.graph = graph
+        n = self.size = graph.size
+        padded = graph.paddedNeighbours()
+        self.agentOptions = np.concatenate([padded, np.arange(n, dtype=np.int32)[:, None]], axis=1)
+        self.preyOptions = graph.preyModel().options
+        self.preyProb = np.where(self.preyOptions >= 0, 1/(graph.degree + 1)[:, None], 0.0)
+        self.predatorModel = graph.predatorModel(distraction)
+
+    def agentAt(self, a):
+        """_summary_
+            Outcomes of every move of the agent standing on a
+        Args:
+            a (int): The location of the agent
+
+        Returns: Dictionary with, for every predatorPos, preyPos and agent move, the probability of a "capture", of a "death" and of
+            an "arrival" (the part of the deaths reported one step later), and the "probs" and "nextState" indices of the remaining
+            outcomes over the Prey and Predator moves
+            _type_: dict
+        """
+        n = self.size
+        nodes = np.arange(n)
+        # Axes are predator, prey, agent move, prey move, predator move
+        p = nodes[:, None, None, None, None]
+        y = nodes[None, :, None, None, None]
+        nextAgent = self.agentOptions[a][None, None, :, None, None]
+        nextPrey = self.preyOptions[None, :, None, :, None]
+        nextPred = self.predatorModel.candidates[:, None, None, None, :]
+        landsOnPrey = nextAgent == y
+        moving = ~landsOnPrey*self.preyProb[None, :, None, :, None]
+        preyCaught = nextPrey == nextAgent
+        capture = landsOnPrey[..., 0, 0] + (moving*preyCaught).sum(axis=(3, 4))
+        moving = moving*~preyCaught
+        predStep = self.predatorModel.probs[nodes[:, None], np.maximum(self.agentOptions[a], 0)[None, :], :][:, None, :, None, :]
+        moving = moving*predStep
+        # Only a chasing Predator on the agent stays (the last candidate), a distracted one moves to a neighbour and the game goes on
+        stays = nextPred == p
+        death = (moving*stays).sum(axis=(3, 4))
+        moving = moving*~stays
+        arrives = nextPred == nextAgent
+        arrival = (moving*arrives).sum(axis=(3, 4))
+        moving = moving*~arrives
+        nextState = (nextAgent.astype(np.int64)*n + nextPred)*n + nextPrey
+        return {"capture": np.broadcast_to(capture, death.shape), "death": death + arrival, "arrival": arrival, "probs": moving, "nextState": np.broadcast_to(nextState, moving.shape)}
+
+def absorbingChain(graph, weights, distraction=0.0):
+    """_summary_
+        Build the absorbing Markov chain of a full information agent following a fixed stochastic policy
+    Args:
+        graph (Graph): The array backed graph
+        weights (np.ndarray): Stochastic agent policy, weights[a][p][y][k] is proportional to the probability of moving to the
+            k-th neighbour of a, the last slot stands for staying on a (see compileAgent1Policy)
+        distraction (float, optional): Probability of a random Predator move instead of a chasing move, 0 for the Predator of genenvironment
+
+    Returns: The chain over all size**3 joint states
+        _type_: AbsorbingChain
+    """
+    n = graph.size
+    model = StepModel(graph, distraction)
+    success = np.zeros(n**3)
+    death = np.zeros(n**3)
+    extraStep = np.zeros(n**3)
+    allRows, allCols, allProbs = [], [], []
+    nodes = np.arange(n)
+    for a in range(n):
+        policy = weights[a].astype(np.float64)
+        policy /= np.maximum(policy.sum(axis=2, keepdims=True), 1)
+        # Spawns on top of the Prey or the Predator never get to move
+        policy[a] = 0
+        policy[:, a] = 0
+        step = model.agentAt(a)
+        rows = ((a*n + nodes[:, None])*n + nodes[None, :]).ravel()
+        success[rows] = (policy*step["capture"]).sum(axis=2).ravel()
+        death[rows] = (policy*step["death"]).sum(axis=2).ravel()
+        extraStep[rows] = (policy*step["arrival"]).sum(axis=2).ravel()
+        moving = policy[:, :, :, None, None]*step["probs"]
+        keep = moving > 0
+        entryRows = np.broadcast_to(rows.reshape(n, n)[:, :, None, None, None], moving.shape)[keep]
+        # Merge the entries reaching the same next state
+        keys, inverse = np.unique(entryRows*n**3 + step["nextState"][keep], return_inverse=True)
+        allRows.append(keys // n**3)
+        allCols.append(keys % n**3)
+        allProbs.append(np.bincount(inverse.ravel(), weights=moving[keep]))
+    rows = np.concatenate(allRows)
+    indptr = np.zeros(n**3+1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n**3), out=indptr[1:])
+    return AbsorbingChain(n, indptr, np.concatenate(allCols), np.concatenate(allProbs), success, death, extraStep)
+
+def evaluatePolicy(graph, weights, distraction=0.0, threshold=1000):
+    """_summary_
+        Exact capture, death and timeout (status 404) probability and expected number of steps of a full information agent from every
+        spawn triple, replacing Monte Carlo episodes
+    Args:
+        graph (Graph): The array backed graph
+        weights (np.ndarray): Stochastic agent policy as returned by compileAgent1Policy
+        distraction (float, optional): Probability of a random Predator move instead of a chasing move
+        threshold (int, optional): Number of steps after which the drivers stop an episode
+
+    Returns: Dictionary of size x size x size arrays indexed [agentPos, predatorPos, preyPos]
+        _type_: dict
+    """
+    return absorbingChain(graph, weights, distraction).solve(threshold)
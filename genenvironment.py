@@ -1,57 +1,346 @@
 # Imports
-import copy
 import numpy as np
 import random
-from collections import deque
+from collections.abc import Mapping
+from types import MappingProxyType
+from distances import DistanceTable, DistanceOracle, LandmarkIndex, ShortestPathDAG, bidirectionalSearch
+from predatormodel import PredatorModel, PredatorSampler
+from preymodel import PreyModel
 size = 50
+# Largest graph for which genEnvironment builds the size x size distance tables by default. They take about 150MB and half a
+# second to build here, past that they grow beyond the default memory budget of the DistanceOracle that replaces them
+maxTableSize = 3000
+# Largest graph for which the Predator policy is compiled into size x size x (maxDegree+1) tables, the float64 probs and cdf
+# of one distraction take about 0.6GB at maxTableSize but under 100MB here
+predatorTableSize = 1000
 
-def genEnvironment():
+class Graph:
+    """_summary_
+        Compact array backed (CSR) representation of the environment graph. The neighbours of node i are stored
+        contiguously in indices[indptr[i]:indptr[i+1]] and degree[i] holds the number of neighbours of node i,
+        so movement and belief kernels can work directly on integer arrays instead of the nested dictionaries.
+    Args:
+        indptr (np.ndarray): Offsets into indices of length size+1
+        indices (np.ndarray): Concatenated neighbour lists of every node
+    """
+    def __init__(self, indptr, indices):
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32)
+        self.degree = np.diff(self.indptr).astype(np.int32)
+        self.size = len(self.indptr) - 1
+        self._nodes = None
+        self._distances = None
+        self._oracle = None
+        self._landmarks = None
+        self._predatorModels = dict()
+        self._preyModel = None
+
+    @classmethod
+    def fromNodes(cls, nodes):
+        """_summary_
+            Build the array backed graph from the nodes dictionary used by the agents
+        Args:
+            nodes (2D Dictionary): Dictionary with all the node information in the graph
+
+        Returns: The graph holding the same neighbour lists in the same order
+            _type_: Graph
+        """
+        n = len(nodes)
+        indptr = np.zeros(n+1, dtype=np.int64)
+        for i in range(n):
+            indptr[i+1] = indptr[i] + nodes[i]["degree"]
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        for i in range(n):
+            indices[indptr[i]:indptr[i+1]] = nodes[i]["neighbours"]
+        return cls(indptr, indices)
+
+    def neighbours(self, node):
+        """_summary_
+            Neighbours of a node as a view into the indices array
+        Args:
+            node (int): The node to look up
+
+        Returns: The neighbours of the node
+            _type_: np.ndarray
+        """
+        return self.indices[self.indptr[node]:self.indptr[node+1]]
+
+    @property
+    def maxDegree(self):
+        return int(self.degree.max()) if self.size > 0 else 0
+
+    def paddedNeighbours(self, fill=-1):
+        """_summary_
+            Neighbour lists packed into a size x maxDegree table
+        Args:
+            fill (int, optional): Value used for the unused slots of nodes with a smaller degree. When None the node itself is used
+
+        Returns: The padded neighbour table
+            _type_: np.ndarray
+        """
+        padded = np.empty((self.size, self.maxDegree), dtype=np.int32)
+        if fill is None:
+            padded[:] = np.arange(self.size, dtype=np.int32)[:, None]
+        else:
+            padded[:] = fill
+        slot = np.arange(len(self.indices)) - np.repeat(self.indptr[:-1], self.degree)
+        padded[np.repeat(np.arange(self.size), self.degree), slot] = self.indices
+        return padded
+
+    def distanceTable(self):
+        """_summary_
+            All pairs distance and next hop table of this graph, built on first use and kept for the lifetime of the graph
+        Returns: The precomputed tables
+            _type_: DistanceTable
+        """
+        if self._distances is None:
+            self._distances = DistanceTable(self)
+        return self._distances
+
+    def distanceOracle(self, maxBytes=None):
+        """_summary_
+            Cached single source distance fields of this graph for graphs too large for the all pairs tables, created on first use
+        Args:
+            maxBytes (int, optional): Memory budget of the cache, only used when the oracle is created
+
+        Returns: The distance oracle
+            _type_: DistanceOracle
+        """
+        if self._oracle is None:
+            self._oracle = DistanceOracle(self) if maxBytes is None else DistanceOracle(self, maxBytes)
+        return self._oracle
+
+    def landmarkIndex(self):
+        """_summary_
+            Landmark distance bounds of this graph, created on first use. Distances the bounds cannot settle are answered by the
+            distance oracle of the graph
+        Returns: The landmark index
+            _type_: LandmarkIndex
+        """
+        if self._landmarks is None:
+            self._landmarks = LandmarkIndex(self, oracle=self.distanceOracle())
+        return self._landmarks
+
+    def distanceQueries(self):
+        """_summary_
+            The structure answering distance and next hop queries: the all pairs tables when they exist or the graph is small enough
+            to build them, the bounded distance oracle otherwise
+        Returns: The tables or the oracle, both answer distance, closestNeighbours and nextHop
+            _type_: DistanceTable or DistanceOracle
+        """
+        if self._distances is not None or self.size <= maxTableSize:
+            return self.distanceTable()
+        return self.distanceOracle()
+
+    def predatorModel(self, distraction=0.0):
+        """_summary_
+            Compiled Predator policy of this graph for one distraction probability, built on first use. Graphs larger than
+            predatorTableSize get the PredatorSampler, which works out the same moves from the distance fields when they are needed
+        Args:
+            distraction (float, optional): Probability of a random move instead of a chasing move
+
+        Returns: The predator policy tables
+            _type_: PredatorModel or PredatorSampler
+        """
+        model = self._predatorModels.get(distraction)
+        if model is None:
+            model = PredatorModel(self, distraction) if self.size <= predatorTableSize else PredatorSampler(self, distraction)
+            self._predatorModels[distraction] = model
+        return model
+
+    def preyModel(self):
+        """_summary_
+            Random walk operator of the Prey on this graph, built on first use
+        Returns: The prey transition operator
+            _type_: PreyModel
+        """
+        if self._preyModel is None:
+            self._preyModel = PreyModel(self)
+        return self._preyModel
+
+    def attachDistanceTable(self, dist, hops, hopCount):
+        """_summary_
+            Use already computed distance tables for this graph instead of building them, e.g. arrays memory mapped from a corpus store
+        Args:
+            dist (np.ndarray): Distance matrix of the graph
+            hops (np.ndarray): Next hop table of the graph
+            hopCount (np.ndarray): Number of next hops of every pair
+
+        Returns: The attached tables
+            _type_: DistanceTable
+        """
+        self._distances = DistanceTable(self, dist, hops, hopCount)
+        return self._distances
+
+    def attachPredatorModel(self, distraction, probs, cdf):
+        """_summary_
+            Use already computed Predator tables for one distraction probability instead of building them, e.g. arrays memory
+            mapped from a corpus store
+        Args:
+            distraction (float): Probability of a random move instead of a chasing move
+            probs (np.ndarray): Move probability table of the Predator, see PredatorModel
+            cdf (np.ndarray): Cumulative move probability table of the Predator
+
+        Returns: The attached predator policy
+            _type_: PredatorModel
+        """
+        model = self._predatorModels[distraction] = PredatorModel(self, distraction, probs, cdf)
+        return model
+
+    @property
+    def nodes(self):
+        """_summary_
+            Read only dictionary like view of the graph so the agent modules can keep using nodes[x]["neighbours"]
+        Returns: The adapter over this graph
+            _type_: GraphNodes
+        """
+        if self._nodes is None:
+            self._nodes = GraphNodes(self)
+        return self._nodes
+
+    def toNodes(self):
+        """_summary_
+            Convert the graph back into a mutable nodes dictionary
+        Returns: Nodes dictionary which contains the neighbours and the degree of every node
+            _type_: 2D Dictionary
+        """
+        return {i: {"degree": int(self.degree[i]), "neighbours": self.neighbours(i).tolist()} for i in range(self.size)}
+
+class GraphNodes(Mapping):
+    """_summary_
+        Read only adapter exposing a Graph through the nodes[x]["degree"] and nodes[x]["neighbours"] interface.
+        The per node entries are built once on first access and the neighbours are returned as tuples of ints
+    Args:
+        graph (Graph): The array backed graph
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self._entries = [None]*graph.size
+
+    def __getitem__(self, node):
+        entry = self._entries[node]
+        if entry is None:
+            entry = MappingProxyType({"degree": int(self.graph.degree[node]), "neighbours": tuple(self.graph.neighbours(node).tolist())})
+            self._entries[node] = entry
+        return entry
+
+    def invalidate(self, node):
+        """_summary_
+            Drop the cached entry of a node whose neighbours changed, it is rebuilt from the graph on the next access
+        Args:
+            node (int): The node that changed
+        """
+        self._entries[node] = None
+
+    def __iter__(self):
+        return iter(range(self.graph.size))
+
+    def __len__(self):
+        return self.graph.size
+
+def graphOf(nodes):
+    """_summary_
+        Get the array backed graph for either a GraphNodes adapter or a plain nodes dictionary
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+
+    Returns: The array backed graph
+        _type_: Graph
+    """
+    if isinstance(nodes, Graph):
+        return nodes
+    if isinstance(nodes, GraphNodes):
+        return nodes.graph
+    return Graph.fromNodes(nodes)
+
+def genChords(size, variation, rng):
+    """_summary_
+        Pick the extra edges of the environment in O(size) time. Drawing a random node out of the not yet visited set until it is empty
+        visits the nodes in a uniformly random order, so the nodes are walked along one random permutation and the ones already
+        removed (because they got a chord as a partner) are skipped. Every node then only looks at its 2*variation+1 window
+    Args:
+        size (int): Number of nodes on the primary loop
+        variation (int): How many steps forward or backward along the loop a chord may reach
+        rng (np.random.Generator): Generator used for the order of the nodes and the choice of the partners
+
+    Returns: For every node the node it is connected to by the extra edge, -1 if it got none
+        _type_: np.ndarray
+    """
+    order = rng.permutation(size).tolist()
+    draws = rng.random(size).tolist()
+    chord = [-1]*size
+    removed = [False]*size
+    for i in order:
+        if removed[i]:
+            continue
+        removed[i] = True
+        invalids = (i, (i+1)%size, (i-1)%size)
+        neighList = list()
+        # Running the boundary=variation condition
+        for j in range(-variation, variation+1):
+            neigh3 = (i+j) % size
+            # Only nodes with degree<3 that are not already neighbours can get the new edge
+            if chord[neigh3] < 0 and neigh3 not in invalids:
+                neighList.append(neigh3)
+        if len(neighList)>0:
+            partner = neighList[int(draws[i]*len(neighList))]
+            chord[i] = partner
+            chord[partner] = i
+            removed[partner] = True
+    return np.array(chord, dtype=np.int64)
+
+def ringGraph(size, chord):
+    """_summary_
+        Build the array backed graph of the primary loop plus the extra edges. Every node lists its loop neighbours
+        first and its extra edge last, the same order genEnvironment has always used
+    Args:
+        size (int): Number of nodes on the primary loop
+        chord (np.ndarray): For every node the node it is connected to by the extra edge, -1 if it got none
+
+    Returns: The graph
+        _type_: Graph
+    """
+    nodeIds = np.arange(size)
+    hasChord = chord >= 0
+    indptr = np.zeros(size+1, dtype=np.int64)
+    np.cumsum(2 + hasChord, out=indptr[1:])
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    indices[indptr[:-1]] = (nodeIds-1) % size
+    indices[indptr[:-1]+1] = (nodeIds+1) % size
+    indices[indptr[:-1][hasChord]+2] = chord[hasChord]
+    return Graph(indptr, indices)
+
+def genEnvironment(size=size, variation=5, seed=None, precompute=None):
     """_summary_
         Function to create the environment for the project that is a graph of nodes connected by edges.
         Picking nodes with degree less than 3, add an edge between it and one node within 5 steps forward or backward along the primary loop.  
         (So node 10 might get connected to node 7 or node 15, but not node 16.)
-    Returns: Nodes dictionary which contains the data of the nodes its neighbours and the degree of that node which must be less than or equal to 3
-        _type_: 2D Dictionary
-    """
-    nodes = dict()
-    for i in range(size):
-        temp = dict()
-        temp["degree"] = 2
-        temp["neighbours"] = [(i-1)%size,(i+1)%size]
-        nodes[i] = temp
-
-    variation = 5
-    visited = set(np.arange(size))
-    while len(visited)>0:
-        i = random.choice(list(visited))
-        # Checking for nodes with degree<3
-        if nodes[i]["degree"] < 3:
-            neighList = list()
-            # Running the boundary=5 condition
-            for j in range(-variation, variation+1):
-                neigh3 = (i+j) % size
-                invalids = [i, (i+1)%size,(i-1)%size]
-                # Checking if the new neighbour fits the vriteria and adding it to the dictionary
-                if nodes[neigh3]["degree"] < 3 and neigh3 not in invalids:
-                    neighList.append(neigh3)
-            if len(neighList)>0:
-                ind = np.random.randint(len(neighList))
-                nodes[i]["neighbours"].append(neighList[ind])
-                nodes[neighList[ind]]["neighbours"].append(i)
-                nodes[i]["degree"] += 1
-                nodes[neighList[ind]]["degree"] += 1
-                visited.remove(neighList[ind])
-                visited.remove(i)
-                #print(i, neighList[ind], "removed")
-            else:
-                visited.remove(i)
-                #print(i, "removed")
-
-    return nodes, size
-
-def spawnCreatures():
+        Generation takes O(size) time and memory so rings of millions of nodes can be built
+    Args:
+        size (int, optional): Number of nodes on the primary loop
+        variation (int, optional): How many steps forward or backward along the loop an extra edge may reach
+        seed (int or np.random.Generator, optional): Seed to reproduce the same graph. When None it is drawn from the numpy global
+            random state, so np.random.seed reproduces the graph like it did for the original generator
+        precompute (bool, optional): Build the all pairs distance tables right away. By default only done when size <= maxTableSize
+
+    Returns: Read only nodes dictionary which contains the data of the nodes its neighbours and the degree of that node which must be less than or equal to 3,
+        backed by the arrays of a Graph (available as nodes.graph)
+        _type_: GraphNodes
+    """
+    rng = np.random.default_rng(np.random.randint(2**63, dtype=np.int64) if seed is None else seed)
+    graph = ringGraph(size, genChords(size, variation, rng))
+    if precompute is None:
+        precompute = size <= maxTableSize
+    if precompute:
+        # Precompute the distance and next hop tables once, every later distance query is an array lookup
+        graph.distanceTable()
+    return graph.nodes, size
+
+def spawnCreatures(size=size):
     """_summary_
         Function for the initial spawning of the Predator, Agent and Prey
+    Args:
+        size (int, optional): Number of nodes in the graph
 
     Returns: The spawn location of predator, agent, and prey
         _type_: integer variables with node location
@@ -68,48 +357,26 @@ def spawnCreatures():
 
     return predator, agent, prey
 
-def BFS(nodes, start, goal):
+def BFS(nodes, start, goal, bidirectional=False):
     """_summary_
-        Performing Breadth First Search to reach to the goal node location using the shortest path
+        Performing Breadth First Search to reach to the goal node location using the shortest path.
+        The search keeps a shortest path DAG with path counts instead of copying a path for every node and
+        stops once the goal is reached, the returned path is drawn uniformly among all the shortest paths
     Args:
         nodes (2D Dictionary): Dictionary with all the node information in the graph
         start (int): The stat node position i.e. the Predator Position for traversal
         goal (int): The goal node i.e Agent Position
+        bidirectional (bool, optional): Search from both ends and stop when they meet, meant for point to point queries on large graphs
 
     Returns: StatusCode if there is a successful way for the agent to reach its goal and the path which is to be followed
         _type_: Dictionary
     """
-    # Stores indices of the location
-    visited = dict()
-    visited[start] = True
-    startQ = deque()
-    finalPath = list()
-    
-    # Mark the starting cell as visited and push it into the goal queue
-    startQ.append([start])
-    
-    # Iterate while the queue is not empty
-    while startQ:
-        path = startQ.popleft()
-        x = path[-1]
-        if x == goal:
-            if len(finalPath) == 0:
-                finalPath.append(path)
-            elif len(finalPath[-1]) == len(path):
-                finalPath.append(path)
-            elif len(finalPath[-1]) > len(path):
-                finalPath.clear()
-                finalPath.append(path)
-
-        # Go to the adjacent nodes in the graph
-        for i in range(nodes[x]["degree"]):
-            childX = nodes[x]["neighbours"][i]
-            if not visited.get(childX, False):
-                newPath = list(path)
-                newPath.append(childX)
-                startQ.append(newPath)
-                visited[childX] = True
-                
+    if bidirectional:
+        _, path = bidirectionalSearch(graphOf(nodes), start, goal)
+    else:
+        dag = ShortestPathDAG(graphOf(nodes), start, goal=goal)
+        path = dag.samplePath(goal)
+    finalPath = [path] if len(path) > 0 else []
     return {"statusCode": 200, "path":finalPath}
 
 def preyMovement(nodes, preyPos):
@@ -122,13 +389,118 @@ def preyMovement(nodes, preyPos):
     Returns: New location of the prey after random movement
         _type_: int
     """
-    nextSteps = copy.deepcopy(nodes[preyPos]["neighbours"])
+    nextSteps = list(nodes[preyPos]["neighbours"])
     nextSteps.append(preyPos)
     # print(nextSteps)
     nextStep = random.choice(nextSteps)
     preyPos = nextStep
     return preyPos
 
+def preyMovementBatch(nodes, positions, rng=None):
+    """_summary_
+        Move many Prey at once with the same stay or move to a random neighbour rule as preyMovement
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        positions (np.ndarray): Current location of every Prey
+        rng (np.random.Generator, optional): Generator used for the draw
+
+    Returns: The next location of every Prey
+        _type_: np.ndarray
+    """
+    return graphOf(nodes).preyModel().step(positions, rng)
+
+def transitPreyBelief(nodes, belief, out=None):
+    """_summary_
+        Move a belief over the Prey position one Prey step forward using the shared random walk operator of the graph
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        belief (list): Probability of the Prey being at every node
+        out (np.ndarray, optional): Array to write the result to
+
+    Returns: The belief after the Prey moved
+        _type_: np.ndarray
+    """
+    return graphOf(nodes).preyModel().transit(belief, out)
+
+def pathLength(nodes, start, goal):
+    """_summary_
+        Length of the shortest path between start and goal read from the precomputed distance table. Graphs too large for the table
+        ask the landmark bounds first, which often settle the distance to a far goal without the search over the whole graph that
+        the distance oracle runs for a goal it has no field of. This is the number of nodes on the path, i.e. the same value as len()
+        of a path returned by BFS
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        start (int): The start node
+        goal (int): The goal node
+
+    Returns: Number of nodes on a shortest path from start to goal
+        _type_: int
+    """
+    graph = graphOf(nodes)
+    if graph._distances is None and graph.size > maxTableSize:
+        return graph.landmarkIndex().distance(start, goal) + 1
+    return graph.distanceQueries().distance(start, goal) + 1
+
+def closestNeighbours(nodes, node, goal):
+    """_summary_
+        Neighbours of node which are closest to goal, read from the precomputed next hop table
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        node (int): The node whose neighbours are compared
+        goal (int): The target node
+
+    Returns: The neighbours with the shortest path to the goal
+        _type_: list
+    """
+    return graphOf(nodes).distanceQueries().closestNeighbours(node, goal).tolist()
+
+def nextHop(nodes, start, goal):
+    """_summary_
+        Second node of a shortest path from start to goal, picked at random among the neighbours on a shortest path
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        start (int): The start node
+        goal (int): The goal node
+
+    Returns: The node to move to, start itself if it is already the goal
+        _type_: int
+    """
+    return graphOf(nodes).distanceQueries().nextHop(start, goal)
+
+def predatorMove(nodes, predatorPos, agentPos, distraction=0.0):
+    """_summary_
+        Next position of the Predator, sampled from the predator policy of the graph. Graphs too large for the
+        all pairs tables fall back to the distance oracle
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        predatorPos (int): The location of the predator on the graph
+        agentPos (int): The location of the agent on the graph
+        distraction (float, optional): Probability of a random move instead of a chasing move
+
+    Returns: The next position of the Predator, predatorPos itself when it stays on the Agent
+        _type_: int
+    """
+    graph = graphOf(nodes)
+    if graph._distances is not None or graph.size <= maxTableSize:
+        return graph.predatorModel(distraction).move(predatorPos, agentPos)
+    if random.random() < distraction:
+        return int(random.choice(graph.neighbours(predatorPos)))
+    return predatorPos if predatorPos == agentPos else nextHop(nodes, predatorPos, agentPos)
+
+def transitPredatorBelief(nodes, belief, agentPos, distraction=0.0, out=None):
+    """_summary_
+        Move a belief over the Predator position one Predator step forward using the cached transition matrix of the agent position
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        belief (list): Probability of the Predator being at every node
+        agentPos (int): The location of the agent on the graph
+        distraction (float, optional): Probability of a random move instead of a chasing move
+        out (np.ndarray, optional): Array to write the result to
+
+    Returns: The belief after the Predator moved
+        _type_: np.ndarray
+    """
+    return graphOf(nodes).predatorModel(distraction).transit(belief, agentPos, out)
 
 def predatorMovement(agentPos, predatorPos, nodes):
     """_summary_
@@ -141,26 +513,10 @@ def predatorMovement(agentPos, predatorPos, nodes):
     Returns:
         _type_: _description_
     """
-    bestNeigh = list()
-    minLen = 50
-    if agentPos != predatorPos:
-        for neigh in nodes[predatorPos]["neighbours"]:
-            paths = BFS(nodes, neigh, agentPos)["path"]
-            path = random.choice(paths)
-            if len(bestNeigh)==0:
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-            elif len(path) == minLen:
-                bestNeigh.append([neigh, len(path)])
-            elif len(path) < minLen:
-                bestNeigh.clear()
-                bestNeigh.append([neigh, len(path)])
-                minLen = len(path)
-            #print("BN: ",bestNeigh)
-        
-        predArr = random.choice(bestNeigh)
-        predatorPos = predArr[0]
-        return {"statusCode":200, "predatorPos":predatorPos}
+    # Move to one of the neighbours with the shortest path to the agent
+    nextPos = predatorMove(nodes, predatorPos, agentPos)
+    if nextPos != predatorPos:
+        return {"statusCode":200, "predatorPos":nextPos}
         
     else:
         return {"statusCode": 400, "predatorPos":agentPos}
@@ -0,0 +1,153 @@
+# Imports
+import numpy as np
+
+class ObservationModel:
+    """_summary_
+        Sensor used to survey a node. It misses a creature that is on the node with probability falseNegative and reports one that is
+        not there with probability falsePositive. A report multiplies the belief of the surveyed node by the likelihood ratio
+        P(report | on node) / P(report | not on node) and renormalizes, the Bayes update of the survey. Beliefs do this with
+        survey(node, False, ratio), which is the update the agents used for the defective drone, and a report that rules out every
+        other node collapses the belief on the surveyed node
+    Args:
+        falseNegative (float, optional): Probability of not reporting a creature that is on the surveyed node
+        falsePositive (float, optional): Probability of reporting a creature that is not on the surveyed node
+    """
+    def __init__(self, falseNegative=0.0, falsePositive=0.0):
+        self.falseNegative = falseNegative
+        self.falsePositive = falsePositive
+
+    def report(self, node, target):
+        """_summary_
+            Survey node while the creature is at target, a single np.random draw like the defective survey of the agents
+        Args:
+            node (int): The surveyed node
+            target (int): The actual location of the creature
+
+        Returns: Whether the sensor reports the creature on node
+            _type_: bool
+        """
+        draw = np.random.rand()
+        return draw > self.falseNegative if node == target else draw < self.falsePositive
+
+    def reportBatch(self, nodes, targets, rng):
+        """_summary_
+            Survey one node per episode. A perfect sensor makes no draw, so it leaves the generator as the plain comparison did
+        Args:
+            nodes (np.ndarray): The surveyed node of every episode
+            targets (np.ndarray): The actual location of the creature of every episode
+            rng (np.random.Generator): Generator used for the draws
+
+        Returns: Whether the sensor reports the creature, for every episode
+            _type_: np.ndarray
+        """
+        if self.falseNegative == 0 and self.falsePositive == 0:
+            return nodes == targets
+        draw = rng.random(len(nodes))
+        return np.where(nodes == targets, draw > self.falseNegative, draw < self.falsePositive)
+
+    def likelihood(self, found):
+        """_summary_
+            Probability of a report when the creature is on the surveyed node and when it is not
+        Args:
+            found (bool or np.ndarray): The report, or one report per episode
+
+        Returns: The two likelihoods
+            _type_: tuple
+        """
+        if isinstance(found, np.ndarray):
+            onNode = np.where(found, 1-self.falseNegative, self.falseNegative)
+            offNode = np.where(found, self.falsePositive, 1-self.falsePositive)
+            return onNode, offNode
+        # A single report is the per step update of the agents, plain floats are much cheaper than 0-d arrays
+        return (1-self.falseNegative, self.falsePositive) if found else (self.falseNegative, 1-self.falsePositive)
+
+    def update(self, belief, node, found):
+        """_summary_
+            Bayes update of a belief after a report on node, in place
+        Args:
+            belief (Belief): The belief to update
+            node (int): The surveyed node
+            found (bool): The report
+
+        Returns: The updated belief
+            _type_: Belief
+        """
+        onNode, offNode = self.likelihood(found)
+        if offNode == 0:
+            return belief.survey(node, True)
+        return belief.survey(node, False, onNode/offNode)
+
+    def updateBatch(self, beliefs, nodes, found):
+        """_summary_
+            Bayes update of the beliefs of many episodes after one report each, in place
+        Args:
+            beliefs (BeliefBatch): The beliefs to update
+            nodes (np.ndarray): The surveyed node of every episode
+            found (np.ndarray): The report of every episode
+
+        Returns: The updated beliefs
+            _type_: BeliefBatch
+        """
+        onNode, offNode = self.likelihood(found)
+        certain = offNode == 0
+        ratio = np.divide(onNode, offNode, out=np.zeros(len(nodes)), where=~certain)
+        return beliefs.survey(nodes, certain, ratio)
+
+class BlendedObservation:
+    """_summary_
+        Weighted mix of the updates of two sensors, weight*first + (1-weight)*second, the survey update of Agent 9. Reports come from
+        the first sensor, and a report that leaves no doubt (or a node that is already certain) is handled like a plain survey
+    Args:
+        first (ObservationModel): Sensor that makes the reports
+        second (ObservationModel): Sensor whose update is mixed in
+        weight (float): Weight of the update of the first sensor
+    """
+    def __init__(self, first, second, weight):
+        self.first = first
+        self.second = second
+        self.weight = weight
+
+    def report(self, node, target):
+        return self.first.report(node, target)
+
+    def reportBatch(self, nodes, targets, rng):
+        return self.first.reportBatch(nodes, targets, rng)
+
+    def update(self, belief, node, found):
+        """_summary_
+            Mix of the two updates of a belief after a report on node. A certain outcome updates the belief in place, otherwise a new
+            belief is returned and the given one is left as it was
+        Args:
+            belief (Belief): The belief to update
+            node (int): The surveyed node
+            found (bool): The report
+
+        Returns: The updated belief
+            _type_: Belief
+        """
+        if self.first.likelihood(found)[1] == 0 or belief[node] == 1:
+            return belief.survey(node, found)
+        first = self.first.update(belief.copy(), node, found)
+        second = self.second.update(belief.copy(), node, found)
+        return first.mix(second, self.weight)
+
+    def updateBatch(self, beliefs, nodes, found):
+        """_summary_
+            Mix of the two updates of the beliefs of many episodes, in place
+        Args:
+            beliefs (BeliefBatch): The beliefs to update
+            nodes (np.ndarray): The surveyed node of every episode
+            found (np.ndarray): The report of every episode
+
+        Returns: The updated beliefs
+            _type_: BeliefBatch
+        """
+        first = self.first.updateBatch(beliefs.copy(), nodes, found)
+        second = self.second.updateBatch(beliefs.copy(), nodes, found)
+        beliefs.values = first.values*self.weight + second.values*(1-self.weight)
+        certain = (self.first.likelihood(found)[1] == 0) | (first.values[np.arange(len(nodes)), nodes] == 1)
+        beliefs.values[certain] = first.values[certain]
+        return beliefs
+
+# The drone of the basic agents, it never misses and never reports a creature that is not there
+perfectSensor = ObservationModel()
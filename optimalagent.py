@@ -0,0 +1,127 @@
+# Imports
+import weakref
+import numpy as np
+from genenvironment import genEnvironment, spawnCreatures, preyMovement, predatorMovement, graphOf
+from evaluation import StepModel
+from policytables import compiledMove
+
+# Solved policies of the graphs seen so far, dropped together with their graph
+solvedPolicies = weakref.WeakKeyDictionary()
+
+def valueIteration(graph, distraction=0.0, gamma=0.99, tol=1e-8, maxIterations=10000):
+    """_summary_
+        Optimal full information agent by value iteration over all size**3 joint states. The utility of a state is the discounted
+        probability of catching the Prey, E[gamma**(steps-1)] over the episodes ending in a capture, so among equally safe moves the
+        faster capture is preferred. Every Bellman backup is one gather over the fixed fan out transition tensors of StepModel
+    Args:
+        graph (Graph): The array backed graph
+        distraction (float, optional): Probability of a random Predator move instead of a chasing move, 0 for the Predator of genenvironment
+        gamma (float, optional): Discount factor per step
+        tol (float, optional): Largest change of any utility between two backups to stop at
+        maxIterations (int, optional): Upper bound on the number of backups
+
+    Returns: The utility table indexed [agentPos, predatorPos, preyPos] and the greedy policy as weights in the format of
+        compileAgent1Policy, all the moves within rounding of the best one get weight 1
+        _type_: tuple of np.ndarray
+    """
+    model = StepModel(graph, distraction)
+    n, width = graph.size, model.agentOptions.shape[1]
+    capture = np.zeros((n, n, n, width))
+    probs = np.zeros((n, n, n, width, width, width))
+    nextState = np.zeros((n, n, n, width, width, width), dtype=np.int32)
+    for a in range(n):
+        step = model.agentAt(a)
+        capture[a] = step["capture"]
+        probs[a] = step["probs"]
+        nextState[a] = step["nextState"]
+    valid = (model.agentOptions >= 0)[:, None, None, :]
+    a, p, y = np.meshgrid(np.arange(n), np.arange(n), np.arange(n), indexing="ij")
+    transient = (a != p) & (a != y)
+    # Spawned on the Prey is a capture, spawned on the Predator a death
+    terminal = (a == y).astype(np.float64)
+    utility = terminal.copy()
+    for _ in range(maxIterations):
+        q = np.where(valid, capture + gamma*(probs*utility.ravel()[nextState]).sum(axis=(4, 5)), -np.inf)
+        updated = np.where(transient, q.max(axis=3), terminal)
+        change = np.abs(updated - utility).max()
+        utility = updated
+        if change < tol:
+            break
+    best = q.max(axis=3, keepdims=True)
+    weights = (valid & (q >= best - 1e-9)).astype(np.int8)
+    weights[~transient] = 0
+    weights[~transient, -1] = 1
+    return utility, weights
+
+def optimalPolicy(nodes, distraction=0.0):
+    """_summary_
+        Greedy policy of the optimal agent for a graph, solved on first use and kept while the graph is alive
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        distraction (float, optional): Probability of a random Predator move instead of a chasing move
+
+    Returns: Move weights indexed [agentPos, predatorPos, preyPos]
+        _type_: np.ndarray
+    """
+    graph = graphOf(nodes)
+    policies = solvedPolicies.setdefault(graph, dict())
+    if distraction not in policies:
+        policies[distraction] = valueIteration(graph, distraction)[1]
+    return policies[distraction]
+
+def optimalAgent(nodes, predatorPos, agentPos, preyPos):
+    """_summary_
+        Run one episode with the optimal full information agent, following the same step order and end of game checks as agent1
+    Args:
+        nodes (Dictionary): Dictionary with all the node information in the graph
+        predatorPos (int): The location of the Predator on the chain graph
+        agentPos (int): The location of the Agent on the chain graph
+        preyPos (int): The location of the Prey on the chain graph
+
+    Returns: The status of completion of the agent the final step count for the Agent to reach the goal, the path taken by the agent
+            and the path of the predator.
+        _type_: json
+    """
+    threshold = 1000
+    weights = optimalPolicy(nodes)
+    agentPath = [agentPos]
+    predPath = [predatorPos]
+    for counter in range(1,threshold+1):
+        if agentPos == preyPos:
+            return {"statusCode": 200, "steps":counter, "AgentPath":agentPath, "PredPath":predPath}
+        
+        if agentPos == predatorPos:
+            return {"statusCode": 400, "steps":counter, "AgentPath":agentPath, "PredPath":predPath}
+        # Pick uniformly among the optimal moves
+        agentPos = compiledMove(nodes, weights, agentPos, predatorPos, preyPos)
+        agentPath.append(agentPos)
+        if agentPos == preyPos:
+            return {"statusCode": 200, "steps":counter, "AgentPath":agentPath, "PredPath":predPath}
+        # Making the prey move
+        preyPos = preyMovement(nodes, preyPos)
+        if agentPos == preyPos:
+            return {"statusCode": 200, "steps":counter, "AgentPath":agentPath, "PredPath":predPath}
+        # Conditions for Predator killing the agent
+        predDict = predatorMovement(agentPos, predatorPos, nodes)
+        if predDict["statusCode"] == 200:
+            predatorPos = predDict["predatorPos"]
+            predPath.append(predatorPos)
+            
+        elif predDict["statusCode"] == 400:
+            return {"statusCode": 400, "steps":counter, "AgentPath":agentPath, "PredPath":predPath}
+        
+    return {"statusCode": 404, "steps":counter, "AgentPath":agentPath, "PredPath":predPath}
+
+def driver(corpus=None, trial=0):
+    """_summary_
+        Driver Code for the optimal agent
+    Args:
+        corpus (GraphCorpus, optional): Pregenerated graphs and spawn positions, a new environment is generated when None
+        trial (int, optional): Index of the corpus entry to run
+    """
+    if corpus is None:
+        nodes, _ = genEnvironment()
+        predatorPos, agentPos, preyPos = spawnCreatures()
+    else:
+        nodes, _, predatorPos, agentPos, preyPos = corpus.trial(trial)
+    return optimalAgent(nodes, predatorPos, agentPos, preyPos)
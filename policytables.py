@@ -0,0 +1,162 @@
+# Imports
+import hashlib
+import os
+import random
+import weakref
+import numpy as np
+from genenvironment import graphOf
+
+# Directory the compiled decision tables are written to and read from, None keeps them in memory only
+tableDirectory = None
+# Tables compiled or loaded in this process, dropped together with their graph
+compiledTables = weakref.WeakKeyDictionary()
+
+def firstMaxWeights(values, valid, start):
+    """_summary_
+        Multiplicity of every neighbour in a candidate list built the way the agents build theirs: walking the neighbours in order,
+        a value above the current best clears the list and is appended, and a value equal to the best is appended (again).
+        The first neighbour reaching a best above start therefore appears twice and random.choice picks it twice as often
+    Args:
+        values (np.ndarray): Value of every neighbour slot along the last axis
+        valid (np.ndarray): Which slots hold a neighbour
+        start (np.ndarray): Best value before the first neighbour, broadcast against values without the last axis
+
+    Returns: Number of copies of every neighbour slot in the final list
+        _type_: np.ndarray
+    """
+    values = np.where(valid, values, np.iinfo(np.int32).min)
+    best = np.maximum(values.max(axis=-1), start)
+    members = valid & (values == best[..., None])
+    weights = members.astype(np.int8)
+    raised = (best > start)[..., None]
+    # np.argmax returns the first member, the one that cleared the list
+    first = np.argmax(members, axis=-1)[..., None]
+    np.put_along_axis(weights, first, np.take_along_axis(weights, first, axis=-1) + raised, axis=-1)
+    return weights
+
+def compileAgent1Policy(graph):
+    """_summary_
+        Evaluate the decision rule of agent1 for every (agentPos, predatorPos, preyPos) at once. The move of agent1 only depends on
+        the distances between the three positions, the random part is the random.choice among the candidate list
+    Args:
+        graph (Graph): The array backed graph
+
+    Returns: weights[a][p][y][k] is how many times the k-th neighbour of a is in the list agent1 picks from,
+        the last slot k = maxDegree stands for staying on a
+        _type_: np.ndarray
+    """
+    dist = graph.distanceTable().dist.astype(np.int32)
+    padded = graph.paddedNeighbours()
+    valid = padded >= 0
+    n, width = graph.size, padded.shape[1]
+    weights = np.zeros((n, n, n, width+1), dtype=np.int8)
+    for a in range(n):
+        neighbours, ok = np.where(valid[a], padded[a], 0), np.broadcast_to(valid[a], (n, n, width))
+        # Axes are predator, prey, neighbour slot
+        neighPredDist = dist[neighbours].T[:, None, :]
+        neighPreyDist = dist[neighbours].T[None, :, :]
+        agentPredDist = dist[a][:, None]
+        agentPreyDist = dist[a][None, :]
+        difference = neighPredDist - neighPreyDist
+        nextNeigh = firstMaxWeights(difference, ok, -50)
+        # Distances of neighbours differ by at most one, so the lists only keep neighbours gaining on both (or, failing that, on neither)
+        predGain = neighPredDist - agentPredDist[:, :, None]
+        preyGain = agentPreyDist[:, :, None] - neighPreyDist
+        bothGain = np.where((predGain == 1) & (preyGain == 1), 1, np.where((predGain == 0) & (preyGain == 0), 0, -1))
+        maybeNeigh = firstMaxWeights(bothGain, ok, 0)
+        maxPredDistNeigh = firstMaxWeights(np.broadcast_to(neighPredDist, (n, n, width)), ok, np.broadcast_to(agentPredDist, (n, n)))
+        useNext = np.where(ok, difference, -50).max(axis=2) >= 0
+        useMaybe = ~useNext & (maybeNeigh.sum(axis=2) > 0)
+        useMaxPred = ~useNext & ~useMaybe & (maxPredDistNeigh.sum(axis=2) > 0)
+        chosen = np.where(useNext[:, :, None], nextNeigh, np.where(useMaybe[:, :, None], maybeNeigh, np.where(useMaxPred[:, :, None], maxPredDistNeigh, 0)))
+        weights[a, :, :, :width] = chosen
+        # No candidate at all, the agent stays where it is
+        weights[a, :, :, width] = ~(useNext | useMaybe | useMaxPred)
+    return weights
+
+def compileAgent2Policy(graph):
+    """_summary_
+        Evaluate the distance branch of agent2Movement for every (agentPos, predatorPos, preyPos) at once. When the Prey is closer
+        than the Predator agent2 simulates the future instead, those states get no weight at all and are left to simulateFuture
+    Args:
+        graph (Graph): The array backed graph
+
+    Returns: weights[a][p][y][k] is how many times the k-th neighbour of a is in the list agent2 picks from,
+        the last slot k = maxDegree stands for staying on a
+        _type_: np.ndarray
+    """
+    dist = graph.distanceTable().dist.astype(np.int32)
+    padded = graph.paddedNeighbours()
+    valid = padded >= 0
+    n, width = graph.size, padded.shape[1]
+    weights = np.zeros((n, n, n, width+1), dtype=np.int8)
+    for a in range(n):
+        # Axes are predator, neighbour slot
+        neighPredDist = np.where(valid[a], dist[np.where(valid[a], padded[a], 0)].T, -1)
+        best = np.maximum(neighPredDist.max(axis=1), dist[a])
+        # The list starts with the agent itself and only a strictly farther neighbour clears it
+        members = neighPredDist == best[:, None]
+        stay = best == dist[a]
+        simulate = dist[a][None, :] < dist[a][:, None]
+        weights[a, :, :, :width] = members[:, None, :] & ~simulate[:, :, None]
+        weights[a, :, :, width] = stay[:, None] & ~simulate
+    return weights
+
+# Compiler of every decision table that can be requested by name
+policyCompilers = {"agent1": compileAgent1Policy, "agent2": compileAgent2Policy}
+
+def graphKey(graph):
+    """_summary_
+        Key identifying a graph on disk, the digest of its neighbour arrays
+    Args:
+        graph (Graph): The array backed graph
+
+    Returns: Hexadecimal key of the graph
+        _type_: str
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(graph.indptr).tobytes())
+    digest.update(np.ascontiguousarray(graph.indices).tobytes())
+    return digest.hexdigest()[:20]
+
+def decisionTable(nodes, name):
+    """_summary_
+        Compiled decision table of an agent on a graph. It is compiled once per graph and, when tableDirectory is set, written to
+        tableDirectory/<name>-<graphKey>.npy so later runs on the same graph memory map it instead of compiling it again
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        name (str): Name of the decision rule, a key of policyCompilers
+
+    Returns: Move weights indexed [agentPos, predatorPos, preyPos]
+        _type_: np.ndarray
+    """
+    graph = graphOf(nodes)
+    tables = compiledTables.setdefault(graph, dict())
+    if name not in tables:
+        path = None if tableDirectory is None else os.path.join(tableDirectory, f"{name}-{graphKey(graph)}.npy")
+        if path is not None and os.path.exists(path):
+            tables[name] = np.load(path, mmap_mode="r")
+        else:
+            tables[name] = policyCompilers[name](graph)
+            if path is not None:
+                os.makedirs(tableDirectory, exist_ok=True)
+                np.save(path, tables[name])
+    return tables[name]
+
+def compiledMove(nodes, table, agentPos, predatorPos, preyPos):
+    """_summary_
+        Draw the next agent position from a compiled decision table, the same distribution as random.choice over the candidate list
+    Args:
+        nodes (2D Dictionary): Dictionary with all the node information in the graph
+        table (np.ndarray): Move weights indexed [agentPos, predatorPos, preyPos]
+        agentPos (int): The location of the Agent on the chain graph
+        predatorPos (int): The location of the Predator on the chain graph
+        preyPos (int): The location of the Prey on the chain graph
+
+    Returns: The next agent position
+        _type_: int
+    """
+    weights = table[agentPos, predatorPos, preyPos].tolist()
+    options = list(nodes[agentPos]["neighbours"])
+    # Unused slots of low degree nodes have no weight, the last slot is staying on the same node
+    options += [agentPos]*(len(weights) - len(options))
+    return random.choices(options, weights)[0]
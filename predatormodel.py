@@ -0,0 +1,429 @@
+# Imports
+import numpy as np
+import random
+from preymodel import denseLimit
+
+def spreadOnAgent(probs, positions, agentPos, degree):
+    """_summary_
+        Belief version of the move probabilities of Predators on the agent's node. A chasing Predator there stays and kills, so a
+        belief only keeps mass on that node when the Predator was distracted and the agent survived. Like the original belief update
+        the chasing mass of that node goes evenly to its neighbours (all of them are closest to the agent) instead of staying
+    Args:
+        probs (np.ndarray): Move probabilities of every position, the last column is staying. Changed in place
+        positions (np.ndarray): The location of every Predator
+        agentPos (int): The location of the agent on the graph
+        degree (np.ndarray): Degree of every node of the graph
+
+    Returns: The changed probabilities
+        _type_: np.ndarray
+    """
+    rows = np.flatnonzero((positions == agentPos) & (degree[positions] > 0))
+    if len(rows) > 0:
+        count = degree[positions[rows]]
+        slots = np.arange(probs.shape[1]-1)[None, :] < count[:, None]
+        probs[rows, :-1] += probs[rows, -1:]*slots/count[:, None]
+        probs[rows, -1] = 0
+    return probs
+
+def sampleMoves(candidates, probs, rng=None):
+    """_summary_
+        Draw one move per row of candidates with the probabilities of that row, one draw per row
+    Args:
+        candidates (np.ndarray): Candidate next positions of every Predator
+        probs (np.ndarray): Probability of every candidate
+        rng (np.random.Generator, optional): Generator used for the draws, the numpy global random state is used when None
+
+    Returns: The next location of every Predator
+        _type_: np.ndarray
+    """
+    cdf = np.cumsum(probs, axis=1)
+    cdf /= cdf[:, -1:]
+    draw = np.random.random(len(probs)) if rng is None else rng.random(len(probs))
+    k = (cdf <= draw[:, None]).sum(axis=1)
+    return candidates[np.arange(len(probs)), k]
+
+class PredatorModel:
+    """_summary_
+        Compiled movement policy of the Predator on one graph. With probability 1-distraction the Predator moves to one of the neighbours
+        on a shortest path to the Agent (uniformly), with probability distraction it moves to a uniformly random neighbour.
+        The next move only depends on (predatorPos, agentPos), so the whole policy is one size x size x (maxDegree+1) table:
+        probs[p][a][k] is the probability of moving from p to candidates[p][k] while the Agent is at a. The last candidate of
+        every node is the node itself, used when the Predator is already on the Agent and chases, i.e. stays put. Beliefs are moved
+        with transitMoves, where that staying mass goes to the neighbours instead (see spreadOnAgent)
+    Args:
+        graph (Graph): The array backed graph, its distance table is used to find the chasing moves
+        distraction (float, optional): Probability of a random move instead of a chasing move, 0 is the Predator of genenvironment
+        probs (np.ndarray, optional): Precomputed probs table, e.g. memory mapped from a corpus store. cdf must be given with it
+        cdf (np.ndarray, optional): Precomputed cumulative probs table
+    """
+    def __init__(self, graph, distraction=0.0, probs=None, cdf=None):
+        self.graph = graph
+        self.distraction = distraction
+        self._transitions = dict()
+        self._dense = dict()
+        self._gathered = None
+        padded = graph.paddedNeighbours()
+        if probs is not None:
+            # Tables loaded from a corpus store, padded to the largest degree of the corpus with never picked -1 candidates
+            padded = np.pad(padded, ((0, 0), (0, probs.shape[2]-1-padded.shape[1])), constant_values=-1)
+            self.candidates = np.concatenate([padded, np.arange(graph.size, dtype=np.int32)[:, None]], axis=1)
+            self.probs, self.cdf = probs, cdf
+            return
+        dist = graph.distanceTable().dist
+        valid = padded >= 0
+        self.candidates = np.concatenate([padded, np.arange(graph.size, dtype=np.int32)[:, None]], axis=1)
+        # Distance from every neighbour of p to every a, as p x a x k
+        neighDist = dist[np.where(valid, padded, 0)].transpose(0, 2, 1)
+        chase = valid[:, None, :] & (neighDist == (dist - 1)[:, :, None])
+        chaseCount = chase.sum(axis=2)
+        self.probs = np.zeros((graph.size, graph.size, padded.shape[1]+1))
+        self.probs[:, :, :-1] = (1-distraction)*chase/np.maximum(chaseCount, 1)[:, :, None]
+        self.probs[:, :, :-1] += distraction*(valid/np.maximum(graph.degree, 1)[:, None])[:, None, :]
+        # Nowhere closer to go (already on the Agent): the chasing Predator stays
+        self.probs[:, :, -1] = (1-distraction)*(chaseCount == 0)
+        self.cdf = np.cumsum(self.probs, axis=2)
+        self.cdf /= self.cdf[:, :, -1:]
+
+    def distribution(self, predatorPos, agentPos):
+        """_summary_
+            Next move distribution of the Predator
+        Args:
+            predatorPos (int): The location of the predator on the graph
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The candidate next positions and their probabilities
+            _type_: tuple of np.ndarray
+        """
+        return self.candidates[predatorPos], self.probs[predatorPos, agentPos]
+
+    def move(self, predatorPos, agentPos, rng=None):
+        """_summary_
+            Sample the next position of the Predator with a single draw
+        Args:
+            predatorPos (int): The location of the predator on the graph
+            agentPos (int): The location of the agent on the graph
+            rng (np.random.Generator, optional): Generator used for the draw, the random module is used when None
+
+        Returns: The next position of the Predator, predatorPos itself when it stays
+            _type_: int
+        """
+        draw = random.random() if rng is None else rng.random()
+        k = int(np.searchsorted(self.cdf[predatorPos, agentPos], draw, side="right"))
+        return int(self.candidates[predatorPos, k])
+
+    def moveBatch(self, predatorPos, agentPos, rng):
+        """_summary_
+            Sample the next position of many Predators at once, one draw per Predator like move
+        Args:
+            predatorPos (np.ndarray): The location of every predator
+            agentPos (np.ndarray): The location of the agent each predator chases
+            rng (np.random.Generator): Generator used for the draws
+
+        Returns: The next position of every Predator, its current position when it stays
+            _type_: np.ndarray
+        """
+        draw = rng.random(len(predatorPos))
+        k = (self.cdf[predatorPos, agentPos] <= draw[:, None]).sum(axis=1)
+        return self.candidates[predatorPos, k]
+
+    def transitMoves(self, positions, agentPos):
+        """_summary_
+            Move probabilities of many possible Predators chasing the same agent, the rows of probs with the belief version of the
+            agent's node (see spreadOnAgent)
+        Args:
+            positions (np.ndarray): The location of every Predator
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The candidate next positions of every Predator and their probabilities
+            _type_: tuple of np.ndarray
+        """
+        probs = spreadOnAgent(np.array(self.probs[positions, agentPos]), positions, agentPos, self.graph.degree)
+        return self.candidates[positions], probs
+
+    def step(self, positions, agentPos, rng=None):
+        """_summary_
+            Move many possible Predators chasing the same agent at once, e.g. the particles of a ParticleBelief, with the
+            probabilities of transitMoves
+        Args:
+            positions (np.ndarray): Current location of every Predator
+            agentPos (int): The location of the agent on the graph
+            rng (np.random.Generator, optional): Generator used for the draws, the numpy global random state is used when None
+
+        Returns: The next location of every Predator
+            _type_: np.ndarray
+        """
+        return sampleMoves(*self.transitMoves(positions, agentPos), rng)
+
+    def transitionMatrix(self, agentPos):
+        """_summary_
+            Sparse transition matrix of the Predator while the Agent stays at agentPos, built on first use and cached per agent position.
+            Stored in coordinate form: the Predator moves from prev[i] to next[i] with probability weight[i]
+        Args:
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The next, prev and weight arrays of the non zero entries
+            _type_: tuple of np.ndarray
+        """
+        matrix = self._transitions.get(agentPos)
+        if matrix is None:
+            candidates, probs = self.transitMoves(np.arange(self.graph.size), agentPos)
+            prev, k = np.nonzero(probs)
+            matrix = self._transitions[agentPos] = (candidates[prev, k].astype(np.int64), prev, probs[prev, k])
+        return matrix
+
+    def denseMatrix(self, agentPos):
+        """_summary_
+            Transition matrix of the Predator while the Agent stays at agentPos as a dense size x size array, built on first use and
+            cached per agent position. Only used for graphs of at most denseLimit nodes, like the dense matrix of the PreyModel
+        Args:
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The matrix, matrix[i][j] is the probability of moving from j to i
+            _type_: np.ndarray
+        """
+        matrix = self._dense.get(agentPos)
+        if matrix is None:
+            nextPos, prev, weight = self.transitionMatrix(agentPos)
+            matrix = self._dense[agentPos] = np.zeros((self.graph.size, self.graph.size))
+            matrix[nextPos, prev] = weight
+        return matrix
+
+    def transit(self, belief, agentPos, out=None, scale=1.0):
+        """_summary_
+            Move a belief over the Predator position one Predator step forward, a single matrix vector product: dense on small
+            graphs, otherwise sparse with the probability of every move gathered into a buffer kept between calls
+        Args:
+            belief (np.ndarray): Probability of the Predator being at every node
+            agentPos (int): The location of the agent on the graph
+            out (np.ndarray, optional): Array to write the result to, a new one is returned when None
+            scale (float, optional): Factor the moved belief is multiplied by, e.g. the renormalization of a survey
+
+        Returns: The belief after the Predator moved
+            _type_: np.ndarray
+        """
+        if self.graph.size <= denseLimit:
+            result = np.dot(self.denseMatrix(agentPos), belief, out=out)
+            if scale != 1:
+                result *= scale
+            return result
+        nextPos, prev, weight = self.transitionMatrix(agentPos)
+        if self._gathered is None:
+            self._gathered = np.empty(self.candidates.size)
+        gathered = self._gathered[:len(prev)]
+        np.take(np.asarray(belief), prev, out=gathered)
+        np.multiply(gathered, weight, out=gathered)
+        result = np.bincount(nextPos, weights=gathered, minlength=self.graph.size)
+        if out is None:
+            out = result
+        if scale != 1:
+            return np.multiply(result, scale, out=out)
+        if out is not result:
+            out[:] = result
+        return out
+
+    def transitSparse(self, support, mass, agentPos):
+        """_summary_
+            Move a belief that is only non zero on a few nodes one Predator step forward, touching only those nodes and their neighbours.
+            The moves are summed in the same order as transit, so the result is the same as the dense product
+        Args:
+            support (np.ndarray): Sorted nodes the Predator may be on
+            mass (np.ndarray): Probability of the Predator being at each of those nodes
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The sorted nodes the Predator may be on after its move and their probabilities
+            _type_: tuple of np.ndarray
+        """
+        candidates, probs = self.transitMoves(support, agentPos)
+        prev, k = np.nonzero(probs)
+        nodes, inverse = np.unique(candidates[prev, k], return_inverse=True)
+        return nodes, np.bincount(inverse, weights=probs[prev, k]*mass[prev], minlength=len(nodes))
+
+    def transitBatch(self, beliefs, agentPos):
+        """_summary_
+            Move the beliefs of many episodes one Predator step forward. Rows are grouped by agent position and every group is one
+            product with the cached transition matrix of that position
+        Args:
+            beliefs (np.ndarray): One belief over the Predator position per row
+            agentPos (np.ndarray): The location of the agent of every row
+
+        Returns: The beliefs after the Predators moved
+            _type_: np.ndarray
+        """
+        n = self.graph.size
+        result = np.empty_like(beliefs)
+        for position in np.unique(agentPos):
+            rows = np.flatnonzero(agentPos == position)
+            nextPos, prev, weight = self.transitionMatrix(int(position))
+            # Offset every row of the group into its own block of n bins
+            bins = (np.arange(len(rows))*n)[:, None] + nextPos[None, :]
+            result[rows] = np.bincount(bins.ravel(), weights=(beliefs[rows][:, prev]*weight).ravel(), minlength=len(rows)*n).reshape(len(rows), n)
+        return result
+
+class PredatorSampler:
+    """_summary_
+        Predator policy of PredatorModel for graphs too large for its size x size tables. The moves of a Predator are worked out when
+        they are needed from the distance field of the agent position, a row of the distance table when the graph has one or the
+        field the distance oracle of the graph caches otherwise, so moving K possible Predators costs O(K*maxDegree) once the field is known
+    Args:
+        graph (Graph): The array backed graph, its distance oracle is used to find the chasing moves
+        distraction (float, optional): Probability of a random move instead of a chasing move
+    """
+    def __init__(self, graph, distraction=0.0):
+        self.graph = graph
+        self.distraction = distraction
+        self.padded = graph.paddedNeighbours()
+
+    def moves(self, positions, agentPos):
+        """_summary_
+            Next move distribution of many Predators chasing the same agent, the rows of the probs table of PredatorModel
+        Args:
+            positions (np.ndarray): The location of every Predator
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The candidate next positions of every Predator (the last one is staying) and their probabilities
+            _type_: tuple of np.ndarray
+        """
+        if self.graph._distances is not None:
+            field = self.graph._distances.dist[agentPos]
+        else:
+            field = self.graph.distanceOracle().field(agentPos)
+        padded = self.padded[positions]
+        valid = padded >= 0
+        chase = valid & (field[np.where(valid, padded, 0)] == (field[positions] - 1)[:, None])
+        chaseCount = chase.sum(axis=1)
+        probs = np.zeros((len(positions), padded.shape[1]+1))
+        probs[:, :-1] = (1-self.distraction)*chase/np.maximum(chaseCount, 1)[:, None]
+        probs[:, :-1] += self.distraction*(valid/np.maximum(self.graph.degree[positions], 1)[:, None])
+        probs[:, -1] = (1-self.distraction)*(chaseCount == 0)
+        return np.concatenate([padded, positions[:, None]], axis=1), probs
+
+    def distribution(self, predatorPos, agentPos):
+        """_summary_
+            Next move distribution of the Predator
+        Args:
+            predatorPos (int): The location of the predator on the graph
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The candidate next positions and their probabilities
+            _type_: tuple of np.ndarray
+        """
+        candidates, probs = self.moves(np.array([predatorPos]), agentPos)
+        return candidates[0], probs[0]
+
+    def transitMoves(self, positions, agentPos):
+        """_summary_
+            Move probabilities used for beliefs, see PredatorModel.transitMoves
+        Args:
+            positions (np.ndarray): The location of every Predator
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The candidate next positions of every Predator and their probabilities
+            _type_: tuple of np.ndarray
+        """
+        candidates, probs = self.moves(positions, agentPos)
+        return candidates, spreadOnAgent(probs, positions, agentPos, self.graph.degree)
+
+    def move(self, predatorPos, agentPos, rng=None):
+        """_summary_
+            Sample the next position of the Predator with a single draw, the same draw as PredatorModel.move
+        Args:
+            predatorPos (int): The location of the predator on the graph
+            agentPos (int): The location of the agent on the graph
+            rng (np.random.Generator, optional): Generator used for the draw, the random module is used when None
+
+        Returns: The next position of the Predator, predatorPos itself when it stays
+            _type_: int
+        """
+        candidates, probs = self.distribution(predatorPos, agentPos)
+        cdf = np.cumsum(probs)
+        cdf /= cdf[-1]
+        draw = random.random() if rng is None else rng.random()
+        return int(candidates[np.searchsorted(cdf, draw, side="right")])
+
+    def moveBatch(self, predatorPos, agentPos, rng):
+        """_summary_
+            Sample the next position of many Predators at once, one draw per Predator like PredatorModel.moveBatch
+        Args:
+            predatorPos (np.ndarray): The location of every predator
+            agentPos (np.ndarray): The location of the agent each predator chases
+            rng (np.random.Generator): Generator used for the draws
+
+        Returns: The next position of every Predator, its current position when it stays
+            _type_: np.ndarray
+        """
+        draw = rng.random(len(predatorPos))
+        result = np.empty(len(predatorPos), dtype=self.padded.dtype)
+        for position in np.unique(agentPos):
+            rows = np.flatnonzero(agentPos == position)
+            candidates, probs = self.moves(predatorPos[rows], int(position))
+            cdf = np.cumsum(probs, axis=1)
+            cdf /= cdf[:, -1:]
+            k = (cdf <= draw[rows][:, None]).sum(axis=1)
+            result[rows] = candidates[np.arange(len(rows)), k]
+        return result
+
+    def step(self, positions, agentPos, rng=None):
+        """_summary_
+            Move many possible Predators chasing the same agent at once, one draw per Predator like PredatorModel.step
+        Args:
+            positions (np.ndarray): Current location of every Predator
+            agentPos (int): The location of the agent on the graph
+            rng (np.random.Generator, optional): Generator used for the draws, the numpy global random state is used when None
+
+        Returns: The next location of every Predator
+            _type_: np.ndarray
+        """
+        return sampleMoves(*self.transitMoves(positions, agentPos), rng)
+
+    def transitSparse(self, support, mass, agentPos):
+        """_summary_
+            Move a belief that is only non zero on a few nodes one Predator step forward, see PredatorModel.transitSparse
+        Args:
+            support (np.ndarray): Sorted nodes the Predator may be on
+            mass (np.ndarray): Probability of the Predator being at each of those nodes
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The sorted nodes the Predator may be on after its move and their probabilities
+            _type_: tuple of np.ndarray
+        """
+        candidates, probs = self.transitMoves(support, agentPos)
+        prev, k = np.nonzero(probs)
+        nodes, inverse = np.unique(candidates[prev, k], return_inverse=True)
+        return nodes, np.bincount(inverse, weights=probs[prev, k]*mass[prev], minlength=len(nodes))
+
+    def transitionMatrix(self, agentPos):
+        """_summary_
+            Sparse transition matrix of the Predator while the Agent stays at agentPos, see PredatorModel.transitionMatrix. Built from
+            the moves of every node on each call, O(size*maxDegree), instead of being cached
+        Args:
+            agentPos (int): The location of the agent on the graph
+
+        Returns: The next, prev and weight arrays of the non zero entries
+            _type_: tuple of np.ndarray
+        """
+        candidates, probs = self.transitMoves(np.arange(self.graph.size), agentPos)
+        prev, k = np.nonzero(probs)
+        return candidates[prev, k].astype(np.int64), prev, probs[prev, k]
+
+    # Grouped by agent position like the compiled model, with the matrices built above
+    transitBatch = PredatorModel.transitBatch
+
+    def transit(self, belief, agentPos, out=None, scale=1.0):
+        """_summary_
+            Move a belief over the Predator position one Predator step forward, only the nodes with a non zero probability are moved
+        Args:
+            belief (np.ndarray): Probability of the Predator being at every node
+            agentPos (int): The location of the agent on the graph
+            out (np.ndarray, optional): Array to write the result to
+            scale (float, optional): Factor the moved belief is multiplied by, e.g. the renormalization of a survey
+
+        Returns: The belief after the Predator moved
+            _type_: np.ndarray
+        """
+        belief = np.asarray(belief)
+        support = np.flatnonzero(belief)
+        nodes, mass = self.transitSparse(support, belief[support], agentPos)
+        result = np.zeros(len(belief)) if out is None else out
+        result[:] = 0
+        result[nodes] = mass*scale if scale != 1 else mass
+        return result
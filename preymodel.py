@@ -0,0 +1,102 @@
+# Imports
+import numpy as np
+
+# Largest graph whose transition operators are kept as dense matrices, a matrix vector product of the neighbour arrays is
+# faster from about 170 nodes on
+denseLimit = 128
+
+class PreyModel:
+    """_summary_
+        Random walk of the Prey on one graph: every tick the Prey stays or moves to one of its neighbours, all with the same probability.
+        This is a fixed stochastic matrix of the graph, built once and shared by every belief update. Small graphs keep it dense
+        so a transit is a single matrix vector product written into the output buffer, larger graphs use the neighbour arrays
+    Args:
+        graph (Graph): The array backed graph
+    """
+    def __init__(self, graph):
+        self.graph = graph
+        self.stay = 1/(graph.degree + 1)
+        # Row of every entry of graph.indices
+        self.source = np.repeat(np.arange(graph.size), graph.degree)
+        self.matrix = None
+        if graph.size <= denseLimit:
+            # matrix[i][j] is the probability of moving from j to i
+            self.matrix = np.diag(self.stay)
+            self.matrix[self.source, graph.indices] = self.stay[graph.indices]
+        # options[i][:degree[i]] are the neighbours of i and options[i][degree[i]] is i itself
+        self.options = np.concatenate([graph.paddedNeighbours(), np.full((graph.size, 1), -1, dtype=np.int32)], axis=1)
+        self.options[np.arange(graph.size), graph.degree] = np.arange(graph.size)
+
+    def step(self, positions, rng=None):
+        """_summary_
+            Move many Prey at once, e.g. every rollout of a simulation. Each Prey stays or moves to one of its neighbours with the same
+            probability as preyMovement, using one bulk draw of an option index below degree+1 for every position
+        Args:
+            positions (np.ndarray): Current location of every Prey
+            rng (np.random.Generator, optional): Generator used for the draw, the numpy global random state is used when None
+
+        Returns: The next location of every Prey
+            _type_: np.ndarray
+        """
+        positions = np.asarray(positions)
+        high = self.graph.degree[positions] + 1
+        choice = np.random.randint(0, high) if rng is None else rng.integers(0, high)
+        return self.options[positions, choice]
+
+    def transit(self, belief, out=None, scale=1.0):
+        """_summary_
+            Move a belief over the Prey position one Prey step forward
+        Args:
+            belief (np.ndarray): Probability of the Prey being at every node
+            out (np.ndarray, optional): Array to write the result to, must not be belief itself. A new one is returned when None
+            scale (float, optional): Factor the moved belief is multiplied by, e.g. the renormalization of a survey
+
+        Returns: The belief after the Prey moved
+            _type_: np.ndarray
+        """
+        belief = np.asarray(belief, dtype=np.float64)
+        if self.matrix is not None:
+            result = np.dot(self.matrix, belief, out=out)
+            if scale != 1:
+                result *= scale
+            return result
+        spread = belief*self.stay
+        if scale != 1:
+            spread *= scale
+        result = np.bincount(self.source, weights=spread[self.graph.indices], minlength=self.graph.size)
+        if out is None:
+            return np.add(result, spread, out=result)
+        return np.add(result, spread, out=out)
+
+    def transitSparse(self, support, mass):
+        """_summary_
+            Move a belief that is only non zero on a few nodes one Prey step forward, touching only those nodes and their neighbours
+        Args:
+            support (np.ndarray): Sorted nodes the Prey may be on
+            mass (np.ndarray): Probability of the Prey being at each of those nodes
+
+        Returns: The sorted nodes the Prey may be on after its move and their probabilities
+            _type_: tuple of np.ndarray
+        """
+        options = self.options[support]
+        prev, k = np.nonzero(options >= 0)
+        nodes, inverse = np.unique(options[prev, k], return_inverse=True)
+        return nodes, np.bincount(inverse, weights=(mass*self.stay[support])[prev], minlength=len(nodes))
+
+    def transitBatch(self, beliefs):
+        """_summary_
+            Move the beliefs of many episodes one Prey step forward, a single product of the belief matrix with the transition operator
+        Args:
+            beliefs (np.ndarray): One belief over the Prey position per row
+
+        Returns: The beliefs after the Prey moved
+            _type_: np.ndarray
+        """
+        beliefs = np.asarray(beliefs, dtype=np.float64)
+        if self.matrix is not None:
+            return beliefs @ self.matrix.T
+        n = self.graph.size
+        spread = beliefs*self.stay
+        bins = (np.arange(len(beliefs))*n)[:, None] + self.source[None, :]
+        moved = np.bincount(bins.ravel(), weights=spread[:, self.graph.indices].ravel(), minlength=len(beliefs)*n)
+        return spread + moved.reshape(len(beliefs), n)
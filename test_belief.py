@@ -0,0 +1,183 @@
+# Imports
+import numpy as np
+import pytest
+import random
+from genenvironment import genEnvironment, graphOf
+from belief import Belief, LazyBelief, SparseBelief, ParticleBelief, surveyAndTransit
+from observation import ObservationModel, perfectSensor
+from predatormodel import PredatorSampler
+
+def smallGraph(size=50, seed=7):
+    nodes, size = genEnvironment(size, seed=seed)
+    return graphOf(nodes)
+
+def rescan(belief):
+    """_summary_
+        Nodes of the highest probability found by going through every node, the reference for the kept maxNodes.
+        LazyBelief decides its ties on the weights
+    """
+    if isinstance(belief, LazyBelief):
+        values = np.array([belief.weight(node) for node in range(len(belief))])
+    else:
+        values = np.asarray(belief.values)
+    return np.flatnonzero(values == values.max())
+
+def listSurvey(probs, node, found, falseNegative=0.0):
+    """_summary_
+        Survey update of the agents before the Belief class, a new list every time
+    """
+    prob = probs[node]
+    if found or prob == 1:
+        return [1 if i == node else 0 for i in range(len(probs))]
+    probs = list(probs)
+    probs[node] = falseNegative*prob
+    return [value/(1-prob+(falseNegative*prob)) for value in probs]
+
+@pytest.mark.parametrize("falseNegative", [0.0, 0.1])
+def test_beliefMatchesLists(falseNegative):
+    graph = smallGraph()
+    preyModel, predatorModel = graph.preyModel(), graph.predatorModel(0.4)
+    rng = np.random.default_rng(3)
+    random.seed(3)
+    prey, predator = Belief.uniform(graph.size, 0), Belief.oneHot(graph.size, 5)
+    preyList, predatorList = prey.tolist(), predator.tolist()
+    for step in range(100):
+        agentPos, node = (int(x) for x in rng.integers(graph.size, size=2))
+        found = bool(rng.random() < 0.05)
+        prey.survey(node, found, falseNegative).transit(preyModel)
+        preyList = preyModel.transit(listSurvey(preyList, node, found, falseNegative)).tolist()
+        predator.survey(agentPos, False, falseNegative).transit(predatorModel, agentPos)
+        predatorList = predatorModel.transit(listSurvey(predatorList, agentPos, False, falseNegative), agentPos).tolist()
+        for belief, probs in [(prey, preyList), (predator, predatorList)]:
+            np.testing.assert_allclose(belief.values, probs, rtol=1e-9, atol=1e-15)
+            # The same operations in the same order, so the ties of np.max are the same nodes
+            np.testing.assert_array_equal(np.sort(belief.scanMax()), np.flatnonzero(np.array(probs) == max(probs)))
+            assert belief.maxProb() == max(probs)
+
+@pytest.mark.parametrize("creature", ["prey", "predator", "sampler"])
+def test_transitSparseMatchesDense(creature):
+    graph = smallGraph(200)
+    operator = {"prey": graph.preyModel(), "predator": graph.predatorModel(0.4), "sampler": PredatorSampler(graph, 0.4)}[creature]
+    rng = np.random.default_rng(5)
+    for trial in range(20):
+        support = np.sort(rng.choice(graph.size, size=int(rng.integers(1, 30)), replace=False))
+        mass = rng.random(len(support))
+        belief = np.zeros(graph.size)
+        belief[support] = mass
+        args = () if creature == "prey" else (int(rng.integers(graph.size)),)
+        nodes, moved = operator.transitSparse(support, mass, *args)
+        dense = operator.transit(belief, *args)
+        np.testing.assert_array_equal(nodes, np.flatnonzero(dense))
+        np.testing.assert_allclose(moved, dense[nodes], rtol=1e-12)
+
+def test_sparseBeliefMatchesDense():
+    graph = smallGraph(200)
+    predatorModel = graph.predatorModel(0.4)
+    rng = np.random.default_rng(6)
+    sparse, dense = SparseBelief.oneHot(graph.size, 17), Belief.oneHot(graph.size, 17)
+    for step in range(60):
+        agentPos = int(rng.integers(graph.size))
+        found = bool(rng.random() < 0.1)
+        # Survey a node the Predator may be on, so the support changes
+        node = int(rng.choice(np.flatnonzero(dense.values))) if found else agentPos
+        sparse.survey(node, found).transit(predatorModel, agentPos)
+        dense.survey(node, found).transit(predatorModel, agentPos)
+        np.testing.assert_allclose(sparse.values, dense.values, rtol=1e-12, atol=1e-15)
+        if sparse.support is not None:
+            np.testing.assert_array_equal(sparse.support, np.flatnonzero(sparse.values))
+
+@pytest.mark.parametrize("size", [50, 300])
+@pytest.mark.parametrize("sensor", [perfectSensor, ObservationModel(0.1, 0.05)])
+def test_surveyAndTransitMatchesSeparate(sensor, size):
+    graph = smallGraph(size)
+    preyModel, predatorModel = graph.preyModel(), graph.predatorModel(0.4)
+    rng = np.random.default_rng(4)
+    prey, predator = Belief.uniform(graph.size, 0), Belief.oneHot(graph.size, 9)
+    preyAlone, predatorAlone = prey.copy(), predator.copy()
+    buffers = None
+    for step in range(80):
+        agentPos = int(rng.integers(graph.size))
+        preyFound, predFound = bool(rng.random() < 0.1), bool(rng.random() < 0.1)
+        prey, predator = surveyAndTransit(prey, predator, agentPos, preyFound, predFound, preyModel, predatorModel, sensor, sensor)
+        preyAlone = sensor.update(preyAlone, agentPos, preyFound).transit(preyModel)
+        predatorAlone = sensor.update(predatorAlone, agentPos, predFound).transit(predatorModel, agentPos)
+        for fused, alone in [(prey, preyAlone), (predator, predatorAlone)]:
+            np.testing.assert_allclose(fused.values, alone.values, rtol=1e-12, atol=1e-15)
+            fused.maxNode()
+            np.testing.assert_array_equal(np.sort(fused.maxNodes), rescan(fused))
+        # The updates write into the two buffers of every belief, nothing else is allocated
+        current = {id(prey.values), id(prey.spare), id(predator.values), id(predator.spare)}
+        assert buffers is None or current == buffers
+        buffers = current
+
+def test_failedSurveyRoundingMerge():
+    # Two probabilities a last bit apart that the renormalization of a failed survey rounds to the same value
+    a, b, prob = 0.249, np.nextafter(0.249, 1), 0.01
+    assert a/(1-prob) == b/(1-prob)
+    belief = Belief(np.r_[[a, b, prob], [(1-a-b-prob)/3]*3])
+    assert belief.maxProb() == b
+    belief.survey(2, False)
+    np.testing.assert_array_equal(belief.scanMax(), [0, 1])
+    belief.maxNode()
+    np.testing.assert_array_equal(belief.maxNodes, [0, 1])
+
+@pytest.mark.parametrize("cls", [Belief, LazyBelief, SparseBelief, ParticleBelief])
+def test_maxNodesMatchRescan(cls):
+    graph = smallGraph()
+    preyModel, predatorModel = graph.preyModel(), graph.predatorModel(0.4)
+    rng = np.random.default_rng(1)
+    random.seed(1)
+    for episode in range(20):
+        exclude = int(rng.integers(graph.size))
+        prey = ParticleBelief.uniform(graph.size, exclude, 512, rng) if cls is ParticleBelief else cls.uniform(graph.size, exclude)
+        for step in range(60):
+            action = rng.random()
+            node = int(rng.integers(graph.size))
+            if action < 0.5:
+                prey.survey(node, False, [0.0, 0.1, 2.5][int(rng.integers(3))])
+            elif action < 0.55:
+                prey.survey(node, True)
+            elif action < 0.8:
+                prey.transit(preyModel)
+            else:
+                prey.transit(predatorModel, node)
+            if step % 3:
+                prey.maxNode()
+            if prey.maxNodes is not None:
+                np.testing.assert_array_equal(np.sort(prey.maxNodes), rescan(prey))
+            # Copies share the kept nodes, they must stay valid for both
+            if step % 7 == 0:
+                other = prey.copy().survey(node, False)
+                other.maxNode()
+                np.testing.assert_array_equal(np.sort(other.maxNodes), rescan(other))
+
+@pytest.mark.parametrize("cls", [Belief, LazyBelief, SparseBelief, ParticleBelief])
+def test_transitKeepsMaxNodes(monkeypatch, cls):
+    graph = smallGraph()
+    preyModel, predatorModel = graph.preyModel(), graph.predatorModel(0.4)
+    prey = ParticleBelief.uniform(graph.size, 0, 512) if cls is ParticleBelief else cls.uniform(graph.size, 0)
+    for step in range(10):
+        prey.transit(predatorModel, step) if step % 2 else prey.transit(preyModel)
+        kept = prey.maxNodes
+        np.testing.assert_array_equal(np.sort(kept), rescan(prey))
+        # The transit searched the nodes while it updated, the queries do not search them again
+        with monkeypatch.context() as patch:
+            patch.setattr(cls, "scanMax", lambda self: pytest.fail("searched the nodes"))
+            assert prey.maxNode() in kept and prey.maxProb() == prey[kept[0]]
+
+def test_lazyTotalStaysNormalized():
+    # Failed surveys only shrink the total, which the transits must bring back to 1 instead of letting it underflow
+    graph = smallGraph()
+    preyModel = graph.preyModel()
+    prey = LazyBelief.uniform(graph.size, 0)
+    reference = prey.values.copy()
+    for step in range(400):
+        for node in range(graph.size):
+            if 0 < prey.weight(node) < prey.total:
+                prey.survey(node, False, 0.1)
+                reference[node] *= 0.1
+        prey.transit(preyModel)
+        reference = preyModel.transit(reference/reference.sum(), out=np.empty_like(reference))
+        assert prey.total == 1.0
+        assert abs(prey.weights.sum() - 1) < 1e-12
+    np.testing.assert_allclose(prey.values, reference, rtol=1e-9)
@@ -0,0 +1,33 @@
+# Imports
+import numpy as np
+from genenvironment import genEnvironment, graphOf
+from belief import Belief
+from beliefengine import BeliefBatch
+
+def test_batchMatchesBeliefs():
+    nodes, size = genEnvironment(60, seed=21)
+    graph = graphOf(nodes)
+    preyModel, predatorModel = graph.preyModel(), graph.predatorModel(0.4)
+    rng = np.random.default_rng(8)
+    count = 16
+    agentPos = rng.integers(size, size=count)
+    batch, beliefs = BeliefBatch.uniform(graph, agentPos), [Belief.uniform(size, int(node)) for node in agentPos]
+    predBatch = BeliefBatch.oneHot(graph, rng.integers(size, size=count))
+    predBeliefs = [Belief(row) for row in predBatch.values]
+    for step in range(40):
+        agentPos = rng.integers(size, size=count)
+        found = rng.random(count) < 0.05
+        falseNegative = rng.choice([0.0, 0.1], size=count)
+        batch.survey(agentPos, found, falseNegative).transitPrey()
+        predBatch.survey(agentPos, np.zeros(count, dtype=bool)).transitPredator(agentPos, 0.4)
+        for row in range(count):
+            beliefs[row].survey(int(agentPos[row]), bool(found[row]), float(falseNegative[row])).transit(preyModel)
+            predBeliefs[row].survey(int(agentPos[row]), False).transit(predatorModel, int(agentPos[row]))
+        for rows, single in [(batch, beliefs), (predBatch, predBeliefs)]:
+            np.testing.assert_allclose(rows.values, [belief.values for belief in single], rtol=1e-9, atol=1e-15)
+            np.testing.assert_allclose(rows.maxProb(), [belief.maxProb() for belief in single], rtol=1e-9)
+            # The batched products sum in another order, so the picked node is a highest one of the single belief up to rounding
+            picks = rows.maxNode(rng)
+            for row in range(count):
+                assert rows.values[row, picks[row]] == rows.values[row].max()
+                assert single[row][picks[row]] >= single[row].maxProb()*(1-1e-9)
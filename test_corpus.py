@@ -0,0 +1,84 @@
+# Imports
+import numpy as np
+import pytest
+from corpus import generateCorpus, saveCorpus, loadCorpus, spawnCreaturesBatch
+from genenvironment import Graph
+from predatormodel import PredatorModel
+from test_genenvironment import assertChordInvariants
+
+@pytest.mark.parametrize("distraction", [0.0, 0.4])
+def test_storedPredatorTables(tmp_path, distraction):
+    corpus = generateCorpus(3, 40, seed=9)
+    # A plain ring, of a smaller degree than the rest of the corpus
+    corpus.chords[1] = -1
+    saveCorpus(corpus, str(tmp_path))
+    stored = loadCorpus(str(tmp_path))
+    rng = np.random.default_rng(0)
+    for trial in range(len(stored)):
+        graph = stored.graph(trial)
+        model = graph.predatorModel(distraction)
+        # The tables are the memory mapped arrays themselves, nothing was rebuilt
+        assert isinstance(model.probs, np.memmap)
+        fresh = PredatorModel(Graph(graph.indptr, graph.indices), distraction)
+        for agentPos in rng.integers(graph.size, size=5):
+            agentPos = int(agentPos)
+            for predatorPos in range(graph.size):
+                candidates, probs = model.distribution(predatorPos, agentPos)
+                expected = dict(zip(*fresh.distribution(predatorPos, agentPos)))
+                assert {int(node): prob for node, prob in zip(candidates, probs) if prob > 0} == {int(node): prob for node, prob in expected.items() if prob > 0}
+            belief = rng.random(graph.size)
+            np.testing.assert_allclose(model.transit(belief, agentPos), fresh.transit(belief, agentPos), rtol=1e-12)
+        predatorPos, agentPos = rng.integers(graph.size, size=(2, 1000))
+        np.testing.assert_array_equal(model.moveBatch(predatorPos, agentPos, np.random.default_rng(1)), fresh.moveBatch(predatorPos, agentPos, np.random.default_rng(1)))
+
+@pytest.mark.parametrize("size,variation", [(50, 5), (123, 3), (40, 9)])
+def test_batchChordInvariants(size, variation):
+    corpus = generateCorpus(30, size, variation, seed=size)
+    for chord in corpus.chords:
+        assertChordInvariants(chord, size, variation)
+
+def test_sameSeedSameCorpus():
+    first, second = generateCorpus(8, 60, seed=4), generateCorpus(8, 60, seed=4)
+    np.testing.assert_array_equal(first.chords, second.chords)
+    np.testing.assert_array_equal(first.spawns, second.spawns)
+    assert not np.array_equal(first.chords, generateCorpus(8, 60, seed=5).chords)
+
+@pytest.mark.parametrize("size", [2, 3, 50])
+def test_spawnsAvoidAgent(size):
+    predator, agent, prey = spawnCreaturesBatch(20000, size, np.random.default_rng(size)).T
+    assert (predator != agent).all() and (prey != agent).all()
+    for positions in (predator, agent, prey):
+        assert positions.min() >= 0 and positions.max() < size
+    # Every node other than the agent is as likely for the Predator
+    counts = np.bincount((predator - agent) % size, minlength=size)[1:]
+    assert counts.min() > 0.7*counts.mean()
+
+def test_storedTablesRoundTrip(tmp_path):
+    corpus = generateCorpus(3, 40, seed=2)
+    # A plain ring, its tables are one slot narrower than the rest of the corpus
+    corpus.chords[1] = -1
+    saveCorpus(corpus, str(tmp_path), distractions=(0.4,))
+    stored = loadCorpus(str(tmp_path))
+    np.testing.assert_array_equal(stored.chords, corpus.chords)
+    np.testing.assert_array_equal(stored.spawns, corpus.spawns)
+    for trial in range(len(stored)):
+        graph = stored.graph(trial)
+        fresh = corpus.graph(trial)
+        np.testing.assert_array_equal(graph.indptr, fresh.indptr)
+        np.testing.assert_array_equal(graph.indices, fresh.indices)
+        table, freshTable = graph.distanceTable(), fresh.distanceTable()
+        width = freshTable.hops.shape[2]
+        np.testing.assert_array_equal(table.dist, freshTable.dist)
+        np.testing.assert_array_equal(table.hopCount, freshTable.hopCount)
+        np.testing.assert_array_equal(table.hops[:, :, :width], freshTable.hops)
+        assert (table.hops[:, :, width:] == -1).all()
+        model, freshModel = graph.predatorModel(0.4), PredatorModel(fresh, 0.4)
+        moves = freshModel.probs.shape[2] - 1
+        # The moves keep their slots, the padding slots get no probability and a flat cdf, and staying stays in the last slot
+        np.testing.assert_array_equal(model.probs[:, :, :moves], freshModel.probs[:, :, :-1])
+        assert (model.probs[:, :, moves:-1] == 0).all()
+        np.testing.assert_array_equal(model.probs[:, :, -1], freshModel.probs[:, :, -1])
+        np.testing.assert_array_equal(model.cdf[:, :, :moves], freshModel.cdf[:, :, :-1])
+        np.testing.assert_array_equal(model.cdf[:, :, moves:-1], np.repeat(freshModel.cdf[:, :, moves-1:moves], model.cdf.shape[2]-1-moves, axis=2))
+        np.testing.assert_array_equal(model.cdf[:, :, -1], freshModel.cdf[:, :, -1])
+    assert stored.graph(1).distanceTable().hops.shape[2] == 3 and corpus.graph(1).distanceTable().hops.shape[2] == 2
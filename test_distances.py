@@ -0,0 +1,137 @@
+# Imports
+import numpy as np
+import pytest
+import random
+from collections import Counter
+import genenvironment
+from genenvironment import BFS, Graph, genEnvironment, graphOf, pathLength
+from distances import DistanceOracle, LandmarkIndex, ShortestPathDAG, allPairsDistances, bidirectionalSearch
+
+def randomGraph(size, edges, seed):
+    """_summary_
+        Graph with random edges, which is usually not connected
+    """
+    rng = np.random.default_rng(seed)
+    u, v = rng.integers(size, size=(2, edges))
+    keep = u != v
+    pairs = np.unique(np.r_[np.c_[u[keep], v[keep]], np.c_[v[keep], u[keep]]], axis=0)
+    indptr = np.zeros(size+1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs[:, 0], minlength=size), out=indptr[1:])
+    return Graph(indptr, pairs[:, 1])
+
+def test_earlyExitPredecessors():
+    graph = graphOf(genEnvironment(200, seed=5)[0])
+    rng = np.random.default_rng(0)
+    for source, goal in rng.integers(graph.size, size=(20, 2)):
+        full, early = ShortestPathDAG(graph, int(source)), ShortestPathDAG(graph, int(source), int(goal))
+        # The early search stops once the level of the goal is complete, those levels keep the same DAG
+        for node in np.flatnonzero(full.dist <= full.dist[goal]):
+            assert early.dist[node] == full.dist[node]
+            np.testing.assert_array_equal(early.predecessors(node), full.predecessors(node))
+        for node in np.flatnonzero(full.dist > full.dist[goal]):
+            assert early.dist[node] == -1 and len(early.predecessors(node)) == 0
+
+@pytest.mark.parametrize("graph", [graphOf(genEnvironment(300, seed=seed)[0]) for seed in range(3)] + [randomGraph(200, edges, 4) for edges in (150, 300)])
+def test_landmarkBoundsAdmissible(graph):
+    dist = allPairsDistances(graph)
+    landmarks = LandmarkIndex(graph, count=4, seed=1)
+    rng = np.random.default_rng(2)
+    for start, goal in rng.integers(graph.size, size=(400, 2)):
+        start, goal = int(start), int(goal)
+        lower, upper = landmarks.bounds(start, goal)
+        if dist[start, goal] >= 0:
+            assert 0 <= lower <= dist[start, goal] <= upper
+        else:
+            assert (lower, upper) in ((-1, -1), (0, graph.size))
+        assert landmarks.distance(start, goal) == dist[start, goal]
+        other = tuple(int(x) for x in rng.integers(graph.size, size=2))
+        if dist[start, goal] >= 0 and dist[other] >= 0:
+            # agent8's agentPreyDist < agentPredDist*0.7 on path lengths
+            assert landmarks.lessThan(start, goal, *other, 0.7, 1) == (dist[start, goal]+1 < 0.7*(dist[other]+1))
+
+def test_pathLengthUsesLandmarks(monkeypatch):
+    nodes, size = genEnvironment(400, seed=9, precompute=False)
+    graph = graphOf(nodes)
+    dist = allPairsDistances(graph)
+    monkeypatch.setattr(genenvironment, "maxTableSize", 100)
+    rng = np.random.default_rng(3)
+    for start, goal in rng.integers(size, size=(200, 2)):
+        assert pathLength(nodes, int(start), int(goal)) == dist[start, goal] + 1
+    # Far goals are settled by the bounds without computing their field
+    assert graph._distances is None and graph._landmarks is not None
+    assert graph._landmarks.exactQueries < 200
+    assert graph.distanceOracle().misses <= graph._landmarks.exactQueries
+
+def assertShortestPath(graph, path, start, goal, length):
+    assert path[0] == start and path[-1] == goal and len(path) == length
+    for x, y in zip(path, path[1:]):
+        assert y in graph.neighbours(x)
+
+@pytest.mark.parametrize("bidirectional", [True, False])
+def test_searchReturnsShortestPath(bidirectional):
+    nodes, size = genEnvironment(200, seed=6)
+    graph = graphOf(nodes)
+    rng = np.random.default_rng(6)
+    for start, goal in rng.integers(size, size=(100, 2)):
+        start, goal = int(start), int(goal)
+        [path] = BFS(nodes, start, goal, bidirectional)["path"]
+        assertShortestPath(graph, path, start, goal, pathLength(nodes, start, goal))
+        distance, path = bidirectionalSearch(graph, start, goal, rng)
+        assert distance == pathLength(nodes, start, goal) - 1
+        assertShortestPath(graph, path, start, goal, distance + 1)
+
+def test_bidirectionalSearchUnreachable():
+    graph = randomGraph(200, 150, 4)
+    dist = allPairsDistances(graph)
+    for start, goal in np.argwhere(dist < 0)[:50]:
+        assert bidirectionalSearch(graph, int(start), int(goal)) == (-1, [])
+
+@pytest.mark.parametrize("bidirectional", [True, False])
+def test_searchUniformOverShortestPaths(bidirectional):
+    nodes, size = genEnvironment(60, seed=2)
+    graph = graphOf(nodes)
+    rng = np.random.default_rng(2)
+    random.seed(2)
+    dags = [ShortestPathDAG(graph, start) for start in range(size)]
+    pairs = [(start, goal) for start in range(size) for goal in range(size) if 3 <= dags[start].pathCount(goal) <= 6]
+    draws = 2000
+    for index in rng.choice(len(pairs), 4, replace=False):
+        start, goal = pairs[index]
+        sigma = dags[start].pathCount(goal)
+        if bidirectional:
+            counts = Counter(tuple(bidirectionalSearch(graph, start, goal, rng)[1]) for _ in range(draws))
+        else:
+            counts = Counter(tuple(BFS(nodes, start, goal)["path"][0]) for _ in range(draws))
+        # Every one of the sigma shortest paths is drawn with probability 1/sigma
+        assert len(counts) == sigma
+        spread = 5*np.sqrt(draws*(1/sigma)*(1-1/sigma))
+        for count in counts.values():
+            assert abs(count - draws/sigma) < spread
+
+def test_oracleLeastRecentlyUsed():
+    graph = graphOf(genEnvironment(100, seed=4)[0])
+    # Room for three fields of 100 int32 distances
+    oracle = DistanceOracle(graph, maxBytes=3*4*graph.size + 7)
+    assert oracle.capacity == 3
+    first = oracle.field(0)
+    assert oracle.field(0) is first
+    oracle.field(1)
+    oracle.field(2)
+    # 0 was used last before 1 and 2, so 1 is the least recently used field when 3 comes in
+    assert oracle.field(0) is first
+    oracle.field(3)
+    assert list(oracle.fields) == [2, 0, 3]
+    assert oracle.stats() == {"hits": 2, "misses": 4, "evictions": 1, "cached": 3}
+    assert oracle.field(0) is first
+    assert oracle.field(1) is not None and 2 not in oracle.fields
+
+def test_oracleMatchesTable():
+    graph = graphOf(genEnvironment(150, seed=8)[0])
+    table = graph.distanceTable()
+    oracle = DistanceOracle(graph, maxBytes=5*4*graph.size)
+    rng = np.random.default_rng(8)
+    for start, goal in rng.integers(graph.size, size=(500, 2)):
+        start, goal = int(start), int(goal)
+        assert oracle.distance(start, goal) == table.dist[start, goal]
+        np.testing.assert_array_equal(np.sort(oracle.closestNeighbours(start, goal)), np.sort(table.closestNeighbours(start, goal)))
+    assert oracle.evictions > 0 and len(oracle.fields) == oracle.capacity
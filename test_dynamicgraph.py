@@ -0,0 +1,38 @@
+# Imports
+import numpy as np
+import pytest
+from genenvironment import Graph, genEnvironment, graphOf
+from dynamicgraph import DynamicGraph
+
+def assertMatchesFresh(graph):
+    table, fresh = graph.distanceTable(), Graph(graph.indptr, graph.indices).distanceTable()
+    width = fresh.hops.shape[2]
+    np.testing.assert_array_equal(table.dist, fresh.dist)
+    np.testing.assert_array_equal(table.hopCount, fresh.hopCount)
+    # The repaired table may keep empty slots from a larger degree it had before
+    np.testing.assert_array_equal(table.hops[:, :, :width], fresh.hops)
+    assert (table.hops[:, :, width:] == -1).all()
+
+@pytest.mark.parametrize("size,seed", [(30, 1), (80, 2)])
+def test_changesMatchFreshTable(size, seed):
+    graph = DynamicGraph.fromGraph(graphOf(genEnvironment(size, seed=seed, precompute=False)[0]))
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        u, v = (int(x) for x in rng.choice(size, 2, replace=False))
+        if graph.hasEdge(u, v):
+            graph.removeEdge(u, v)
+        else:
+            graph.addEdge(u, v)
+        assertMatchesFresh(graph)
+
+def test_disconnectAndReconnect():
+    graph = DynamicGraph.fromGraph(graphOf(genEnvironment(40, seed=3, precompute=False)[0]))
+    removed = [(u, int(v)) for u in range(graph.size) for v in graph.neighbours(u) if u < v]
+    # Remove every edge so that the graph falls apart, then add them back in another order
+    for u, v in removed:
+        graph.removeEdge(u, v)
+        assertMatchesFresh(graph)
+    assert (graph.distanceTable().dist[~np.eye(graph.size, dtype=bool)] == -1).all()
+    for index in np.random.default_rng(3).permutation(len(removed)):
+        graph.addEdge(*removed[index])
+        assertMatchesFresh(graph)
@@ -0,0 +1,58 @@
+# Imports
+import numpy as np
+import pytest
+from genenvironment import genEnvironment, graphOf
+from beliefengine import ruleMoveBatch
+from evaluation import evaluatePolicy
+
+def rollouts(graph, weights, distraction, spawn, count, rng, threshold=1000):
+    """_summary_
+        Monte Carlo episodes of a full information agent in the order of the agent drivers
+    Returns: Whether every episode caught the Prey, whether it timed out and its reported number of steps
+        _type_: tuple
+    """
+    predatorModel, preyModel = graph.predatorModel(distraction), graph.preyModel()
+    predatorPos, agentPos, preyPos = (np.full(count, pos) for pos in spawn)
+    caught, steps, alive = np.zeros(count, dtype=bool), np.zeros(count), np.ones(count, dtype=bool)
+    def end(hit, success, counter):
+        hit &= alive
+        caught[hit], steps[hit] = success, counter
+        alive[hit] = False
+    for counter in range(1, threshold+1):
+        end(agentPos == preyPos, True, counter)
+        end(agentPos == predatorPos, False, counter)
+        if not alive.any():
+            break
+        agentPos = np.where(alive, ruleMoveBatch(graph, weights, agentPos, predatorPos, preyPos, rng), agentPos)
+        end(agentPos == preyPos, True, counter)
+        preyPos = np.where(alive, preyModel.step(preyPos, rng), preyPos)
+        end(agentPos == preyPos, True, counter)
+        nextPos = predatorModel.moveBatch(predatorPos, agentPos, rng)
+        # A Predator that stays has reached the agent
+        end(nextPos == predatorPos, False, counter)
+        predatorPos = np.where(alive, nextPos, predatorPos)
+    # The drivers report the last counter for the episodes that ran out of steps
+    steps[alive] = threshold
+    return caught, alive, steps
+
+@pytest.mark.parametrize("distraction,threshold", [(0.0, 1000), (0.4, 1000), (0.0, 3), (0.4, 4)])
+def test_evaluatePolicyMatchesRollouts(distraction, threshold):
+    nodes, size = genEnvironment(12, seed=3)
+    graph = graphOf(nodes)
+    # Random walk agent, it often steps onto the Predator, where a distracted Predator may move away instead of staying
+    moves = np.concatenate([graph.paddedNeighbours() >= 0, np.ones((size, 1), dtype=bool)], axis=1)
+    weights = np.broadcast_to(moves[:, None, None, :], (size, size, size, moves.shape[1])).astype(np.int64)
+    exact = evaluatePolicy(graph, weights, distraction, threshold)
+    np.testing.assert_allclose(exact["success"] + exact["death"] + exact["timeout"], 1, atol=1e-9)
+    rng = np.random.default_rng(0)
+    count = 40000
+    for spawn in [(6, 0, 3), (9, 2, 7), (4, 5, 11)]:
+        caught, timedOut, steps = rollouts(graph, weights, distraction, spawn, count, rng, threshold)
+        agentPos, predatorPos, preyPos = spawn[1], spawn[0], spawn[2]
+        for name, observed in [("success", caught), ("timeout", timedOut)]:
+            rate = exact[name][agentPos, predatorPos, preyPos]
+            assert abs(observed.mean() - rate) < 4*np.sqrt(rate*(1-rate)/count) + 1e-9
+        if threshold < 10:
+            # Short episodes time out often, long ones practically never
+            assert exact["timeout"][agentPos, predatorPos, preyPos] > 0.05
+        assert abs(steps.mean() - exact["steps"][agentPos, predatorPos, preyPos]) < 4*steps.std()/np.sqrt(count) + 1e-9
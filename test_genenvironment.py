@@ -0,0 +1,49 @@
+# Imports
+import numpy as np
+import pytest
+from genenvironment import genChords, genEnvironment, graphOf, ringGraph
+
+def loopDistance(a, b, size):
+    return np.minimum((a - b) % size, (b - a) % size)
+
+def test_sameSeedSameGraph():
+    first, second = graphOf(genEnvironment(300, seed=11)[0]), graphOf(genEnvironment(300, seed=11)[0])
+    np.testing.assert_array_equal(first.indptr, second.indptr)
+    np.testing.assert_array_equal(first.indices, second.indices)
+    assert not np.array_equal(first.indices, graphOf(genEnvironment(300, seed=12)[0]).indices)
+    # Without a seed the numpy global random state decides the graph
+    np.random.seed(3)
+    third = graphOf(genEnvironment(300)[0])
+    np.random.seed(3)
+    np.testing.assert_array_equal(third.indices, graphOf(genEnvironment(300)[0]).indices)
+
+def assertChordInvariants(chord, size, variation):
+    """_summary_
+        Check the extra edges of one graph against the rules of the generator
+    """
+    chord = np.asarray(chord, dtype=np.int64)
+    nodes = np.flatnonzero(chord >= 0)
+    # Chords are symmetric, so every node is the end of at most one chord and partners had degree 2 when they were picked
+    np.testing.assert_array_equal(chord[chord[nodes]], nodes)
+    gap = loopDistance(nodes, chord[nodes], size)
+    assert (gap >= 2).all() and (gap <= variation).all()
+    # A node left without a chord only had partners in its window that already got one
+    for node in np.flatnonzero(chord < 0):
+        window = (node + np.arange(-variation, variation+1)) % size
+        window = window[loopDistance(window, node, size) >= 2]
+        assert (chord[window] >= 0).all()
+
+@pytest.mark.parametrize("size,variation", [(50, 5), (301, 5), (1000, 2), (200, 9)])
+def test_chordInvariants(size, variation):
+    for seed in range(5):
+        assertChordInvariants(genChords(size, variation, np.random.default_rng(seed)), size, variation)
+
+def test_ringGraphNeighbours():
+    size = 120
+    chord = genChords(size, 5, np.random.default_rng(1))
+    graph = ringGraph(size, chord)
+    nodes = graph.nodes
+    for node in range(size):
+        expected = [(node-1) % size, (node+1) % size] + ([chord[node]] if chord[node] >= 0 else [])
+        assert graph.neighbours(node).tolist() == expected
+        assert list(nodes[node]["neighbours"]) == expected and nodes[node]["degree"] == len(expected)
@@ -0,0 +1,39 @@
+# Imports
+import numpy as np
+import pytest
+import random
+from genenvironment import genEnvironment, graphOf
+from evaluation import evaluatePolicy
+from optimalagent import optimalAgent, optimalPolicy, valueIteration
+from policytables import compileAgent1Policy
+
+def transientStates(size):
+    a, p, y = np.meshgrid(np.arange(size), np.arange(size), np.arange(size), indexing="ij")
+    return (a != p) & (a != y)
+
+def test_optimalEpisodesMatchEvaluation():
+    nodes, size = genEnvironment(8, seed=2)
+    graph = graphOf(nodes)
+    exact = evaluatePolicy(graph, optimalPolicy(nodes))
+    rng = np.random.default_rng(2)
+    random.seed(2)
+    np.random.seed(2)
+    spawns = np.argwhere(transientStates(size))
+    spawns = spawns[rng.integers(len(spawns), size=3000)]
+    caught = [optimalAgent(nodes, int(predatorPos), int(agentPos), int(preyPos))["statusCode"] == 200 for agentPos, predatorPos, preyPos in spawns]
+    expected = exact["success"][tuple(spawns.T)]
+    # Episodes are independent draws with these success probabilities
+    assert abs(np.mean(caught) - expected.mean()) < 4*np.sqrt((expected*(1-expected)).sum())/len(spawns) + 1e-9
+    assert expected.mean() < 1
+
+@pytest.mark.parametrize("distraction", [0.0, 0.4])
+def test_optimalBeatsAgent1(distraction):
+    for seed in range(3):
+        graph = graphOf(genEnvironment(8, seed=seed)[0])
+        utility, weights = valueIteration(graph, distraction)
+        optimal = evaluatePolicy(graph, weights, distraction)
+        agent1 = evaluatePolicy(graph, compileAgent1Policy(graph), distraction)
+        transient = transientStates(graph.size)
+        assert (optimal["success"][transient] >= agent1["success"][transient] - 1e-9).all()
+        # The utility is the capture probability discounted by the number of steps
+        assert (utility <= optimal["success"] + 1e-9).all()
@@ -0,0 +1,69 @@
+# Imports
+import numpy as np
+import pytest
+import random
+from genenvironment import genEnvironment, graphOf
+from predatormodel import PredatorModel, PredatorSampler
+from belief import SparseBelief
+
+def listTransit(nodes, size, predNodeProb, agentPos, dist, distraction):
+    """_summary_
+        Predator transit of the agents before the cached matrices: every node sends its chasing mass evenly to its neighbours closest
+        to the agent (all of them on the agent's node) and its distracted mass evenly to all of its neighbours
+    """
+    newPredNodeProb = [0]*size
+    for node in range(size):
+        neighbours = nodes[node]["neighbours"]
+        closest = min(dist[neigh, agentPos] for neigh in neighbours)
+        nextStep = [neigh for neigh in neighbours if dist[neigh, agentPos] == closest]
+        for step in nextStep:
+            newPredNodeProb[step] += (1-distraction)*predNodeProb[node]/len(nextStep)
+        for neigh in neighbours:
+            newPredNodeProb[neigh] += distraction*predNodeProb[node]/nodes[node]["degree"]
+    return newPredNodeProb
+
+@pytest.mark.parametrize("distraction", [0.0, 0.4])
+def test_transitMatchesList(distraction):
+    nodes, size = genEnvironment(60, seed=12)
+    graph = graphOf(nodes)
+    dist = graph.distanceTable().dist
+    rng = np.random.default_rng(1)
+    for model in [PredatorModel(graph, distraction), PredatorSampler(graph, distraction)]:
+        for agentPos in rng.integers(size, size=6):
+            agentPos = int(agentPos)
+            # Mass on the agent's node too, where a distracted Predator leaves the agent alive
+            belief = rng.random(size)
+            belief[agentPos] = 1
+            belief /= belief.sum()
+            expected = listTransit(nodes, size, belief.tolist(), agentPos, dist, distraction)
+            np.testing.assert_allclose(model.transit(belief, agentPos), expected, rtol=1e-12, atol=1e-15)
+            np.testing.assert_allclose(model.transitBatch(np.stack([belief, belief]), np.array([agentPos, agentPos])), [expected, expected], rtol=1e-12, atol=1e-15)
+            onAgent = SparseBelief.oneHot(size, agentPos).transit(model, agentPos)
+            np.testing.assert_allclose(onAgent.values, listTransit(nodes, size, [float(i == agentPos) for i in range(size)], agentPos, dist, distraction), rtol=1e-12, atol=1e-15)
+            assert onAgent.values[agentPos] == 0
+    # Moving a Predator itself keeps the staying chase on the agent's node, which is the kill
+    model = PredatorModel(graph, distraction)
+    assert model.distribution(3, 3)[1][-1] == 1-distraction
+
+@pytest.mark.parametrize("distraction", [0.0, 0.4])
+def test_samplerMatchesTables(distraction):
+    nodes, size = genEnvironment(60, seed=11)
+    graph = graphOf(nodes)
+    model, sampler = PredatorModel(graph, distraction), PredatorSampler(graph, distraction)
+    rng = np.random.default_rng(2)
+    for agentPos in rng.integers(size, size=5):
+        candidates, probs = sampler.moves(np.arange(size), int(agentPos))
+        np.testing.assert_array_equal(candidates, model.candidates)
+        np.testing.assert_allclose(probs, model.probs[:, agentPos], rtol=0, atol=1e-15)
+        for matrix, expected in zip(sampler.transitionMatrix(int(agentPos)), model.transitionMatrix(int(agentPos))):
+            np.testing.assert_array_equal(matrix, expected)
+    # The same draws give the same moves
+    predatorPos, agentPos = rng.integers(size, size=500), rng.integers(size, size=500)
+    np.testing.assert_array_equal(sampler.moveBatch(predatorPos, agentPos, np.random.default_rng(3)), model.moveBatch(predatorPos, agentPos, np.random.default_rng(3)))
+    random.seed(4)
+    moves = [sampler.move(int(p), int(a)) for p, a in zip(predatorPos, agentPos)]
+    random.seed(4)
+    np.testing.assert_array_equal(moves, [model.move(int(p), int(a)) for p, a in zip(predatorPos, agentPos)])
+    beliefs = rng.random((8, size))
+    beliefs /= beliefs.sum(axis=1, keepdims=True)
+    np.testing.assert_allclose(sampler.transitBatch(beliefs, agentPos[:8]), model.transitBatch(beliefs, agentPos[:8]), rtol=1e-12)
@@ -0,0 +1,37 @@
+# Imports
+import numpy as np
+import pytest
+import preymodel
+from genenvironment import genEnvironment, graphOf
+from preymodel import PreyModel
+
+def listTransit(nodes, size, preyNodeProb):
+    """_summary_
+        Prey transit of the agents before the shared operator, one loop over the nodes and their neighbours
+    """
+    newPreyNodeProb = [0]*size
+    for node in range(size):
+        prob = preyNodeProb[node]/(nodes[node]["degree"]+1)
+        for neighbour in nodes[node]["neighbours"]:
+            prob += preyNodeProb[neighbour]/(nodes[neighbour]["degree"]+1)
+        newPreyNodeProb[node] = prob
+    return newPreyNodeProb
+
+@pytest.mark.parametrize("dense", [True, False])
+def test_transitMatchesList(monkeypatch, dense):
+    if not dense:
+        monkeypatch.setattr(preymodel, "denseLimit", 0)
+    nodes, size = genEnvironment(80, seed=13)
+    preyModel = PreyModel(graphOf(nodes))
+    assert (preyModel.matrix is not None) == dense
+    rng = np.random.default_rng(0)
+    belief = rng.random(size)
+    belief /= belief.sum()
+    out = np.empty(size)
+    for step in range(20):
+        expected = listTransit(nodes, size, belief.tolist())
+        result = preyModel.transit(belief, out)
+        assert result is out
+        np.testing.assert_allclose(result, expected, rtol=1e-12, atol=1e-15)
+        belief = result.copy()
+    assert abs(belief.sum() - 1) < 1e-12